@@ -2,7 +2,7 @@ import os
 from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_site.settings')
 #IMPORTANT: get ASGI before any other imports
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
 
 import polls.routing
 
@@ -13,7 +13,8 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    # Reuse the handler built above instead of loading middleware twice
+    "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
         AuthMiddlewareStack(
             URLRouter(
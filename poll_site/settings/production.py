@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework_simplejwt',
 
@@ -141,6 +142,25 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
+# Expired polls are archived here before the cleanup deletes them, see
+# polls.archive. Without POLL_ARCHIVE_ROOT there is no archive storage
+# and the cleanup refuses to run rather than lose the polls
+POLL_ARCHIVE_ROOT = os.environ.get('POLL_ARCHIVE_ROOT')
+POLL_ARCHIVE_STORAGE = 'poll_archive' if POLL_ARCHIVE_ROOT else None
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+if POLL_ARCHIVE_STORAGE:
+    STORAGES[POLL_ARCHIVE_STORAGE] = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': POLL_ARCHIVE_ROOT},
+    }
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -149,15 +169,24 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # orjson-backed, byte-compatible with the stock JSON renderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Evaluates the anon, user and suspicious rates in one Redis call
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
-        'utils.throttling.SuspiciousRequestThrottle',
+        'utils.throttling.CompositeRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
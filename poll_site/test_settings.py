@@ -9,15 +9,24 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # orjson-backed, byte-compatible with the stock JSON renderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Evaluates the anon, user and suspicious rates in one Redis call
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
-        'utils.throttling.SuspiciousRequestThrottle',
+        'utils.throttling.CompositeRateThrottle',
     ],
     'DEFAULT_PAGINATION_CLASS': ('rest_framework.'
                                  'pagination.PageNumberPagination'),
@@ -37,3 +46,6 @@ CSRF_COOKIE_SECURE = False
 CSRF_TRUSTED_ORIGINS = [
     '*'
 ]
+
+# Tests invalidate the in-memory blocklist directly
+BLOCKLIST_SUBSCRIBE = False
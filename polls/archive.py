@@ -0,0 +1,134 @@
+# polls/archive.py
+import gzip
+import logging
+import tempfile
+import uuid
+from collections import defaultdict
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedPoll, Poll, Vote
+
+logger = logging.getLogger(__name__)
+
+POLL_COLUMNS = [
+    'id', 'question', 'options', 'is_anonymous', 'owner_id',
+    'start_date', 'expiry_date', 'created_at',
+]
+VOTE_COLUMNS = ['id', 'poll_id', 'user_id', 'option_index', 'created_at']
+
+
+class PollArchiver:
+    """
+    Moves expired polls to cold storage.
+    archive() streams a batch of polls, their votes and final results
+    into gzipped NDJSON files, one per expiry month under
+    {prefix}/YYYY/MM/, on the storage configured as POLL_ARCHIVE_STORAGE
+    (a local directory or any object storage backend). Every poll gets
+    an ArchivedPoll row pointing at its file, which keeps its results
+    for the API. Deleting the archived rows is left to the caller, see
+    polls.cleanup. There is no default storage: an archive written to
+    a stray local directory is as good as lost.
+
+    Each line is a JSON object with a "type" of "vote" or "poll"; the
+    votes of a poll come before it.
+    """
+
+    def __init__(self, storage_alias=None, prefix='poll-archive',
+                 chunk_size=2000, spool_size=8 * 1024 * 1024):
+        self.storage_alias = storage_alias
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.spool_size = spool_size
+
+    def get_storage(self):
+        if self.storage_alias is None:
+            raise ImproperlyConfigured(
+                'Set POLL_ARCHIVE_STORAGE to the STORAGES alias expired '
+                'polls are archived to')
+        return storages[self.storage_alias]
+
+    def get_path(self, month):
+        return '{}/{:%Y/%m}/{:%Y%m%dT%H%M%S}-{}.ndjson.gz'.format(
+            self.prefix, month, timezone.now(), uuid.uuid4().hex[:8])
+
+    def archive(self, poll_ids):
+        """
+        Archive the polls, returns the number of (polls, votes) written.
+        Polls archived before are written again but keep their index.
+        """
+        polls = Poll.objects.filter(pk__in=poll_ids).order_by(
+            'expiry_date').values(
+                *POLL_COLUMNS,
+                final_results=F('result_snapshot__results'))
+        by_month = defaultdict(list)
+        for poll in polls:
+            # Read back in UTC, so months are UTC months
+            by_month[poll['expiry_date'].date().replace(day=1)].append(poll)
+
+        archived = votes = 0
+        for month, month_polls in by_month.items():
+            votes += self.write(month, month_polls)
+            archived += len(month_polls)
+        return archived, votes
+
+    def write(self, month, polls):
+        """Write one month's file and index its polls"""
+        counts = Poll.count_votes_by_poll([poll['id'] for poll in polls])
+        votes = 0
+        with tempfile.SpooledTemporaryFile(self.spool_size) as spool:
+            with gzip.GzipFile(fileobj=spool, mode='wb') as archive:
+                rows = Vote.objects.filter(
+                    poll_id__in=[poll['id'] for poll in polls]
+                ).order_by('poll_id').values(*VOTE_COLUMNS)
+                for vote in rows.iterator(chunk_size=self.chunk_size):
+                    votes += 1
+                    archive.write(self.dumps('vote', vote))
+
+                for poll in polls:
+                    final_results = poll.pop('final_results')
+                    poll_counts = counts.get(poll['id'], {})
+                    poll['results'] = final_results or Poll.tally(
+                        poll['options'], poll_counts)
+                    poll['total_votes'] = sum(poll_counts.values())
+                    archive.write(self.dumps('poll', poll))
+
+            spool.seek(0)
+            path = self.get_storage().save(
+                self.get_path(month), File(spool))
+
+        ArchivedPoll.objects.bulk_create(
+            [ArchivedPoll(archive_path=path, **poll) for poll in polls],
+            ignore_conflicts=True)
+        logger.info("Archived %d polls and %d votes to %s",
+                    len(polls), votes, path)
+        return votes
+
+    @staticmethod
+    def dumps(kind, row):
+        return orjson.dumps({'type': kind, **row}) + b'\n'
+
+    def read(self, path):
+        """Yield the records of an archive file"""
+        with self.get_storage().open(path, 'rb') as stored:
+            with gzip.GzipFile(fileobj=stored, mode='rb') as archive:
+                for line in archive:
+                    yield orjson.loads(line)
+
+    def read_votes(self, archived_poll):
+        """Yield the votes of an archived poll from its file"""
+        poll_id = str(archived_poll.pk)
+        for record in self.read(archived_poll.archive_path):
+            if record['type'] == 'vote' and record['poll_id'] == poll_id:
+                yield record
+
+
+archiver = PollArchiver(
+    storage_alias=getattr(settings, 'POLL_ARCHIVE_STORAGE', None),
+    prefix=getattr(settings, 'POLL_ARCHIVE_PREFIX', 'poll-archive'))
@@ -24,8 +24,32 @@ app.conf.beat_schedule = {
         'task': 'polls.tasks.check_api_health',
         'schedule': 300.0,  # Run every 5 minutes
     },
+    'relay-poll-events': {
+        'task': 'polls.tasks.relay_poll_events',
+        'schedule': 10.0,  # Run every 10 seconds
+    },
+    'process-suspicious-events': {
+        'task': 'polls.tasks.process_suspicious_events',
+        'schedule': 10.0,  # Run every 10 seconds
+    },
+    'plan-poll-statuses': {
+        'task': 'polls.tasks.plan_poll_statuses',
+        'schedule': 30.0,  # Run every 30 seconds, see POLL_SCHEDULER_INTERVAL
+    },
+    'reconcile-poll-statuses': {
+        'task': 'polls.tasks.reconcile_poll_statuses',
+        'schedule': 60.0,  # Run every minute
+    },
+    'finalize-expired-polls': {
+        'task': 'polls.tasks.finalize_expired_polls',
+        'schedule': 10.0,  # Run every 10 seconds
+    },
     'cleanup-expired-polls': {
         'task': 'polls.tasks.cleanup_expired_polls',
         'schedule': 86400.0,  # Run daily
     },
+    'manage-vote-partitions': {
+        'task': 'polls.tasks.manage_vote_partitions',
+        'schedule': 86400.0,  # Run daily
+    },
 }
@@ -0,0 +1,231 @@
+# polls/cleanup.py
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive import archiver
+from .conditional import tally
+from .models import ArchivedPoll, Poll, PollOption, PollResultSnapshot, Vote
+from .partitions import add_months, partitions
+from .response_cache import POLLS, poll_key, response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiredPollCleaner:
+    """
+    Archives, then deletes, polls that expired more than retention_days
+    ago; without an archiver they are only deleted.
+
+    Votes are partitioned by the month their poll was created in, so a
+    past month whose polls have all expired loses its votes by dropping
+    the month's partition once its polls are archived, see
+    clear_month(). The remaining polls are taken in primary key chunks,
+    oldest expiry first. Their votes go first in short transactions of
+    at most vote_batch_size rows, then the snapshots, options and polls
+    together, all with plain DELETE statements so nothing is loaded
+    into memory. The database cascade is done here, so any new relation
+    to Poll must be added to delete_polls().
+
+    Batches, and the vote chunks within one, are spaced by batch_pause
+    seconds to spread the WAL and lock pressure of a large backlog.
+    run() stops once time_budget seconds are spent. No progress is
+    stored: deleted rows are simply gone, so the next run carries on
+    where this one stopped. It deletes nothing when the archiver has
+    no storage.
+    """
+
+    def __init__(self, archiver=None, retention_days=30, batch_size=500,
+                 vote_batch_size=5000, time_budget=60, batch_pause=0,
+                 requeue_delay=300):
+        self.archiver = archiver
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.vote_batch_size = vote_batch_size
+        self.time_budget = time_budget
+        self.batch_pause = batch_pause
+        # Seconds before the task runs again when time runs out
+        self.requeue_delay = requeue_delay
+
+    def get_batch(self, cutoff):
+        return list(Poll.objects.filter(
+            expiry_date__lt=cutoff
+        ).order_by('expiry_date', 'pk').values_list(
+            'pk', flat=True)[:self.batch_size])
+
+    def delete_votes(self, poll_ids):
+        """Delete the polls' votes in chunks, returns the count"""
+        table = connection.ops.quote_name(Vote._meta.db_table)
+        sql = (
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM {table} WHERE poll_id = ANY(%s) LIMIT %s)'
+        )
+        deleted = 0
+        while True:
+            if deleted:
+                self.pause()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [poll_ids, self.vote_batch_size])
+                count = cursor.rowcount
+            deleted += count
+            if count < self.vote_batch_size:
+                return deleted
+
+    def delete_batch(self, poll_ids):
+        """Delete the polls and their related rows, returns the counts"""
+        votes = self.delete_votes(poll_ids)
+        return self.delete_polls(poll_ids), votes
+
+    def delete_polls(self, poll_ids):
+        """Delete polls without votes left, returns the count"""
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (PollResultSnapshot, PollOption, Poll):
+                column = 'id' if model is Poll else 'poll_id'
+                cursor.execute(
+                    'DELETE FROM {} WHERE {} = ANY(%s)'.format(
+                        connection.ops.quote_name(model._meta.db_table),
+                        column),
+                    [poll_ids])
+            polls = cursor.rowcount
+        self.forget(poll_ids)
+        return polls
+
+    def get_expired_months(self, cutoff, now):
+        """
+        Vote partitions of past months whose polls all expired before
+        cutoff, as (name, month) oldest first.
+        """
+        months = Poll.objects.filter(
+            created_at__lt=partitions.month_start(now)
+        ).annotate(
+            month=TruncMonth('created_at', tzinfo=datetime.timezone.utc)
+        ).values('month').annotate(
+            latest=Max('expiry_date')
+        ).filter(latest__lt=cutoff).order_by('month')
+        existing = partitions.get_partitions()
+        return [(partitions.partition_name(row['month']), row['month'])
+                for row in months
+                if partitions.partition_name(row['month']) in existing]
+
+    def clear_month(self, name, month, started):
+        """
+        Archive the polls created in month, drop its vote partition and
+        delete the polls. Returns the polls and votes deleted, or None
+        if time ran out before the partition could be dropped; polls
+        archived by then are not archived again.
+        """
+        polls = Poll.objects.filter(
+            created_at__gte=month, created_at__lt=add_months(month, 1)
+        ).order_by('pk').values_list('pk', flat=True)
+        if self.archiver is not None:
+            pending = polls.exclude(
+                pk__in=ArchivedPoll.objects.values('pk'))
+            while True:
+                poll_ids = list(pending[:self.batch_size])
+                if not poll_ids:
+                    break
+                if self.out_of_time(started):
+                    return None
+                self.archiver.archive(poll_ids)
+
+        votes = partitions.drop_partition(name)
+        deleted = 0
+        # Left to the batches below if time runs out
+        while not self.out_of_time(started):
+            poll_ids = list(polls[:self.batch_size])
+            if not poll_ids:
+                break
+            deleted += self.delete_polls(poll_ids)
+        return deleted, votes
+
+    def forget(self, poll_ids):
+        """Drop what is still cached about the deleted polls"""
+        version_keys = {tally.version_key.format(poll_id): poll_id
+                        for poll_id in poll_ids}
+        keys = [*version_keys] + [
+            tally.voted_at_key.format(poll_id) for poll_id in poll_ids]
+        for key, version in cache.get_many(version_keys).items():
+            keys.append(tally.results_key.format(version_keys[key], version))
+        cache.delete_many(keys)
+        response_cache.purge(POLLS, *[poll_key(pk) for pk in poll_ids])
+
+    def pause(self):
+        if self.batch_pause > 0:
+            time.sleep(self.batch_pause)
+
+    def out_of_time(self, started):
+        return time.monotonic() - started >= self.time_budget
+
+    def run(self, now=None):
+        """
+        Delete expired polls until done or out of time.
+        Returns a dict with the polls and votes deleted, the vote
+        partitions dropped, the batches run, the seconds spent and
+        whether the backlog is cleared.
+        """
+        if self.archiver is not None:
+            # Raises ImproperlyConfigured before anything is deleted
+            self.archiver.get_storage()
+        now = now or timezone.now()
+        cutoff = now - timezone.timedelta(days=self.retention_days)
+        started = time.monotonic()
+        stats = {'polls': 0, 'votes': 0, 'partitions': 0, 'batches': 0,
+                 'finished': False}
+
+        for name, month in self.get_expired_months(cutoff, now):
+            if self.out_of_time(started):
+                break
+            result = self.clear_month(name, month, started)
+            if result is None:
+                break
+            polls, votes = result
+            stats['polls'] += polls
+            stats['votes'] += votes
+            stats['partitions'] += 1
+            stats['batches'] += 1
+            logger.info(
+                "Cleanup dropped vote partition %s: deleted %d polls and "
+                "%d votes (%.1fs)",
+                name, polls, votes, time.monotonic() - started)
+
+        while not self.out_of_time(started):
+            poll_ids = self.get_batch(cutoff)
+            if not poll_ids:
+                stats['finished'] = True
+                break
+            if stats['batches']:
+                self.pause()
+            if self.archiver is not None:
+                self.archiver.archive(poll_ids)
+            polls, votes = self.delete_batch(poll_ids)
+            stats['polls'] += polls
+            stats['votes'] += votes
+            stats['batches'] += 1
+            logger.info(
+                "Cleanup batch %d: deleted %d polls and %d votes "
+                "(%d polls, %d votes so far, %.1fs)",
+                stats['batches'], polls, votes, stats['polls'],
+                stats['votes'], time.monotonic() - started)
+
+        stats['elapsed'] = time.monotonic() - started
+        if not stats['finished']:
+            logger.info("Cleanup stopped after %.1fs, expired polls remain",
+                        stats['elapsed'])
+        return stats
+
+
+cleaner = ExpiredPollCleaner(
+    archiver=archiver,
+    retention_days=getattr(settings, 'POLL_RETENTION_DAYS', 30),
+    batch_size=getattr(settings, 'CLEANUP_BATCH_SIZE', 500),
+    vote_batch_size=getattr(settings, 'CLEANUP_VOTE_BATCH_SIZE', 5000),
+    time_budget=getattr(settings, 'CLEANUP_TIME_BUDGET', 60),
+    batch_pause=getattr(settings, 'CLEANUP_BATCH_PAUSE', 1),
+    requeue_delay=getattr(settings, 'CLEANUP_REQUEUE_DELAY', 300))
@@ -0,0 +1,101 @@
+# polls/conditional.py
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Vote
+
+
+class PollTally:
+    """
+    Per-poll vote tally version and time of the latest vote.
+    Both are advanced when a vote commits, so conditional GETs of a poll
+    and its results can be answered without counting votes.
+
+    Cached results are keyed by the version they were counted at, so a
+    reader that counted before a vote can only store its stale results
+    under a version nobody asks for any more.
+    """
+    version_key = 'poll_tally:{}:version'
+    voted_at_key = 'poll_tally:{}:voted_at'
+    results_key = 'poll_results_{}_{}'
+
+    def version(self, poll_id):
+        key = self.version_key.format(poll_id)
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock, so a lost counter never comes back
+            # to a version a client has already seen
+            cache.add(key, time.time_ns() // 1000, None)
+            version = cache.get(key, 0)
+        return version
+
+    def voted_at(self, poll_id):
+        """Timestamp of the poll's latest vote, 0 without votes"""
+        key = self.voted_at_key.format(poll_id)
+        voted_at = cache.get(key)
+        if voted_at is None:
+            latest = Vote.objects.filter(poll_id=poll_id).aggregate(
+                latest=Max('created_at'))['latest']
+            voted_at = latest.timestamp() if latest else 0
+            cache.add(key, voted_at, None)
+        return voted_at
+
+    def get_results_key(self, poll_id):
+        return self.results_key.format(poll_id, self.version(poll_id))
+
+    def count_vote(self, poll_id, created_at):
+        """Advance the tally after a vote, retiring the cached results"""
+        self.invalidate_results(poll_id)
+        cache.set(self.voted_at_key.format(poll_id),
+                  created_at.timestamp(), None)
+
+    def invalidate_results(self, poll_id):
+        try:
+            cache.incr(self.version_key.format(poll_id))
+        except ValueError:
+            # Not cached, the next version() starts from the clock
+            pass
+
+
+tally = PollTally()
+
+
+def poll_validators(request, poll):
+    """
+    Strong ETag and Last-Modified timestamp for a poll resource.
+    The ETag covers the poll's last edit, status and vote tally, the
+    requested representation and the user (for has_user_voted).
+    """
+    expired = poll.status == poll.Status.EXPIRED
+    user = request.user.pk if request.user.is_authenticated else ''
+    source = '|'.join(str(part) for part in [
+        request.path,
+        sorted(request.query_params.lists()),
+        poll.updated_at.isoformat(),
+        tally.version(poll.pk),
+        user,
+        poll.status,
+    ])
+    etag = '"%s"' % hashlib.sha1(source.encode()).hexdigest()
+
+    last_modified = max(poll.updated_at.timestamp(), tally.voted_at(poll.pk))
+    if expired:
+        last_modified = max(last_modified, poll.expiry_date.timestamp())
+    return etag, int(last_modified)
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the client's copy is current, otherwise None"""
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -1,9 +1,10 @@
 # polls/consumers.py
-import json
 import os
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from utils.renderers import dumps
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_site.settings')
 User = get_user_model()
@@ -21,10 +22,10 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
             await self.accept()
 
             # Send connection confirmation
-            await self.send(text_data=json.dumps({
+            await self.send_json({
                 'type': 'connection_established',
                 'data': {'message': 'Connected successfully'}
-            }))
+            })
         else:
             await self.close(code=4001)
 
@@ -37,7 +38,7 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         """Handle messages from WebSocket (subscriptions, etc.)"""
         try:
-            message = json.loads(text_data)
+            message = orjson.loads(text_data)
             message_type = message.get('type')
 
             if message_type == 'subscribe':
@@ -47,7 +48,7 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
             elif message_type == 'vote':
                 await self.handle_vote(message)
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             await self.send_error("Invalid JSON message")
 
     async def handle_subscribe(self, message):
@@ -65,10 +66,10 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
             await self.subscribe_to_channel(channel_name)
             self.subscriptions[channel_name] = True
 
-            await self.send(text_data=json.dumps({
+            await self.send_json({
                 'type': 'subscription_confirmed',
                 'data': {'channel': channel_name}
-            }))
+            })
 
     async def handle_unsubscribe(self, message):
         """Handle channel unsubscriptions"""
@@ -120,11 +121,11 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
     # Generic event handler for all channel messages
     async def channel_event(self, event):
         """Receive events from channel layers and forward to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': event['event_type'],
             'data': event['data'],
             'timestamp': event.get('timestamp')
-        }))
+        })
 
     @database_sync_to_async
     def authenticate_user(self):
@@ -144,9 +145,13 @@ class UnifiedConsumer(AsyncWebsocketConsumer):
             from django.contrib.auth.models import AnonymousUser
             self.scope["user"] = AnonymousUser()
 
+    async def send_json(self, content):
+        """Send a message serialized like the API's JSON responses"""
+        await self.send(text_data=dumps(content).decode())
+
     async def send_error(self, message):
         """Send error message to client"""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'error',
             'data': {'message': message}
-        }))
+        })
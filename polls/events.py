@@ -0,0 +1,164 @@
+# polls/events.py
+import asyncio
+import logging
+import threading
+from itertools import groupby
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import PollEvent
+
+logger = logging.getLogger(__name__)
+
+
+class EventRelay:
+    """
+    Publishes pending PollEvent rows to the channel layer in batches.
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of relays can drain the outbox concurrently. Events that fail to send
+    stay in the outbox and are retried on the next batch.
+    """
+
+    def __init__(self, batch_size=100, max_attempts=10):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._loop = None
+
+    def relay_batch(self):
+        """Publish one batch of pending events, returns the number sent"""
+        with transaction.atomic():
+            events = list(
+                PollEvent.objects
+                .select_for_update(skip_locked=True)
+                .order_by('id')[:self.batch_size]
+            )
+            if not events:
+                return 0
+
+            failed = self.run_async(self.send_batch(events))
+            sent = [event.pk for event in events if event.pk not in failed]
+            PollEvent.objects.filter(pk__in=sent).delete()
+            self.record_failures([
+                event for event in events if event.pk in failed])
+
+        return len(sent)
+
+    def relay_pending(self):
+        """Drain the outbox, returns the number of events sent"""
+        total = 0
+        while True:
+            sent = self.relay_batch()
+            total += sent
+            if sent < self.batch_size:
+                return total
+
+    def record_failures(self, events):
+        for event in events:
+            if event.attempts + 1 >= self.max_attempts:
+                logger.error(
+                    f"Dropping realtime event {event} after "
+                    f"{self.max_attempts} failed attempts")
+                event.delete()
+            else:
+                PollEvent.objects.filter(pk=event.pk).update(
+                    attempts=event.attempts + 1)
+
+    def run_async(self, coroutine):
+        """Run on a loop owned by the relay so Redis pools are reused"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
+    async def send_batch(self, events):
+        """
+        Send a batch of events, returns the ids that failed.
+        Groups are sent concurrently; events within a group keep
+        their outbox order.
+        """
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return set()
+
+        by_group = groupby(
+            sorted(events, key=lambda event: (event.group, event.pk)),
+            key=lambda event: event.group
+        )
+        results = await asyncio.gather(
+            *(self.send_group(channel_layer, group, list(group_events))
+              for group, group_events in by_group)
+        )
+        return set().union(*results)
+
+    async def send_group(self, channel_layer, group, events):
+        for index, event in enumerate(events):
+            try:
+                await channel_layer.group_send(group, event.payload)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to publish realtime event {event}: {e}")
+                return {pending.pk for pending in events[index:]}
+        return set()
+
+
+class EventPublisher:
+    """
+    In-process relay thread, woken after each commit that wrote events,
+    so realtime clients are notified without waiting for a relay worker.
+    """
+
+    def __init__(self, relay, poll_interval=5.0):
+        self.relay = relay
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        self._ensure_started()
+        self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='poll-event-publisher',
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.relay.relay_pending()
+            except Exception:
+                logger.exception("Failed to relay realtime events")
+
+
+relay = EventRelay(
+    batch_size=getattr(settings, 'REALTIME_EVENT_BATCH_SIZE', 100),
+    max_attempts=getattr(settings, 'REALTIME_EVENT_MAX_ATTEMPTS', 10),
+)
+
+publisher = EventPublisher(
+    relay,
+    poll_interval=getattr(settings, 'REALTIME_EVENT_POLL_INTERVAL', 5.0),
+)
+
+
+def record_event(group, message, poll_id=None):
+    """
+    Write a realtime event to the outbox in the current transaction.
+    The in-process publisher is woken once the transaction commits;
+    nothing is sent if it rolls back.
+    """
+    PollEvent.objects.create(group=group, payload=message, poll_id=poll_id)
+    if getattr(settings, 'REALTIME_RELAY_IN_PROCESS', True):
+        transaction.on_commit(publisher.wake)
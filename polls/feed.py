@@ -0,0 +1,165 @@
+# polls/feed.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Poll, Vote
+
+
+class ActivePollFeed:
+    """
+    Cached list of active polls served by PollViewSet.active.
+    The ordered ids and the serialized polls are stored under a version
+    that is bumped whenever a poll is written. The id list expires at the
+    next start or expiry boundary, so polls enter and leave the feed on
+    time. Vote totals are kept in per-poll counters and overlaid on the
+    cached rows, so votes do not invalidate the feed.
+    """
+    version_key = 'poll_feed:version'
+    votes_key = 'poll_feed:votes:{}'
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+
+    @property
+    def version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def invalidate(self):
+        """Rebuild the feed on the next read"""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, 1, None)
+
+    def invalidate_on_commit(self):
+        transaction.on_commit(self.invalidate)
+
+    def get_ids(self):
+        """Ids of the active polls, newest first"""
+        key = f'poll_feed:{self.version}:ids'
+        ids = cache.get(key)
+        if ids is None:
+            ids, timeout = self.build_ids()
+            cache.set(key, ids, timeout)
+        return ids
+
+    def build_ids(self):
+        now = timezone.now()
+        active = Poll.objects.filter(
+            status=Poll.Status.ACTIVE,
+            is_active=True
+        )
+        ids = [str(poll_id)
+               for poll_id in active.values_list('id', flat=True)]
+
+        # The feed changes at the next expiry or start, whichever is first
+        boundaries = [
+            active.aggregate(boundary=Min('expiry_date'))['boundary'],
+            Poll.objects.filter(
+                status=Poll.Status.UPCOMING, is_active=True
+            ).aggregate(boundary=Min('start_date'))['boundary'],
+        ]
+        timeout = self.max_age
+        for boundary in boundaries:
+            if boundary is not None:
+                timeout = min(timeout, (boundary - now).total_seconds())
+        return ids, max(1, int(timeout))
+
+    def get_rows(self, ids, request=None, fields=None, expand=()):
+        """
+        Serialized polls in the order of ids, with current vote totals
+        and, for an authenticated request, whether the user voted.
+        Fields and expand select the output as for PollRowSerializer.
+        """
+        from .serializers import PollRowSerializer
+
+        serializer = PollRowSerializer(request, fields, expand)
+        version = self.version
+        keys = {poll_id: f'poll_feed:{version}:poll:{poll_id}'
+                for poll_id in ids}
+        cached = cache.get_many(keys.values())
+        rows = {poll_id: cached[key]
+                for poll_id, key in keys.items() if key in cached}
+
+        missing = [poll_id for poll_id in ids if poll_id not in rows]
+        if missing:
+            built = self.build_rows(missing)
+            cache.set_many({keys[poll_id]: row
+                            for poll_id, row in built.items()},
+                           self.max_age)
+            rows.update(built)
+
+        ids = [poll_id for poll_id in ids if poll_id in rows]
+        rows = [rows[poll_id] for poll_id in ids]
+        overlay = {}
+        if 'total_votes' in serializer.fields:
+            totals = self.get_vote_totals(ids)
+            overlay['total_votes'] = lambda row: totals[row['id']]
+        if 'has_user_voted' in serializer.fields:
+            voted = self.get_voted(ids, request)
+            overlay['has_user_voted'] = lambda row: row['id'] in voted
+        results = {}
+        if 'results' in serializer.expand:
+            results = serializer.get_results(rows)
+
+        data = []
+        for row in rows:
+            item = {name: overlay[name](row) if name in overlay else row[name]
+                    for name in serializer.fields}
+            if results:
+                item['results'] = results[row['id']]
+            data.append(item)
+        return data
+
+    def build_rows(self, ids):
+        from .serializers import PollRowSerializer
+
+        serializer = PollRowSerializer()
+        polls = serializer.get_queryset(Poll.objects.filter(id__in=ids))
+        return {row['id']: row for row in serializer.serialize(polls)}
+
+    def get_vote_totals(self, ids):
+        keys = {poll_id: self.votes_key.format(poll_id) for poll_id in ids}
+        cached = cache.get_many(keys.values())
+        totals = {poll_id: cached[key]
+                  for poll_id, key in keys.items() if key in cached}
+
+        missing = [poll_id for poll_id in ids if poll_id not in totals]
+        if missing:
+            counted = dict.fromkeys(missing, 0)
+            counted.update(
+                (str(poll_id), count) for poll_id, count in
+                Vote.objects.filter(poll_id__in=missing)
+                .values('poll_id').annotate(count=Count('id'))
+                .values_list('poll_id', 'count')
+            )
+            for poll_id, count in counted.items():
+                # add() keeps a total that is already being advanced
+                cache.add(keys[poll_id], count, self.max_age)
+            totals.update(counted)
+        return totals
+
+    def get_voted(self, ids, request):
+        user = getattr(request, 'user', None)
+        if not ids or user is None or not user.is_authenticated:
+            return set()
+        return {str(poll_id) for poll_id in Vote.objects.filter(
+            user=user, poll_id__in=ids).values_list('poll_id', flat=True)}
+
+    def count_vote(self, poll_id):
+        """Advance a poll's cached vote total, if it has one"""
+        try:
+            cache.incr(self.votes_key.format(poll_id))
+        except ValueError:
+            pass
+
+
+active_feed = ActivePollFeed(
+    max_age=getattr(settings, 'ACTIVE_FEED_MAX_AGE', 300))
@@ -1,13 +1,17 @@
 # polls/filters.py
 # import django_filters
 from django_filters import rest_framework as filters
-from django.utils import timezone
-from .models import Poll
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, OuterRef
+from rest_framework import filters as rest_filters
+from .models import Poll, PollOption
 
 
 class PollFilter(filters.FilterSet):
     """
     Advanced filtering for polls with date ranges and search capabilities.
+    Substring filters on question, creator email and options are served
+    by trigram indexes.
     """
     question = filters.CharFilter(lookup_expr='icontains')
     creator_email = filters.CharFilter(
@@ -53,26 +57,59 @@ class PollFilter(filters.FilterSet):
     def filter_by_status(self, queryset, name, value):
         """
         Custom filter for poll status (active, upcoming, expired).
+        Reads the status kept up to date by polls.scheduler.
         """
-        now = timezone.now()
-
-        if value == 'active':
-            return queryset.filter(
-                start_date__lte=now,
-                expiry_date__gte=now,
-                is_active=True
-            )
-        elif value == 'upcoming':
-            return queryset.filter(
-                start_date__gt=now,
-                is_active=True
-            )
-        elif value == 'expired':
-            return queryset.filter(
-                expiry_date__lt=now
-            )
+        if value in (Poll.Status.ACTIVE, Poll.Status.UPCOMING):
+            return queryset.filter(status=value, is_active=True)
+        elif value == Poll.Status.EXPIRED:
+            return queryset.filter(status=value)
 
         return queryset
 
     def filter_option_contains(self, queryset, name, value):
-        return queryset.filter(options__icontains=value)
+        # Matches single options, served by polloption_text_trgm_idx
+        return queryset.filter(Exists(PollOption.objects.filter(
+            poll=OuterRef('pk'), text__icontains=value)))
+
+
+class PollSearchFilter(rest_filters.SearchFilter):
+    """
+    Full-text search over poll questions and options.
+    Matches against the indexed search_vector column and annotates each
+    poll with a search_rank; terms that look like an email address
+    match the owner's email exactly instead.
+    """
+    config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        emails = [term for term in terms if '@' in term]
+        words = [term for term in terms if '@' not in term]
+
+        for email in emails:
+            queryset = queryset.filter(owner__email=email)
+
+        if words:
+            query = SearchQuery(
+                ' '.join(words), search_type='websearch', config=self.config)
+            queryset = queryset.filter(search_vector=query).annotate(
+                search_rank=SearchRank(F('search_vector'), query))
+
+        return queryset
+
+
+class PollOrderingFilter(rest_filters.OrderingFilter):
+    """
+    Orders full-text search results by relevance unless the client
+    asks for another ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if (not request.query_params.get(self.ordering_param) and
+                'search_rank' in queryset.query.annotations):
+            return ['-search_rank', *(ordering or [])]
+        return ordering
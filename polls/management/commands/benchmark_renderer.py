@@ -0,0 +1,72 @@
+import timeit
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare the JSON renderers on a page of serialized polls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100,
+                            help='Polls on the page')
+        parser.add_argument('--iterations', type=int, default=1000,
+                            help='Renders timed per renderer')
+
+    def handle(self, *args, **kwargs):
+        page = self.build_page(kwargs['items'])
+        renderers = {
+            'JSONRenderer': JSONRenderer(),
+            'ORJSONRenderer': ORJSONRenderer(),
+        }
+
+        outputs = {name: renderer.render(page)
+                   for name, renderer in renderers.items()}
+        if len(set(outputs.values())) != 1:
+            raise CommandError('Renderers produced different output')
+
+        timings = {}
+        for name, renderer in renderers.items():
+            seconds = timeit.timeit(
+                lambda: renderer.render(page), number=kwargs['iterations'])
+            timings[name] = seconds / kwargs['iterations'] * 1_000_000
+            self.stdout.write(
+                f'{name}: {timings[name]:.1f} us per page')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(outputs['JSONRenderer'])} byte page, "
+            f"{timings['JSONRenderer'] / timings['ORJSONRenderer']:.1f}x "
+            f"faster with orjson"))
+
+    def build_page(self, items):
+        """A paginated response shaped like PollSerializer output"""
+        now = timezone.now()
+        results = [
+            {
+                'id': str(uuid.uuid4()),
+                'question': f'Poll number {index}: which option wins?',
+                'options': ['Option A', 'Option B', 'Option C', 'Ünïcödé'],
+                'is_anonymous': index % 3 == 0,
+                'created_at': now.isoformat(),
+                'updated_at': now.isoformat(),
+                'owner_email': f'owner{index}@example.com',
+                'creator_email': (None if index % 3 == 0
+                                  else f'owner{index}@example.com'),
+                'start_date': now.isoformat(),
+                'expiry_date': (now + timezone.timedelta(days=1)).isoformat(),
+                'is_active': True,
+                'total_votes': index * 7,
+                'has_user_voted': index % 2 == 0,
+                'status': 'active',
+            }
+            for index in range(items)
+        ]
+        return {
+            'count': items * 10,
+            'next': 'http://testserver/api/polls/?page=2',
+            'previous': None,
+            'results': results,
+        }
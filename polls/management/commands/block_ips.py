@@ -1,42 +1,136 @@
-from django.core.management.base import BaseCommand
+import ipaddress
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from polls.models import BlockedIP
+from utils.blocklist import notify_blocklist_changed
 
 
 class Command(BaseCommand):
-    help = 'Block an IP address'
+    help = 'Block IP addresses and CIDR ranges'
 
     def add_arguments(self, parser):
-        parser.add_argument('ip_address', type=str,
-                            help='IP to block')
+        parser.add_argument('ip_addresses', nargs='*', type=str,
+                            help='IPs or CIDR ranges to block')
+        parser.add_argument('--file', action='append', default=[],
+                            help='File with one IP or CIDR range per line, '
+                                 '"-" reads from stdin')
+        parser.add_argument('--reason', default='',
+                            help='Reason stored with every block')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows inserted per statement')
 
     def handle(self, *args, **kwargs):
-        ip_address = kwargs['ip_address']
+        entries = list(kwargs['ip_addresses'])
+        for path in kwargs['file']:
+            entries.extend(self.read_entries(path))
+        if not entries:
+            raise CommandError('No IP addresses given')
 
-        # Check if already blocked
-        if BlockedIP.objects.filter(ip_address=ip_address).exists():
-            self.stdout.write(
-                self.style.WARNING(f'IP {ip_address} is already blocked')
-            )
-            return
-        if not self.is_valid_ip(ip_address):
-            self.stdout.write(self.style.WARNING(
-                f"Invalid IP address: {ip_address}"))
+        networks = {}
+        invalid = 0
+        for entry in entries:
+            network = self.parse_entry(entry)
+            if network is None:
+                invalid += 1
+                self.stdout.write(self.style.WARNING(
+                    f"Invalid IP address: {entry}"))
+                continue
+            address = str(network.network_address)
+            # Keep the widest range given for an address
+            if (address not in networks or
+                    network.prefixlen < networks[address].prefixlen):
+                networks[address] = network
+
+        existing = {}
+        addresses = list(networks)
+        for start in range(0, len(addresses), kwargs['batch_size']):
+            existing.update(
+                (row.ip_address, row) for row in BlockedIP.objects.filter(
+                    ip_address__in=addresses[
+                        start:start + kwargs['batch_size']]))
+
+        blocked = []
+        updated = []
+        skipped = 0
+        for address, network in networks.items():
+            prefix_length = self.prefix_length(network)
+            row = existing.get(address)
+            if row is None:
+                blocked.append(BlockedIP(
+                    ip_address=address,
+                    prefix_length=prefix_length,
+                    reason=kwargs['reason']
+                ))
+            elif row.is_active and self.covers(row, network):
+                skipped += 1
+                self.stdout.write(self.style.WARNING(
+                    f'IP {network} is already blocked by {row.network}'))
+            else:
+                # ip_address is unique, so a wider range or a lifted
+                # block reuses the row
+                row.prefix_length = prefix_length
+                row.reason = kwargs['reason']
+                row.is_active = True
+                updated.append(row)
+
+        with transaction.atomic():
+            BlockedIP.objects.bulk_create(
+                blocked, batch_size=kwargs['batch_size'],
+                ignore_conflicts=True)
+            if updated:
+                BlockedIP.objects.bulk_update(
+                    updated, ['prefix_length', 'reason', 'is_active'],
+                    batch_size=kwargs['batch_size'])
+            if blocked or updated:
+                # bulk writes skip post_save, so tell the workers here
+                notify_blocklist_changed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully blocked {len(blocked) + len(updated)} IPs '
+            f'({len(updated)} updated, {skipped} already blocked, '
+            f'{invalid} invalid)'))
+
+    def read_entries(self, path):
+        """
+        Yield the entries of a file, skipping blank lines and comments.
+        """
+        if path == '-':
+            yield from self.clean_lines(sys.stdin)
             return
+        try:
+            lines = open(path)
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        with lines:
+            yield from self.clean_lines(lines)
 
-        # Create or update blocked IP entry
-        obj, created = BlockedIP.objects.update_or_create(
-            ip_address=ip_address,
-        )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully blocked IP: {ip_address}')
-        )
+    def clean_lines(self, lines):
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
 
-    def is_valid_ip(self, ip_address):
+    def parse_entry(self, entry):
         """
-        Basic validation for IP address format.
+        Parse an IP address or CIDR range, None if it is invalid.
+        Host bits of a range are dropped, e.g. 10.1.2.3/8 is 10.0.0.0/8.
         """
-        import re
-        ipv4_pattern = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
-        ipv6_pattern = r'^([0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$|^::1$|^::$'
+        try:
+            return ipaddress.ip_network(entry.strip(), strict=False)
+        except ValueError:
+            return None
+
+    def covers(self, row, network):
+        """Whether an existing block is at least as wide as network"""
+        prefix_length = row.prefix_length
+        if prefix_length is None:
+            prefix_length = network.max_prefixlen
+        return prefix_length <= network.prefixlen
 
-        return re.match(ipv4_pattern, ip_address) or re.match(ipv6_pattern, ip_address)
+    def prefix_length(self, network):
+        # Single addresses are stored without a prefix
+        if network.prefixlen == network.max_prefixlen:
+            return None
+        return network.prefixlen
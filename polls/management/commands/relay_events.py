@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from polls.events import EventRelay
+
+
+class Command(BaseCommand):
+    help = 'Continuously publish outbox events to the channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Events claimed per batch')
+        parser.add_argument('--idle-sleep', type=float, default=0.5,
+                            help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the outbox once and exit')
+
+    def handle(self, *args, **kwargs):
+        relay = EventRelay(batch_size=kwargs['batch_size'])
+
+        if kwargs['once']:
+            sent = relay.relay_pending()
+            self.stdout.write(
+                self.style.SUCCESS(f'Relayed {sent} realtime events'))
+            return
+
+        self.stdout.write('Relaying realtime events, press CTRL+C to stop')
+        try:
+            while True:
+                close_old_connections()
+                if relay.relay_batch() < relay.batch_size:
+                    time.sleep(kwargs['idle_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Relay stopped'))
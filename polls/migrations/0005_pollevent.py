@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_poll_first_name_poll_last_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('poll_id', models.UUIDField(blank=True, null=True)),
+                ('group', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
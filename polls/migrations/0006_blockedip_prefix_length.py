@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_pollevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockedip',
+            name='prefix_length',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
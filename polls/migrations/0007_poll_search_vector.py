@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_blockedip_prefix_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('question', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('options', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='poll_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:50
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_poll_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='poll',
+            name='options_text',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.comparison.Cast('options', models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('question'), name='gin_trgm_ops'), name='poll_question_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['options_text'], name='poll_options_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
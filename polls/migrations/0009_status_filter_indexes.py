@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='poll',
+            name='polls_poll_expiry__c112c0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], include=('start_date', 'expiry_date'), name='poll_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['-created_at'], include=('expiry_date',), name='poll_created_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['expiry_date'], name='poll_expiry_idx'),
+        ),
+    ]
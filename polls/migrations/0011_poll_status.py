@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_poll_result_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='poll',
+            name='poll_live_created_idx',
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='status',
+            field=models.CharField(choices=[('upcoming', 'Upcoming'), ('active', 'Active'), ('expired', 'Expired')], default='upcoming', max_length=10),
+        ),
+        # Existing polls get the status their dates give them now; the
+        # scheduler's reconcile pass picks them up from there
+        migrations.RunSQL(
+            sql="""
+                UPDATE polls_poll SET status = CASE
+                    WHEN start_date > now() THEN 'upcoming'
+                    WHEN expiry_date >= now() THEN 'active'
+                    ELSE 'expired'
+                END
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['status', '-created_at'], include=('is_active',), name='poll_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_poll_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPoll',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('question', models.TextField(max_length=500)),
+                ('options', models.JSONField()),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('owner_id', models.UUIDField()),
+                ('start_date', models.DateTimeField()),
+                ('expiry_date', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('results', models.JSONField()),
+                ('total_votes', models.PositiveIntegerField()),
+                ('archive_path', models.CharField(max_length=255)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
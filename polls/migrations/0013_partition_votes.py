@@ -0,0 +1,156 @@
+# Partitions polls_vote by the month of the voted poll's created_at.
+# The table is rebuilt, so the database side is plain SQL and the
+# model state follows with the equivalent operations.
+#
+# Every vote is copied in one transaction holding an exclusive lock
+# on the table: voting is down until it ends, see the README.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+PARTITION_VOTES = """
+CREATE TABLE "polls_vote_partitioned" (
+    "id" uuid NOT NULL,
+    "option_index" integer NOT NULL,
+    "created_at" timestamp with time zone NOT NULL,
+    "poll_id" uuid NOT NULL,
+    "user_id" uuid NOT NULL,
+    "poll_created_at" timestamp with time zone NOT NULL,
+    PRIMARY KEY ("id", "poll_created_at")
+) PARTITION BY RANGE ("poll_created_at");
+
+CREATE TABLE "polls_vote_default"
+    PARTITION OF "polls_vote_partitioned" DEFAULT;
+
+-- A partition per month from the oldest poll to three months ahead,
+-- named as polls.partitions names them
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', coalesce(
+        (SELECT min("created_at") FROM "polls_poll"), now()
+    ) AT TIME ZONE 'UTC');
+    last timestamp := date_trunc('month', now() AT TIME ZONE 'UTC')
+        + interval '3 months';
+BEGIN
+    WHILE month <= last LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "polls_vote_partitioned" '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'polls_vote_' || to_char(month, '"y"YYYY"m"MM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC');
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO "polls_vote_partitioned" (
+    "id", "option_index", "created_at", "poll_id", "user_id",
+    "poll_created_at")
+SELECT v."id", v."option_index", v."created_at", v."poll_id",
+       v."user_id", p."created_at"
+FROM "polls_vote" v JOIN "polls_poll" p ON p."id" = v."poll_id";
+
+DROP TABLE "polls_vote";
+ALTER TABLE "polls_vote_partitioned" RENAME TO "polls_vote";
+ALTER TABLE "polls_vote"
+    RENAME CONSTRAINT "polls_vote_partitioned_pkey" TO "polls_vote_pkey";
+
+-- (poll, user) stays unique: poll_created_at is the same for every
+-- vote of a poll
+ALTER TABLE "polls_vote" ADD CONSTRAINT "unique_user_vote_per_poll"
+    UNIQUE ("poll_id", "user_id", "poll_created_at");
+ALTER TABLE "polls_vote"
+    ADD CONSTRAINT "polls_vote_poll_id_482e29e3_fk_polls_poll_id"
+    FOREIGN KEY ("poll_id") REFERENCES "polls_poll" ("id")
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE "polls_vote"
+    ADD CONSTRAINT "polls_vote_user_id_49d78cb7_fk_users_user_id"
+    FOREIGN KEY ("user_id") REFERENCES "users_user" ("id")
+    DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX "polls_vote_user_id_28ba74_idx"
+    ON "polls_vote" ("user_id", "created_at");
+"""
+
+UNPARTITION_VOTES = """
+CREATE TABLE "polls_vote_plain" (
+    "id" uuid NOT NULL PRIMARY KEY,
+    "option_index" integer NOT NULL,
+    "created_at" timestamp with time zone NOT NULL,
+    "poll_id" uuid NOT NULL,
+    "user_id" uuid NOT NULL
+);
+
+INSERT INTO "polls_vote_plain" (
+    "id", "option_index", "created_at", "poll_id", "user_id")
+SELECT "id", "option_index", "created_at", "poll_id", "user_id"
+FROM "polls_vote";
+
+DROP TABLE "polls_vote";
+ALTER TABLE "polls_vote_plain" RENAME TO "polls_vote";
+ALTER TABLE "polls_vote"
+    RENAME CONSTRAINT "polls_vote_plain_pkey" TO "polls_vote_pkey";
+
+ALTER TABLE "polls_vote" ADD CONSTRAINT "unique_user_vote_per_poll"
+    UNIQUE ("poll_id", "user_id");
+ALTER TABLE "polls_vote"
+    ADD CONSTRAINT "polls_vote_poll_id_482e29e3_fk_polls_poll_id"
+    FOREIGN KEY ("poll_id") REFERENCES "polls_poll" ("id")
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE "polls_vote"
+    ADD CONSTRAINT "polls_vote_user_id_49d78cb7_fk_users_user_id"
+    FOREIGN KEY ("user_id") REFERENCES "users_user" ("id")
+    DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX "polls_vote_poll_id_cfe401_idx"
+    ON "polls_vote" ("poll_id", "user_id");
+CREATE INDEX "polls_vote_user_id_28ba74_idx"
+    ON "polls_vote" ("user_id", "created_at");
+CREATE INDEX "polls_vote_poll_id_482e29e3" ON "polls_vote" ("poll_id");
+CREATE INDEX "polls_vote_user_id_49d78cb7" ON "polls_vote" ("user_id");
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0012_archived_poll'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION_VOTES, UNPARTITION_VOTES),
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='vote',
+                    name='unique_user_vote_per_poll',
+                ),
+                migrations.RemoveIndex(
+                    model_name='vote',
+                    name='polls_vote_poll_id_cfe401_idx',
+                ),
+                migrations.AddField(
+                    model_name='vote',
+                    name='poll_created_at',
+                    field=models.DateTimeField(default=None, editable=False),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='poll',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='polls.poll'),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AddConstraint(
+                    model_name='vote',
+                    constraint=models.UniqueConstraint(fields=('poll', 'user', 'poll_created_at'), name='unique_user_vote_per_poll'),
+                ),
+            ],
+        ),
+    ]
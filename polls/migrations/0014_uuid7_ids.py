@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:54
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0013_partition_votes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='poll',
+            name='id',
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='id',
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
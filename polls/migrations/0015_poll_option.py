@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:58
+
+import django.db.models.deletion
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0014_uuid7_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollOption',
+            fields=[
+                ('id', models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('index', models.PositiveSmallIntegerField()),
+                ('text', models.TextField(max_length=500)),
+                ('poll', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='choices', to='polls.poll')),
+            ],
+            options={
+                'ordering': ['poll', 'index'],
+            },
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='polls.polloption'),
+        ),
+        migrations.AddConstraint(
+            model_name='polloption',
+            constraint=models.UniqueConstraint(fields=('poll', 'index'), name='unique_option_index_per_poll'),
+        ),
+        # Mirror the options of existing polls and point their votes at
+        # them; votes with an index past the options keep a null option
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO polls_polloption (id, poll_id, index, text)
+                SELECT gen_random_uuid(), p.id, o.ordinality - 1, o.text
+                FROM polls_poll p,
+                    jsonb_array_elements_text(p.options)
+                        WITH ORDINALITY AS o(text, ordinality)
+                WHERE jsonb_typeof(p.options) = 'array'
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE polls_vote v SET option_id = o.id
+                FROM polls_polloption o
+                WHERE o.poll_id = v.poll_id AND o.index = v.option_index
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Drops the default partition of polls_vote. Partitions can only be
+# detached CONCURRENTLY from a table without one, and a new month's
+# partition can't be created while the default holds rows of that
+# month. Votes that did fall into it get a partition of their own.
+# The table is locked while they are moved, see the README.
+
+from django.db import migrations
+
+DROP_DEFAULT_PARTITION = """
+ALTER TABLE "polls_vote" DETACH PARTITION "polls_vote_default";
+
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT DISTINCT date_trunc(
+            'month', "poll_created_at" AT TIME ZONE 'UTC')
+        FROM "polls_vote_default"
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "polls_vote" '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'polls_vote_' || to_char(month, '"y"YYYY"m"MM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC');
+    END LOOP;
+END $$;
+
+INSERT INTO "polls_vote" SELECT * FROM "polls_vote_default";
+DROP TABLE "polls_vote_default";
+"""
+
+CREATE_DEFAULT_PARTITION = """
+CREATE TABLE "polls_vote_default" PARTITION OF "polls_vote" DEFAULT;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0015_poll_option'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DROP_DEFAULT_PARTITION, CREATE_DEFAULT_PARTITION),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0016_drop_default_vote_partition'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vote',
+            name='option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='votes', to='polls.polloption'),
+        ),
+    ]
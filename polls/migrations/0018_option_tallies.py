@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:58
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0017_vote_option_set_null'),
+    ]
+
+    operations = [
+        # Tallies join on the option id from here on. Mirror the options
+        # of polls saved without them, e.g. by old code during a rolling
+        # deploy, and point their votes at them
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO polls_polloption (id, poll_id, index, text)
+                SELECT gen_random_uuid(), p.id, o.ordinality - 1, o.text
+                FROM polls_poll p,
+                    jsonb_array_elements_text(p.options)
+                        WITH ORDINALITY AS o(text, ordinality)
+                WHERE jsonb_typeof(p.options) = 'array'
+                ON CONFLICT (poll_id, index) DO NOTHING
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE polls_vote v SET option_id = o.id
+                FROM polls_polloption o
+                WHERE v.option_id IS NULL
+                    AND o.poll_id = v.poll_id AND o.index = v.option_index
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name='poll',
+            name='poll_options_text_trgm_idx',
+        ),
+        migrations.RemoveField(
+            model_name='poll',
+            name='options_text',
+        ),
+        migrations.AddIndex(
+            model_name='polloption',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('text'), name='gin_trgm_ops'), name='polloption_text_trgm_idx'),
+        ),
+    ]
@@ -1,10 +1,13 @@
 
 # polls/models.py
-import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from users.models import User
+from utils.ids import uuid7
 
 
 def one_hour_from_now():
@@ -24,7 +27,12 @@ class Poll(models.Model):
     Represents a poll/survey with multiple options.
     Always has an owner, but creator may be null for anonymous polls.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    class Status(models.TextChoices):
+        UPCOMING = 'upcoming', 'Upcoming'
+        ACTIVE = 'active', 'Active'
+        EXPIRED = 'expired', 'Expired'
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     question = models.TextField(max_length=500)
     options = models.JSONField()  # Stores list of option strings
     is_anonymous = models.BooleanField(default=False)
@@ -62,11 +70,42 @@ class Poll(models.Model):
 
     )
     is_active = models.BooleanField(default=True)
+    # Where the poll is between its dates. Set on save and advanced at
+    # the start and expiry by polls.scheduler
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.UPCOMING
+    )
+
+    # Maintained by Postgres, the question weighs more than the options
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('question', weight='A', config='english') +
+            SearchVector('options', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True
+    )
 
     class Meta:
         indexes = [
             models.Index(fields=['owner', 'created_at']),
-            models.Index(fields=['expiry_date', 'is_active']),
+            # Status filters, see PollFilter.filter_by_status, read
+            # newest first. Common statuses can also be paged straight
+            # from the created_at index below
+            models.Index(fields=['status', '-created_at'],
+                         include=['is_active'],
+                         name='poll_status_created_idx'),
+            # The default list
+            models.Index(fields=['-created_at'], include=['expiry_date'],
+                         name='poll_created_expiry_idx'),
+            # expires_before/after filters and the cleanup task
+            models.Index(fields=['expiry_date'], name='poll_expiry_idx'),
+            GinIndex(fields=['search_vector'], name='poll_search_vector_idx'),
+            # Trigram indexes serve substring filters, see PollFilter
+            GinIndex(OpClass(Upper('question'), name='gin_trgm_ops'),
+                     name='poll_question_trgm_idx'),
         ]
         ordering = ['-created_at']
 
@@ -74,6 +113,64 @@ class Poll(models.Model):
         return (f"{self.question[:50]}... by {self.owner.email},"
                 f"started: {self.start_date}")
 
+    def save(self, *args, **kwargs):
+        self.status = self.status_at(timezone.now())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'status']
+        adding = self._state.adding
+        sync = update_fields is None or 'options' in update_fields
+        if sync and not adding and self.votes.filter(
+                option_index__gte=len(self.options)).exists():
+            raise PermissionError("Options with votes cannot be removed.")
+        super().save(*args, **kwargs)
+        if sync:
+            self.sync_options(adding)
+
+    def sync_options(self, adding=False):
+        """Mirror options into the poll's PollOption rows"""
+        if adding:
+            PollOption.objects.bulk_create([
+                PollOption(poll=self, index=index, text=text)
+                for index, text in enumerate(self.options)
+            ])
+            return
+        existing = {option.index: option
+                    for option in self.choices.all()}
+        changed = []
+        for index, text in enumerate(self.options):
+            option = existing.pop(index, None)
+            if option is None:
+                changed.append(PollOption(poll=self, index=index, text=text))
+            elif option.text != text:
+                option.text = text
+                changed.append(option)
+        if changed:
+            PollOption.objects.bulk_create(
+                changed, update_conflicts=True,
+                unique_fields=['poll', 'index'], update_fields=['text'])
+        if existing:
+            PollOption.objects.filter(
+                pk__in=[option.pk for option in existing.values()]
+            ).delete()
+
+    def status_at(self, when):
+        """The status the poll's dates give it at a point in time"""
+        if self.start_date > when:
+            return self.Status.UPCOMING
+        if self.expiry_date >= when:
+            return self.Status.ACTIVE
+        return self.Status.EXPIRED
+
+    @property
+    def next_boundary(self):
+        """When the status next changes, None once expired"""
+        if self.status == self.Status.UPCOMING:
+            return self.start_date
+        if self.status == self.Status.ACTIVE:
+            return self.expiry_date
+        return None
+
     @property
     def has_started(self):
         return timezone.now() >= self.start_date
@@ -88,56 +185,170 @@ class Poll(models.Model):
     def get_results(self):
         """Calculate real-time results with caching consideration"""
         from django.core.cache import cache
-        cache_key = f"poll_results_{self.id}"
+        from .conditional import tally
+        # Taken before counting: results counted before a vote land
+        # under the version that vote retired
+        cache_key = tally.get_results_key(self.id)
         results = cache.get(cache_key)
 
         if not results:
-            results = []
-            for index, option in enumerate(self.options):
-                vote_count = self.votes.filter(option_index=index).count()
-                results.append({
-                    'option': option,
-                    'votes': vote_count,
-                    'percentage': (vote_count / self.votes.count() * 100)
-                    if self.votes.count() > 0 else 0
-                })
+            snapshot = self.final_results
+            if snapshot is not None:
+                # Final, but the key changes if the poll is edited
+                results = snapshot.results
+                cache.set(cache_key, results, 86400)
+                return results
+
+            results = self.tally(self.options, self.count_votes())
             # Cache for 5 minutes for active polls, longer for ended polls
             cache_timeout = 300 if self.can_vote() else 3600
             cache.set(cache_key, results, cache_timeout)
 
         return results
 
+    @property
+    def final_results(self):
+        """The poll's PollResultSnapshot once it has been finalized"""
+        if not self.has_ended:
+            return None
+        try:
+            return self.result_snapshot
+        except PollResultSnapshot.DoesNotExist:
+            return None
+
+    def count_votes(self):
+        """Vote counts by option index, joined on the option id"""
+        return dict(
+            self.choices.order_by().values_list('index')
+            .annotate(count=models.Count('votes'))
+        )
+
+    @staticmethod
+    def count_votes_by_poll(poll_ids):
+        """
+        Vote counts by option index for each of the polls, in one
+        query joined on the option id; keyed by poll id.
+        """
+        counts = {}
+        tallies = PollOption.objects.filter(
+            poll_id__in=poll_ids
+        ).order_by().values_list('poll_id', 'index').annotate(
+            count=models.Count('votes'))
+        for poll_id, index, count in tallies:
+            counts.setdefault(poll_id, {})[index] = count
+        return counts
+
+    def finalize_results(self):
+        """
+        Store the final results of an expired poll.
+        Returns (snapshot, created); an existing snapshot is kept as is.
+        """
+        counts = self.count_votes()
+        return PollResultSnapshot.objects.get_or_create(
+            poll=self,
+            defaults={
+                'results': self.tally(self.options, counts),
+                'total_votes': sum(counts.values()),
+            }
+        )
+
+    @staticmethod
+    def tally(options, counts):
+        """Results for options, given vote counts by option index"""
+        total = sum(counts.values())
+        results = []
+        for index, option in enumerate(options):
+            vote_count = counts.get(index, 0)
+            results.append({
+                'option': option,
+                'votes': vote_count,
+                'percentage': (vote_count / total * 100)
+                if total > 0 else 0
+            })
+        return results
+
+
+class PollOption(models.Model):
+    """
+    One of a poll's options, mirrored from Poll.options on save so
+    options can be joined, indexed and tallied. Votes keep their
+    option_index, which matches index.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # Served by the unique constraint
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='choices',
+        db_index=False
+    )
+    index = models.PositiveSmallIntegerField()
+    text = models.TextField(max_length=500)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['poll', 'index'],
+                name='unique_option_index_per_poll'
+            )
+        ]
+        indexes = [
+            # Serves PollFilter.filter_option_contains
+            GinIndex(OpClass(Upper('text'), name='gin_trgm_ops'),
+                     name='polloption_text_trgm_idx'),
+        ]
+        ordering = ['poll', 'index']
+
+    def __str__(self):
+        return self.text
+
 
 class Vote(models.Model):
     """
     Records a user's vote on a specific poll option.
     Always tied to an authenticated user.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # Served by the unique constraint and the (user, created_at) index
     poll = models.ForeignKey(
         Poll,
         on_delete=models.CASCADE,
-        related_name='votes'
+        related_name='votes',
+        db_index=False
     )
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='votes'
+        related_name='votes',
+        db_index=False
     )
     option_index = models.IntegerField(
         validators=[MinValueValidator(0)]
     )
+    # Set from option_index on save, tallies join on it
+    option = models.ForeignKey(
+        PollOption,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='votes'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copy of the poll's created_at. The table is partitioned by its
+    # month, so all votes of a poll share a partition, see
+    # polls.partitions
+    poll_created_at = models.DateTimeField(editable=False)
 
     class Meta:
         constraints = [
+            # Partitioned tables only allow unique constraints on the
+            # partition key, which is a function of the poll
             models.UniqueConstraint(
-                fields=['poll', 'user'],
+                fields=['poll', 'user', 'poll_created_at'],
                 name='unique_user_vote_per_poll'
             )
         ]
         indexes = [
-            models.Index(fields=['poll', 'user']),
             models.Index(fields=['user', 'created_at']),
         ]
         ordering = ['-created_at']
@@ -147,23 +358,117 @@ class Vote(models.Model):
 
     def save(self, *args, **kwargs):
         """Prevent updating existing votes"""
-        if self.pk and Vote.objects.filter(pk=self.pk).exists():
+        if not self._state.adding:
             raise PermissionError("Votes cannot be modified once created.")
-        super().save(*args, **kwargs)
+        if self.poll_created_at is None:
+            self.poll_created_at = self.poll.created_at
+        if self.option_id is not None:
+            return super().save(*args, **kwargs)
+        # Looked up by the INSERT itself, no extra round trip
+        self.option_id = models.Subquery(PollOption.objects.filter(
+            poll_id=self.poll_id, index=self.option_index
+        ).values('pk')[:1])
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.option_id = None
+            raise
+        # Left deferred like a field missing from only(): the first
+        # access runs refresh_from_db(fields=['option'])
+        del self.__dict__['option_id']
 
     def delete(self, *args, **kwargs):
         """Prevent deleting votes"""
         raise PermissionError("Votes cannot be deleted.")
 
 
+class PollResultSnapshot(models.Model):
+    """
+    Final results of an expired poll, written once by
+    polls.tasks.finalize_expired_polls and never changed.
+    """
+    poll = models.OneToOneField(
+        Poll,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='result_snapshot'
+    )
+    results = models.JSONField()
+    total_votes = models.PositiveIntegerField()
+    finalized_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Final results of {self.poll_id}"
+
+    def save(self, *args, **kwargs):
+        """Prevent updating existing snapshots"""
+        if not self._state.adding:
+            raise PermissionError(
+                "Result snapshots cannot be modified once created.")
+        super().save(*args, **kwargs)
+
+
+class ArchivedPoll(models.Model):
+    """
+    Index entry of a poll moved to cold storage by polls.archive.
+    Keeps the final results for the API; the poll and its votes are in
+    the NDJSON file at archive_path.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    question = models.TextField(max_length=500)
+    options = models.JSONField()
+    is_anonymous = models.BooleanField(default=False)
+    owner_id = models.UUIDField()
+    start_date = models.DateTimeField()
+    expiry_date = models.DateTimeField()
+    created_at = models.DateTimeField()
+    results = models.JSONField()
+    total_votes = models.PositiveIntegerField()
+    archive_path = models.CharField(max_length=255)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived poll {self.id}"
+
+
 class BlockedIP(models.Model):
     """
     Stores IP addresses that are blocked due to suspicious activity.
+    A prefix length turns the entry into a CIDR range starting at
+    ip_address, e.g. 10.0.0.0 with prefix_length 8 blocks 10.0.0.0/8.
     """
     ip_address = models.GenericIPAddressField(unique=True)
+    prefix_length = models.PositiveSmallIntegerField(null=True, blank=True)
     reason = models.TextField(max_length=500)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"{self.ip_address} - {self.reason[:50]}..."
+        return f"{self.network} - {self.reason[:50]}..."
+
+    @property
+    def network(self):
+        """The blocked address or CIDR range as a string"""
+        if self.prefix_length is None:
+            return self.ip_address
+        return f"{self.ip_address}/{self.prefix_length}"
+
+
+class PollEvent(models.Model):
+    """
+    Transactional outbox of realtime events.
+    Written in the same transaction as the poll or vote change and
+    removed by the relay once published to the channel layer.
+    """
+    # Not a foreign key: events must outlive deleted polls
+    poll_id = models.UUIDField(null=True, blank=True)
+    group = models.CharField(max_length=100)
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.payload.get('type')} -> {self.group}"
@@ -0,0 +1,181 @@
+# polls/partitions.py
+import datetime
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import Poll, Vote
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+class VotePartitionManager:
+    """
+    Maintains the monthly partitions of the vote table.
+    Votes are partitioned by the month of their poll's created_at (UTC),
+    see migration 0013. There is no default partition (migration
+    0016), so create_partitions() must add the partitions of the coming
+    months ahead of time: a vote for a poll of a month without one is
+    refused. As a fallback, ensure_partition() creates the partition of
+    a new poll's month if it is missing. drop_partitions() detaches and
+    drops the partitions of past months with no polls left, and the
+    cleanup task drops the partitions of months whose polls it
+    archives, see polls.cleanup. Their votes go without a DELETE or
+    VACUUM and the indexes of the hot partitions stay small.
+    """
+    table = Vote._meta.db_table
+    name_pattern = re.compile(r'_y(\d{4})m(\d{2})$')
+
+    def __init__(self, months_ahead=3):
+        self.months_ahead = months_ahead
+        # Names of partitions known to exist, see ensure_partition()
+        self.known = set()
+
+    @staticmethod
+    def month_start(when):
+        when = when.astimezone(datetime.timezone.utc)
+        return when.replace(day=1, hour=0, minute=0, second=0,
+                            microsecond=0)
+
+    def partition_name(self, month):
+        return f'{self.table}_y{month:%Y}m{month:%m}'
+
+    def get_partitions(self):
+        """Start of the month of each monthly partition, by name"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT child.relname FROM pg_inherits '
+                'JOIN pg_class parent ON parent.oid = inhparent '
+                'JOIN pg_class child ON child.oid = inhrelid '
+                'WHERE parent.relname = %s',
+                [self.table])
+            names = [name for name, in cursor.fetchall()]
+        partitions = {}
+        for name in names:
+            match = self.name_pattern.search(name)
+            if match:
+                year, month = map(int, match.groups())
+                partitions[name] = datetime.datetime(
+                    year, month, 1, tzinfo=datetime.timezone.utc)
+        return partitions
+
+    def create_partitions(self, now=None):
+        """Create the missing partitions up to months_ahead months"""
+        current = self.month_start(now or timezone.now())
+        existing = self.get_partitions()
+        created = 0
+        for offset in range(self.months_ahead + 1):
+            month = add_months(current, offset)
+            if self.partition_name(month) in existing:
+                continue
+            if self.create_partition(month):
+                created += 1
+        return created
+
+    def create_partition(self, month):
+        """Create the partition of a month, returns whether it was"""
+        name = self.partition_name(month)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    'CREATE TABLE {} PARTITION OF {} '
+                    'FOR VALUES FROM (%s) TO (%s)'.format(
+                        connection.ops.quote_name(name),
+                        connection.ops.quote_name(self.table)),
+                    [month, add_months(month, 1)])
+        except DatabaseError:
+            # Don't let one month keep the later ones from being
+            # created, the next run tries it again
+            logger.exception("Could not create vote partition %s", name)
+            return False
+        logger.info("Created vote partition %s", name)
+        return True
+
+    def ensure_partition(self, when):
+        """
+        Create the partition votes for a poll created at when go to, if
+        create_partitions() hasn't. Otherwise they would be refused.
+        Partitions seen once are remembered, so this usually costs no
+        query.
+        """
+        month = self.month_start(when)
+        name = self.partition_name(month)
+        if name in self.known:
+            return False
+        if name in self.get_partitions():
+            self.known.add(name)
+            return False
+        logger.warning("Vote partition %s was missing", name)
+        created = self.create_partition(month)
+        if created:
+            self.known.add(name)
+        return created
+
+    def drop_partition(self, name):
+        """
+        Detach and drop a partition, returns the number of votes in it.
+        The partition is detached CONCURRENTLY, which only needs a SHARE
+        UPDATE EXCLUSIVE lock on the vote table and so doesn't block
+        votes, but can't run in a transaction: inside one, a plain
+        DETACH locks the table until it commits.
+        """
+        table = connection.ops.quote_name(self.table)
+        partition = connection.ops.quote_name(name)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partition}')
+            votes, = cursor.fetchone()
+            if connection.in_atomic_block:
+                cursor.execute(
+                    f'ALTER TABLE {table} DETACH PARTITION {partition}')
+            elif self.is_detaching(name):
+                # A concurrent detach that was interrupted
+                cursor.execute(
+                    f'ALTER TABLE {table} DETACH PARTITION {partition} '
+                    f'FINALIZE')
+            else:
+                cursor.execute(
+                    f'ALTER TABLE {table} DETACH PARTITION {partition} '
+                    f'CONCURRENTLY')
+            cursor.execute(f'DROP TABLE {partition}')
+        self.known.discard(name)
+        logger.info("Dropped vote partition %s", name)
+        return votes
+
+    def is_detaching(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT inhdetachpending FROM pg_inherits '
+                'WHERE inhrelid = %s::regclass',
+                [connection.ops.quote_name(name)])
+            row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def drop_partitions(self, now=None):
+        """Drop the partitions of past months without polls"""
+        current = self.month_start(now or timezone.now())
+        dropped = 0
+        for name, month in sorted(self.get_partitions().items()):
+            if month >= current:
+                continue
+            # Polls are never created in a past month, and a vote can't
+            # outlive its poll, so the partition is empty
+            if Poll.objects.filter(
+                created_at__gte=month,
+                created_at__lt=add_months(month, 1)
+            ).exists():
+                continue
+            self.drop_partition(name)
+            dropped += 1
+        return dropped
+
+
+partitions = VotePartitionManager(
+    months_ahead=getattr(settings, 'VOTE_PARTITION_MONTHS_AHEAD', 3))
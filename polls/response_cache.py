@@ -0,0 +1,244 @@
+# polls/response_cache.py
+import functools
+import hashlib
+import logging
+
+import orjson
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import parse_http_date_safe
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: response entry, then ARGV[4] surrogate key sets and their
+# purge markers. ARGV[1]: timeout (s), ARGV[2]: body, ARGV[3]: headers,
+# ARGV[5]: generation. Refused if a key was purged since the generation
+STORE_SCRIPT = """
+local count = tonumber(ARGV[4])
+for i = 2 + count, 1 + 2 * count do
+    local purged = redis.call('GET', KEYS[i])
+    if purged and tonumber(purged) >= tonumber(ARGV[5]) then
+        return 0
+    end
+end
+redis.call('HSET', KEYS[1], 'body', ARGV[2], 'headers', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+for i = 2, 1 + count do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+return 1
+"""
+
+# KEYS: ARGV[2] surrogate key sets, then their purge markers.
+# ARGV[1]: timeout (s). Marks the keys purged now and returns the
+# responses tagged with them
+MARK_SCRIPT = """
+local count = tonumber(ARGV[2])
+local now = redis.call('TIME')
+local generation = now[1] .. string.format('%06d', tonumber(now[2]))
+local entries = {}
+for i = 1, count do
+    redis.call('SET', KEYS[count + i], generation, 'EX', ARGV[1])
+    for _, entry in ipairs(redis.call('SMEMBERS', KEYS[i])) do
+        table.insert(entries, entry)
+    end
+end
+return entries
+"""
+
+# KEYS: ARGV[1] surrogate key sets, then response entries. Deletes the
+# entries and untags them
+PURGE_SCRIPT = """
+local count = tonumber(ARGV[1])
+local purged = 0
+for i = count + 1, #KEYS do
+    purged = purged + redis.call('DEL', KEYS[i])
+    for j = 1, count do
+        redis.call('SREM', KEYS[j], KEYS[i])
+    end
+end
+return purged
+"""
+
+# Surrogate key of every poll list page
+POLLS = 'polls'
+
+
+def poll_key(poll_id):
+    """Surrogate key of the responses that show a poll"""
+    return f'poll-{poll_id}'
+
+
+class AnonymousResponseCache:
+    """
+    Shared cache of rendered JSON responses to anonymous GET requests.
+    Anonymous responses are the same for everyone, so they are stored
+    by normalized path and query string and tagged with surrogate keys:
+    poll-<id> for each poll they show, plus polls for list pages.
+    Writes purge by surrogate key. The same keys and Cache-Control with
+    s-maxage are sent for a CDN in front; it is not purged from here,
+    so its copies are kept short-lived.
+
+    A purge also marks its keys with the Redis time. get() returns the
+    time a request started, and set() refuses to store the rendered
+    response if one of its keys was purged since, as it may show what
+    the purge dropped. Every key a script touches is passed in KEYS,
+    and all share a hash tag so they sit on one Redis Cluster slot.
+    """
+    entry_key = 'response:{{cache}}:{}'
+    surrogate_set_key = 'response:{{cache}}:surrogate:{}'
+    purged_key = 'response:{{cache}}:purged:{}'
+    headers = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control',
+               'Vary', 'Surrogate-Key']
+
+    def __init__(self, timeout=60, s_maxage=10):
+        self.timeout = timeout
+        self.s_maxage = s_maxage
+        self._client = None
+        self._store = None
+        self._mark = None
+        self._purge = None
+
+    def get_client(self):
+        if self._client is None:
+            try:
+                self._client = get_redis_connection('default')
+            except NotImplementedError:
+                return None
+            self._store = self._client.register_script(STORE_SCRIPT)
+            self._mark = self._client.register_script(MARK_SCRIPT)
+            self._purge = self._client.register_script(PURGE_SCRIPT)
+        return self._client
+
+    def is_cacheable(self, request):
+        return (request.method == 'GET'
+                and not request.user.is_authenticated
+                and 'HTTP_AUTHORIZATION' not in request.META
+                and request.accepted_renderer.format == 'json'
+                and self.timeout > 0
+                and self.get_client() is not None)
+
+    def get_key(self, request):
+        query = sorted(
+            (name, value) for name, values in request.query_params.lists()
+            for value in values if value
+        )
+        source = orjson.dumps(
+            [request.path, query, request.accepted_media_type])
+        return self.entry_key.format(hashlib.sha1(source).hexdigest())
+
+    def get(self, request):
+        """
+        The cached response for request or None, and the generation to
+        store a fresh one with, None if the cache is unavailable.
+        """
+        pipeline = self.get_client().pipeline(transaction=False)
+        pipeline.hgetall(self.get_key(request))
+        pipeline.time()
+        try:
+            entry, (seconds, microseconds) = pipeline.execute()
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+            return None, None
+        generation = seconds * 1_000_000 + microseconds
+        if not entry:
+            return None, generation
+
+        headers = orjson.loads(entry[b'headers'])
+        response = HttpResponse(entry[b'body'])
+        for name, value in headers.items():
+            response[name] = value
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response,
+        ), generation
+
+    def set(self, request, response, surrogate_keys, generation):
+        """
+        Store a response rendered by a request that started at
+        generation, returns whether it was stored.
+        """
+        headers = {name: response[name] for name in self.headers
+                   if response.has_header(name)}
+        keys = [self.get_key(request)] + [
+            self.surrogate_set_key.format(key) for key in surrogate_keys
+        ] + [self.purged_key.format(key) for key in surrogate_keys]
+        try:
+            return bool(self._store(keys=keys, args=[
+                self.timeout, response.content, orjson.dumps(headers),
+                len(surrogate_keys), generation]))
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+            return False
+
+    def purge(self, *surrogate_keys):
+        """Drop every cached response tagged with the surrogate keys"""
+        if self.get_client() is None:
+            return 0
+        sets = [self.surrogate_set_key.format(key) for key in surrogate_keys]
+        try:
+            # Marked first: a response stored after its tags are read
+            # below is then one that started after the purge
+            entries = self._mark(
+                keys=sets + [self.purged_key.format(key)
+                             for key in surrogate_keys],
+                args=[self.timeout, len(sets)])
+            if not entries:
+                return 0
+            return self._purge(keys=sets + list(dict.fromkeys(entries)),
+                               args=[len(sets)])
+        except Exception:
+            logger.warning("Could not purge response cache", exc_info=True)
+            return 0
+
+    def patch_headers(self, response, surrogate_keys):
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        if not response.has_header('Cache-Control'):
+            patch_cache_control(response, public=True, max_age=0,
+                                s_maxage=self.s_maxage)
+        response['Surrogate-Key'] = ' '.join(surrogate_keys)
+
+
+response_cache = AnonymousResponseCache(
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60),
+    s_maxage=getattr(settings, 'RESPONSE_CACHE_S_MAXAGE', 10))
+
+
+def cache_anonymous(view_method):
+    """
+    Serve a viewset action from the shared response cache to anonymous
+    clients. The action sets view.surrogate_keys for what it showed,
+    and may set its own Cache-Control.
+    """
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        if not response_cache.is_cacheable(request):
+            response = view_method(view, request, *args, **kwargs)
+            patch_vary_headers(response, ['Authorization'])
+            if not response.has_header('Cache-Control'):
+                patch_cache_control(response, private=True)
+            return response
+
+        cached, generation = response_cache.get(request)
+        if cached is not None:
+            return cached
+
+        view.surrogate_keys = [POLLS]
+        response = view_method(view, request, *args, **kwargs)
+        keys = view.surrogate_keys
+        if response.status_code in (200, 304):
+            response_cache.patch_headers(response, keys)
+        if response.status_code == 200 and generation is not None:
+            def store(rendered):
+                response_cache.set(request, rendered, keys, generation)
+            response.add_post_render_callback(store)
+        return response
+    return wrapper
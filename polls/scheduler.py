@@ -0,0 +1,197 @@
+# polls/scheduler.py
+import datetime
+import logging
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .events import record_event
+from .feed import active_feed
+from .models import Poll
+from .response_cache import POLLS, poll_key, response_cache
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: schedule, ARGV[1]: now (s), ARGV[2]: batch size
+# Removes and returns the polls whose boundary has passed
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1],
+                       'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+class PollStatusScheduler:
+    """
+    Advances Poll.status when polls start and expire.
+    The next boundary of every upcoming or active poll is kept in a
+    Redis sorted set scored by its timestamp. advance() claims the due
+    polls atomically, so any number of workers can run it, flips their
+    status, drops the caches that show it and tells realtime clients.
+    reconcile() repairs statuses and rebuilds the set from the database
+    in case Redis lost it.
+
+    Rather than polling the set every second, a periodic task runs every
+    interval seconds and queues advance() for each second in the next
+    interval that has a boundary, see due_times().
+    """
+    schedule_key = 'poll_schedule'
+
+    def __init__(self, batch_size=500, interval=30):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._client = None
+        self._claim_due = None
+
+    def get_client(self):
+        if self._client is None:
+            try:
+                self._client = get_redis_connection('default')
+            except NotImplementedError:
+                return None
+            self._claim_due = self._client.register_script(
+                CLAIM_DUE_SCRIPT)
+        return self._client
+
+    def schedule(self, poll):
+        """Schedule the poll's next status change, if it has one"""
+        client = self.get_client()
+        if client is None:
+            return
+        boundary = poll.next_boundary
+        try:
+            if boundary is None:
+                client.zrem(self.schedule_key, str(poll.pk))
+            else:
+                client.zadd(self.schedule_key,
+                            {str(poll.pk): boundary.timestamp()})
+        except Exception:
+            logger.warning("Could not schedule poll %s", poll.pk,
+                           exc_info=True)
+
+    def unschedule(self, poll_id):
+        client = self.get_client()
+        if client is None:
+            return
+        try:
+            client.zrem(self.schedule_key, str(poll_id))
+        except Exception:
+            logger.warning("Could not unschedule poll %s", poll_id,
+                           exc_info=True)
+
+    def claim_due(self, now):
+        if self.get_client() is None:
+            return []
+        due = self._claim_due(
+            keys=[self.schedule_key],
+            args=[now.timestamp(), self.batch_size])
+        return [poll_id.decode() for poll_id in due]
+
+    def due_times(self, now=None):
+        """
+        The whole seconds after now and within the interval at which a
+        scheduled boundary passes, oldest first.
+        """
+        now = now or timezone.now()
+        client = self.get_client()
+        if client is None:
+            return []
+        boundaries = client.zrangebyscore(
+            self.schedule_key, now.timestamp(),
+            now.timestamp() + self.interval,
+            start=0, num=self.batch_size, withscores=True)
+        seconds = sorted({math.ceil(score) for _, score in boundaries})
+        return [datetime.datetime.fromtimestamp(
+            second, tz=datetime.timezone.utc) for second in seconds]
+
+    def advance(self, now=None):
+        """Update the polls whose boundary has passed, returns the count"""
+        now = now or timezone.now()
+        changed = 0
+        for poll in Poll.objects.filter(pk__in=self.claim_due(now)):
+            changed += self.update_status(poll, now)
+        return changed
+
+    def update_status(self, poll, now):
+        """Bring poll's status up to date and schedule its next change"""
+        status = poll.status_at(now)
+        changed = False
+        if status != poll.status:
+            with transaction.atomic():
+                # The status guard skips polls saved since they were read
+                changed = bool(Poll.objects.filter(
+                    pk=poll.pk, status=poll.status
+                ).update(status=status))
+                if changed:
+                    poll.status = status
+                    self.notify(poll, now)
+        self.schedule(poll)
+        return changed
+
+    def notify(self, poll, now):
+        """Drop the caches showing the poll and tell realtime clients"""
+        active_feed.invalidate_on_commit()
+        transaction.on_commit(
+            lambda: response_cache.purge(poll_key(poll.pk), POLLS))
+
+        data = {
+            'poll_id': str(poll.pk),
+            'status': poll.status,
+            'timestamp': now.isoformat()
+        }
+        record_event(
+            f'poll_{poll.pk}',
+            {
+                'type': 'poll_update',
+                'event_type': 'status_changed',
+                'data': data
+            },
+            poll_id=poll.pk
+        )
+        record_event(
+            'polls_list',
+            {'type': 'poll_status_changed', 'data': data},
+            poll_id=poll.pk
+        )
+
+    def reconcile(self, now=None):
+        """
+        Fix statuses that missed their change and reschedule every
+        upcoming and active poll. Returns the number of polls fixed.
+        """
+        now = now or timezone.now()
+        stale = Poll.objects.filter(
+            Q(status=Poll.Status.UPCOMING, start_date__lte=now) |
+            Q(status=Poll.Status.ACTIVE, expiry_date__lt=now)
+        )
+        fixed = 0
+        for poll in stale.iterator():
+            fixed += self.update_status(poll, now)
+
+        client = self.get_client()
+        if client is None:
+            return fixed
+        live = Poll.objects.filter(
+            status__in=[Poll.Status.UPCOMING, Poll.Status.ACTIVE]
+        ).only('id', 'status', 'start_date', 'expiry_date')
+        batch = {}
+        for poll in live.iterator(chunk_size=self.batch_size):
+            batch[str(poll.pk)] = poll.next_boundary.timestamp()
+            if len(batch) >= self.batch_size:
+                client.zadd(self.schedule_key, batch)
+                batch = {}
+        if batch:
+            client.zadd(self.schedule_key, batch)
+        return fixed
+
+
+scheduler = PollStatusScheduler(
+    batch_size=getattr(settings, 'POLL_SCHEDULER_BATCH_SIZE', 500),
+    interval=getattr(settings, 'POLL_SCHEDULER_INTERVAL', 30))
@@ -1,5 +1,9 @@
 # polls/serializers.py
 from rest_framework import serializers
+from django.db.models import (
+    Case, Count, Exists, F, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from .models import Poll, Vote
 
@@ -10,6 +14,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def poll_status(is_active, status):
+    """Status shown for a poll in API responses, None if deactivated"""
+    if is_active or status == Poll.Status.EXPIRED:
+        return status
+    return None
+
+
 class PollCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating polls with validation for start and expiry dates.
@@ -86,6 +97,7 @@ class PollSerializer(serializers.ModelSerializer):
     """
     Serializer for reading poll data with computed fields.
     Shows owner email only for non-anonymous polls.
+    Takes an optional fieldset, see parse_fieldset.
     """
     owner_email = serializers.SerializerMethodField()
     creator_email = serializers.SerializerMethodField()
@@ -104,6 +116,19 @@ class PollSerializer(serializers.ModelSerializer):
             'has_user_voted', 'status'
         ]
 
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        self.expand = expand
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'results' in self.expand:
+            data['results'] = instance.get_results()
+        return data
+
     def get_owner_email(self, obj):
         """Always show owner email (accountability)"""
         return obj.owner.email
@@ -125,13 +150,160 @@ class PollSerializer(serializers.ModelSerializer):
         return Vote.objects.filter(poll=obj).count()
 
     def get_status(self, obj):
-        now = timezone.now()
-        if obj.is_active:
-            return 'active'
-        elif obj.is_active and obj.start_date > now:
-            return 'upcoming'
-        elif obj.expiry_date < now:
-            return 'expired'
+        return poll_status(obj.is_active, obj.status)
+
+
+EXPANSIONS = ['results']
+
+
+def _split(query_params, name):
+    return [value.strip()
+            for param in query_params.getlist(name)
+            for value in param.split(',') if value.strip()]
+
+
+def parse_fieldset(query_params):
+    """
+    Fields and expansions requested with the fields, exclude and expand
+    query parameters, as (fields, expand). Fields keep PollSerializer's
+    order and are None when every field is wanted.
+    """
+    fields = _split(query_params, 'fields')
+    exclude = _split(query_params, 'exclude')
+    expand = _split(query_params, 'expand')
+
+    errors = {}
+    known_fields = PollSerializer.Meta.fields
+    for name, values, known in [('fields', fields, known_fields),
+                                ('exclude', exclude, known_fields),
+                                ('expand', expand, EXPANSIONS)]:
+        unknown = [value for value in values if value not in known]
+        if unknown:
+            errors[name] = [f"Unknown field: {value}" for value in unknown]
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    if not fields and not exclude:
+        return None, expand
+    selected = [name for name in PollSerializer.Meta.fields
+                if (not fields or name in fields) and name not in exclude]
+    return selected, expand
+
+
+class PollRowSerializer:
+    """
+    Read-only serializer for poll lists, producing the same output as
+    PollSerializer without DRF's per-field machinery.
+    Emails, vote totals and has_user_voted are annotated onto the
+    queryset and the polls are read as .values() rows, so a page is
+    fetched in one query and each row is turned into a dict directly.
+    Only the annotations the requested fields need are added.
+    """
+    columns = [
+        'id', 'question', 'options', 'is_anonymous', 'created_at',
+        'updated_at', 'start_date', 'expiry_date', 'is_active', 'status'
+    ]
+    datetime_fields = {'created_at', 'updated_at', 'start_date',
+                       'expiry_date'}
+    # Columns a computed field is built from
+    depends_on = {'status': ['is_active', 'status']}
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, request=None, fields=None, expand=()):
+        self.request = request
+        self.fields = list(PollSerializer.Meta.fields
+                           if fields is None else fields)
+        self.expand = expand
+
+    def get_annotations(self):
+        annotations = {}
+        if 'owner_email' in self.fields:
+            annotations['owner_email'] = F('owner__email')
+        if 'creator_email' in self.fields:
+            annotations['creator_email'] = Case(
+                When(is_anonymous=False, then=F('creator__email')),
+                default=None
+            )
+        if 'total_votes' in self.fields:
+            # Finalized polls have the total in their snapshot. Others
+            # are counted in a subquery rather than a join, so the
+            # queryset keeps its default ordering and has no GROUP BY
+            annotations['total_votes'] = Coalesce(
+                F('result_snapshot__total_votes'),
+                Subquery(
+                    Vote.objects.filter(poll=OuterRef('pk')).order_by()
+                    .values('poll').annotate(count=Count('pk'))
+                    .values('count')
+                ),
+                0
+            )
+        if 'results' in self.expand:
+            annotations['final_results'] = F('result_snapshot__results')
+        if 'has_user_voted' in self.fields:
+            user = getattr(self.request, 'user', None)
+            if user is not None and user.is_authenticated:
+                annotations['has_user_voted'] = Exists(Vote.objects.filter(
+                    poll=OuterRef('pk'), user=user))
+            else:
+                annotations['has_user_voted'] = Value(False)
+        return annotations
+
+    def get_columns(self):
+        # The id is always read, expansions and the feed key rows by it
+        needed = {'id'}
+        if 'results' in self.expand:
+            needed.add('options')
+        for name in self.fields:
+            needed.update(self.depends_on.get(name, [name]))
+        return [column for column in self.columns if column in needed]
+
+    def get_queryset(self, queryset):
+        """The queryset as annotated rows ready for to_representation"""
+        annotations = self.get_annotations()
+        return queryset.annotate(**annotations).values(
+            *self.get_columns(), *annotations)
+
+    def to_representation(self, row):
+        datetime = self.datetime_field.to_representation
+        data = {}
+        for name in self.fields:
+            if name == 'id':
+                data[name] = str(row['id'])
+            elif name in self.datetime_fields:
+                data[name] = datetime(row[name])
+            elif name == 'status':
+                data[name] = poll_status(row['is_active'], row['status'])
+            else:
+                data[name] = row[name]
+        return data
+
+    def serialize(self, rows):
+        rows = list(rows)
+        data = [self.to_representation(row) for row in rows]
+        if 'results' in self.expand:
+            results = self.get_results(rows)
+            for row, item in zip(rows, data):
+                item['results'] = results[str(row['id'])]
+        return data
+
+    def get_results(self, rows):
+        """
+        Results for each row's poll by id: the final results of finalized
+        polls, the others tallied in one query.
+        """
+        results = {str(row['id']): row['final_results'] for row in rows
+                   if row.get('final_results') is not None}
+        pending = [row for row in rows if str(row['id']) not in results]
+        if pending:
+            # Cached rows hold string ids
+            counts = {
+                str(poll_id): poll_counts
+                for poll_id, poll_counts in Poll.count_votes_by_poll(
+                    [row['id'] for row in pending]).items()}
+            for row in pending:
+                results[str(row['id'])] = Poll.tally(
+                    row['options'], counts.get(str(row['id']), {}))
+        return results
 
 
 class VoteSerializer(serializers.ModelSerializer):
@@ -216,6 +388,9 @@ class UserVoteSerializer(serializers.ModelSerializer):
 
     def get_selected_option(self, obj):
         """Get the actual option text that was voted for"""
+        if obj.option_id is not None:
+            return obj.option.text
+        # Options never mirrored, loads them
         if obj.option_index < len(obj.poll.options):
             return obj.poll.options[obj.option_index]
         return "Unknown option"
@@ -1,9 +1,15 @@
 # polls/signals.py
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import Poll, Vote
+from utils.blocklist import notify_blocklist_changed
+from django.db import transaction
+from .conditional import tally
+from .events import record_event
+from .feed import active_feed
+from .models import BlockedIP, Poll, PollResultSnapshot, Vote
+from .partitions import partitions
+from .response_cache import POLLS, poll_key, response_cache
+from .scheduler import scheduler
 
 from django.utils import timezone
 
@@ -45,10 +51,15 @@ from django.utils import timezone
 def vote_created(sender, instance, created, **kwargs):
     """Notify WebSocket clients when a vote is created via API"""
     if created:
-        channel_layer = get_channel_layer()
+        transaction.on_commit(
+            lambda: active_feed.count_vote(instance.poll_id))
+        transaction.on_commit(
+            lambda: tally.count_vote(instance.poll_id, instance.created_at))
+        transaction.on_commit(
+            lambda: response_cache.purge(poll_key(instance.poll_id)))
 
         # Notify poll-specific subscribers
-        async_to_sync(channel_layer.group_send)(
+        record_event(
             f'poll_{instance.poll.id}',
             {
                 'type': 'poll_update',
@@ -59,18 +70,25 @@ def vote_created(sender, instance, created, **kwargs):
                     'option_index': instance.option_index,
                     'timestamp': instance.created_at.isoformat()
                 }
-            }
+            },
+            poll_id=instance.poll_id
         )
 
 
 @receiver(post_save, sender=Poll)
 def poll_created_updated(sender, instance, created, **kwargs):
     """Notify when a poll is created or updated"""
-    channel_layer = get_channel_layer()
-
+    active_feed.invalidate_on_commit()
+    transaction.on_commit(lambda: tally.invalidate_results(instance.id))
+    transaction.on_commit(
+        lambda: response_cache.purge(poll_key(instance.id), POLLS))
+    transaction.on_commit(lambda: scheduler.schedule(instance))
     if created:
+        # Votes for the poll are refused without it
+        transaction.on_commit(
+            lambda: partitions.ensure_partition(instance.created_at))
         # Notify all poll list subscribers
-        async_to_sync(channel_layer.group_send)(
+        record_event(
             'polls_list',
             {
                 'type': 'poll_created',
@@ -80,11 +98,12 @@ def poll_created_updated(sender, instance, created, **kwargs):
                     'created_at': instance.created_at.isoformat(),
                     'owner_email': instance.owner.email
                 }
-            }
+            },
+            poll_id=instance.id
         )
     else:
         # Notify poll-specific and list subscribers
-        async_to_sync(channel_layer.group_send)(
+        record_event(
             f'poll_{instance.id}',
             {
                 'type': 'poll_update',
@@ -93,16 +112,21 @@ def poll_created_updated(sender, instance, created, **kwargs):
                     'poll_id': str(instance.id),
                     'changes': ['question', 'options', 'status']  # Simplified
                 }
-            }
+            },
+            poll_id=instance.id
         )
 
 
 @receiver(post_delete, sender=Poll)
 def poll_deleted(sender, instance, **kwargs):
     """Notify when a poll is deleted"""
-    channel_layer = get_channel_layer()
-
-    async_to_sync(channel_layer.group_send)(
+    # The instance loses its pk once the delete completes
+    poll_id = instance.id
+    active_feed.invalidate_on_commit()
+    transaction.on_commit(
+        lambda: response_cache.purge(poll_key(poll_id), POLLS))
+    transaction.on_commit(lambda: scheduler.unschedule(poll_id))
+    record_event(
         'polls_list',
         {
             'type': 'poll_deleted',
@@ -110,5 +134,37 @@ def poll_deleted(sender, instance, **kwargs):
                 'id': str(instance.id),
                 'timestamp': timezone.now().isoformat()
             }
-        }
+        },
+        poll_id=instance.id
     )
+
+
+@receiver(post_save, sender=PollResultSnapshot)
+def results_finalized(sender, instance, created, **kwargs):
+    """Send the final results when a poll is closed"""
+    if not created:
+        return
+    transaction.on_commit(lambda: tally.invalidate_results(instance.poll_id))
+    transaction.on_commit(
+        lambda: response_cache.purge(poll_key(instance.poll_id)))
+    record_event(
+        f'poll_{instance.poll_id}',
+        {
+            'type': 'poll_update',
+            'event_type': 'poll_closed',
+            'data': {
+                'poll_id': str(instance.poll_id),
+                'total_votes': instance.total_votes,
+                'results': instance.results,
+                'timestamp': instance.finalized_at.isoformat()
+            }
+        },
+        poll_id=instance.poll_id
+    )
+
+
+@receiver(post_save, sender=BlockedIP)
+@receiver(post_delete, sender=BlockedIP)
+def blocked_ip_changed(sender, instance, **kwargs):
+    """Reload the in-memory blocklist of every worker"""
+    notify_blocklist_changed()
@@ -2,7 +2,7 @@
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction
 import requests
 from .models import Poll
 
@@ -44,12 +44,110 @@ def check_api_health():
 @shared_task
 def cleanup_expired_polls():
     """
-    Clean up old polls and related data to maintain database performance.
+    Move old polls and related data to the archive to maintain database
+    performance. Works in paced batches within a time budget and queues
+    another run, after a delay, if expired polls remain.
     """
-    thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-    old_polls = Poll.objects.filter(expiry_date__lt=thirty_days_ago)
+    from .cleanup import cleaner
 
-    count = old_polls.count()
-    old_polls.delete()
+    stats = cleaner.run()
+    if not stats['finished']:
+        cleanup_expired_polls.apply_async(countdown=cleaner.requeue_delay)
+    return (f"Archived {stats['polls']} expired polls and "
+            f"{stats['votes']} votes in {stats['batches']} batches")
 
-    return f"Cleaned up {count} expired polls"
+
+@shared_task
+def relay_poll_events():
+    """
+    Publish realtime events left in the outbox, e.g. by a web worker
+    that stopped before its in-process relay ran.
+    """
+    from .events import relay
+
+    sent = relay.relay_pending()
+    return f"Relayed {sent} realtime events"
+
+
+@shared_task
+def process_suspicious_events():
+    """
+    Aggregate reported suspicious requests and block offending IPs.
+    """
+    from utils.autoblock import aggregator
+
+    processed = aggregator.process_pending()
+    return f"Processed {processed} suspicious events"
+
+
+@shared_task
+def finalize_expired_polls(batch_size=500):
+    """
+    Snapshot the final results of polls that have expired.
+    Waits RESULTS_FINALIZE_DELAY seconds past the expiry so votes that
+    were in flight at the boundary are counted.
+    """
+    delay = getattr(settings, 'RESULTS_FINALIZE_DELAY', 5)
+    cutoff = timezone.now() - timezone.timedelta(seconds=delay)
+    polls = Poll.objects.filter(
+        expiry_date__lte=cutoff,
+        result_snapshot__isnull=True
+    ).order_by('expiry_date')[:batch_size]
+
+    finalized = 0
+    for poll in polls:
+        with transaction.atomic():
+            _, created = poll.finalize_results()
+        finalized += created
+    return f"Finalized results of {finalized} polls"
+
+
+@shared_task
+def advance_poll_statuses():
+    """
+    Start and expire the polls whose boundary has passed.
+    """
+    from .scheduler import scheduler
+
+    changed = scheduler.advance()
+    return f"Updated the status of {changed} polls"
+
+
+@shared_task
+def plan_poll_statuses():
+    """
+    Catch up on passed boundaries, then queue advance_poll_statuses for
+    each second with a boundary before the next run.
+    """
+    from .scheduler import scheduler
+
+    changed = scheduler.advance()
+    due_times = scheduler.due_times()
+    for eta in due_times:
+        advance_poll_statuses.apply_async(eta=eta)
+    return (f"Updated the status of {changed} polls, "
+            f"{len(due_times)} status changes queued")
+
+
+@shared_task
+def reconcile_poll_statuses():
+    """
+    Repair statuses that missed their change and rebuild the schedule.
+    """
+    from .scheduler import scheduler
+
+    fixed = scheduler.reconcile()
+    return f"Repaired the status of {fixed} polls"
+
+
+@shared_task
+def manage_vote_partitions():
+    """
+    Create the vote partitions of the coming months and drop the ones
+    emptied by the cleanup.
+    """
+    from .partitions import partitions
+
+    created = partitions.create_partitions()
+    dropped = partitions.drop_partitions()
+    return f"Created {created} and dropped {dropped} vote partitions"
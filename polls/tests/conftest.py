@@ -1,13 +1,43 @@
 # conftest.py
+from unittest.mock import patch
+
 import pytest
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
 from django.utils import timezone
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from polls.archive import archiver
+from polls.feed import active_feed
 from polls.models import Poll, Vote, BlockedIP
+from utils.ratelimit import local_buckets
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def fresh_feed():
+    """Database rollbacks don't fire signals, so rebuild per test"""
+    active_feed.invalidate()
+    yield
+    active_feed.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def fresh_throttles():
+    """Rate limits count across tests, so start each one from zero"""
+    cache.clear()
+    local_buckets.clear()
+
+
+@pytest.fixture
+def archive_storage(tmp_path):
+    """Archive polls to a temporary directory"""
+    storage = FileSystemStorage(location=tmp_path)
+    with patch.object(archiver, 'get_storage', return_value=storage):
+        yield storage
+
+
 @pytest.fixture
 def client():
     """Regular Django test client"""
@@ -127,3 +157,24 @@ def blocked_ip():
         reason="Test blocking",
         is_active=True
     )
+
+
+@pytest.fixture
+def old_polls(user, user2):
+    """Three polls that expired 40 days ago, with two votes each"""
+    expiry_date = timezone.now() - timezone.timedelta(days=40)
+    polls = []
+    for number in range(3):
+        poll = Poll.objects.create(
+            question=f"Old Poll {number}?",
+            options=["Choice A", "Choice B"],
+            owner=user,
+            creator=user,
+            start_date=expiry_date - timezone.timedelta(days=1),
+            expiry_date=expiry_date + timezone.timedelta(minutes=number)
+        )
+        Vote.objects.create(poll=poll, user=user, option_index=0)
+        Vote.objects.create(poll=poll, user=user2, option_index=1)
+        poll.finalize_results()
+        polls.append(poll)
+    return polls
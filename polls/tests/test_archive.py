@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from polls.archive import PollArchiver, archiver
+from polls.cleanup import ExpiredPollCleaner
+from polls.models import ArchivedPoll, Poll, PollResultSnapshot, Vote
+
+
+@pytest.mark.django_db
+class TestPollArchiver:
+    """Test that expired polls are written to cold storage"""
+
+    def test_archive_writes_month_file(self, old_polls, archive_storage):
+        polls, votes = archiver.archive([poll.id for poll in old_polls])
+
+        assert (polls, votes) == (3, 6)
+        archived = ArchivedPoll.objects.get(pk=old_polls[0].id)
+        month = old_polls[0].expiry_date.strftime('%Y/%m')
+        assert archived.archive_path.startswith(f'poll-archive/{month}/')
+        assert archived.archive_path.endswith('.ndjson.gz')
+        assert archive_storage.exists(archived.archive_path)
+        assert archived.total_votes == 2
+        assert archived.results == old_polls[0].final_results.results
+
+    def test_file_holds_polls_and_votes(self, old_polls, archive_storage):
+        archiver.archive([poll.id for poll in old_polls])
+        path = ArchivedPoll.objects.get(pk=old_polls[0].id).archive_path
+
+        records = list(archiver.read(path))
+
+        assert [record['type'] for record in records].count('vote') == 6
+        poll = next(record for record in records
+                    if record['id'] == str(old_polls[0].id))
+        assert poll['type'] == 'poll'
+        assert poll['question'] == old_polls[0].question
+        assert poll['total_votes'] == 2
+
+    def test_read_votes(self, old_polls, archive_storage):
+        archiver.archive([old_polls[0].id])
+        archived = ArchivedPoll.objects.get()
+
+        votes = list(archiver.read_votes(archived))
+
+        assert sorted(vote['option_index'] for vote in votes) == [0, 1]
+        assert {vote['poll_id'] for vote in votes} == {str(archived.id)}
+
+    def test_tallies_unfinalized_polls(self, old_polls, archive_storage):
+        PollResultSnapshot.objects.filter(poll=old_polls[0]).delete()
+
+        archiver.archive([old_polls[0].id])
+
+        assert ArchivedPoll.objects.get().results == [
+            {'option': 'Choice A', 'votes': 1, 'percentage': 50.0},
+            {'option': 'Choice B', 'votes': 1, 'percentage': 50.0},
+        ]
+
+    def test_cleanup_archives_before_deleting(self, old_polls, poll,
+                                              archive_storage):
+        cleaner = ExpiredPollCleaner(archiver=archiver)
+
+        stats = cleaner.run()
+
+        assert stats['polls'] == 3
+        assert ArchivedPoll.objects.count() == 3
+        assert list(Poll.objects.all()) == [poll]
+        assert not Vote.objects.exists()
+
+    def test_cleanup_refuses_without_storage(self, old_polls):
+        cleaner = ExpiredPollCleaner(archiver=PollArchiver())
+
+        with pytest.raises(ImproperlyConfigured):
+            cleaner.run()
+
+        assert Poll.objects.count() == 3
+        assert Vote.objects.count() == 6
+
+    def test_storage_from_settings(self, settings):
+        settings.STORAGES = {**settings.STORAGES, 'poll_archive': {
+            'BACKEND': 'django.core.files.storage.InMemoryStorage'}}
+
+        with patch.object(archiver, 'storage_alias', 'poll_archive'):
+            storage = archiver.get_storage()
+
+        assert storage.__class__.__name__ == 'InMemoryStorage'
+
+
+@pytest.mark.django_db
+class TestArchivedResults:
+    """Test that the results of archived polls are still served"""
+
+    @pytest.fixture
+    def archived_poll(self, old_polls, archive_storage):
+        ExpiredPollCleaner(archiver=archiver).run()
+        return old_polls[0]
+
+    def test_results_served_from_archive(self, authenticated_client,
+                                         archived_poll):
+        url = reverse('poll-results', kwargs={'pk': archived_poll.id})
+
+        response = authenticated_client.get(url)
+
+        assert response.status_code == 200
+        assert response.data['results'][0]['votes'] == '1'
+        assert 'immutable' in response['Cache-Control']
+
+    def test_unknown_poll_not_found(self, authenticated_client, poll,
+                                    archived_poll):
+        Poll.objects.filter(pk=poll.pk).delete()
+        url = reverse('poll-results', kwargs={'pk': poll.id})
+
+        response = authenticated_client.get(url)
+
+        assert response.status_code == 404
@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from polls.archive import archiver
+from polls.cleanup import ExpiredPollCleaner
+from polls.conditional import tally
+from polls.models import ArchivedPoll, Poll, PollResultSnapshot, Vote
+from polls.partitions import add_months, partitions
+from polls.tasks import cleanup_expired_polls
+
+
+@pytest.fixture
+def old_month(old_polls):
+    """Moves old_polls and their votes into a month three months ago"""
+    month = add_months(partitions.month_start(timezone.now()), -3)
+    partitions.create_partitions(now=month)
+    created_at = month + timezone.timedelta(days=1)
+    Poll.objects.filter(pk__in=[p.pk for p in old_polls]).update(
+        created_at=created_at)
+    Vote.objects.filter(poll__in=old_polls).update(
+        poll_created_at=created_at)
+    with connection.cursor() as cursor:
+        # A table with deferred foreign key checks pending can't be
+        # dropped; outside the test transaction they have run
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    return month
+
+
+@pytest.mark.django_db
+class TestExpiredPollCleaner:
+    """Test the batched deletion of old expired polls"""
+
+    def test_deletes_polls_and_related_rows(self, old_polls, poll,
+                                            expired_poll, created_vote):
+        stats = ExpiredPollCleaner(batch_size=2).run()
+
+        assert stats['polls'] == 3
+        assert stats['votes'] == 6
+        assert stats['batches'] == 2
+        assert stats['finished']
+        # Recent polls and their votes are kept
+        assert set(Poll.objects.all()) == {poll, expired_poll}
+        assert list(Vote.objects.all()) == [created_vote]
+        assert not PollResultSnapshot.objects.filter(
+            poll_id__in=[p.id for p in old_polls]).exists()
+
+    def test_votes_deleted_in_chunks(self, old_polls):
+        cleaner = ExpiredPollCleaner(batch_size=1, vote_batch_size=1)
+
+        with CaptureQueriesContext(connection) as context:
+            polls, votes = cleaner.delete_batch([old_polls[0].id])
+
+        assert (polls, votes) == (1, 2)
+        statements = [query['sql'] for query in context.captured_queries
+                      if 'SAVEPOINT' not in query['sql']]
+        # Two chunks and an empty one, then the snapshot, options and
+        # poll; nothing is read into memory
+        assert len(statements) == 6
+        assert all(sql.startswith('DELETE') for sql in statements)
+
+    def test_pauses_between_batches(self, old_polls):
+        cleaner = ExpiredPollCleaner(batch_size=1, vote_batch_size=1,
+                                     batch_pause=0.5)
+
+        with patch('polls.cleanup.time.sleep') as sleep:
+            stats = cleaner.run()
+
+        assert stats['batches'] == 3
+        # Between the 3 chunks of each batch's votes, and the batches
+        assert sleep.call_count == 3 * 2 + 2
+        sleep.assert_called_with(0.5)
+
+    def test_stops_when_out_of_time(self, old_polls):
+        stats = ExpiredPollCleaner(batch_size=1, time_budget=0).run()
+
+        assert stats['batches'] == 0
+        assert not stats['finished']
+        assert Poll.objects.count() == 3
+
+    def test_resumes_oldest_first(self, old_polls):
+        cleaner = ExpiredPollCleaner(batch_size=1)
+
+        cleaner.delete_batch(cleaner.get_batch(timezone.now()))
+
+        assert list(Poll.objects.order_by('expiry_date')) == old_polls[1:]
+
+    def test_drops_partition_of_expired_month(self, old_month, poll,
+                                              created_vote):
+        with CaptureQueriesContext(connection) as context:
+            stats = ExpiredPollCleaner().run()
+
+        assert stats['partitions'] == 1
+        assert (stats['polls'], stats['votes']) == (3, 6)
+        assert stats['finished']
+        assert partitions.partition_name(old_month) not in \
+            partitions.get_partitions()
+        assert list(Poll.objects.all()) == [poll]
+        assert list(Vote.objects.all()) == [created_vote]
+        # The votes went with the partition, not row by row
+        assert not any(query['sql'].startswith('DELETE FROM "polls_vote"')
+                       for query in context.captured_queries)
+
+    def test_month_with_live_polls_kept(self, old_month, old_polls, user):
+        Poll.objects.filter(pk=old_polls[0].pk).update(
+            expiry_date=timezone.now() + timezone.timedelta(days=1))
+
+        stats = ExpiredPollCleaner().run()
+
+        assert stats['partitions'] == 0
+        assert stats['polls'] == 2
+        assert partitions.partition_name(old_month) in \
+            partitions.get_partitions()
+
+    def test_month_archived_before_drop(self, old_month, archive_storage):
+        ExpiredPollCleaner(archiver=archiver).run()
+
+        archived = ArchivedPoll.objects.all()
+        assert len(archived) == 3
+        assert sum(poll.total_votes for poll in archived) == 6
+
+    def test_month_kept_when_out_of_time(self, old_month, archive_storage):
+        stats = ExpiredPollCleaner(archiver=archiver, time_budget=0).run()
+
+        assert stats['partitions'] == 0
+        assert partitions.partition_name(old_month) in \
+            partitions.get_partitions()
+        assert Vote.objects.count() == 6
+
+    def test_forgets_cached_tally(self, old_polls):
+        poll_id = old_polls[0].id
+        results_key = tally.get_results_key(poll_id)
+        old_polls[0].get_results()
+
+        ExpiredPollCleaner().run()
+
+        assert cache.get(tally.version_key.format(poll_id)) is None
+        assert cache.get(results_key) is None
+
+
+@pytest.mark.django_db
+class TestCleanupExpiredPollsTask:
+    """Test the cleanup task"""
+
+    def test_reports_progress(self, old_polls, archive_storage):
+        with patch.object(cleanup_expired_polls, 'apply_async') as queue, \
+                patch('polls.cleanup.cleaner.batch_pause', 0):
+            result = cleanup_expired_polls()
+
+        assert result == \
+            "Archived 3 expired polls and 6 votes in 1 batches"
+        queue.assert_not_called()
+
+    def test_requeues_when_unfinished(self, old_polls, archive_storage):
+        with patch('polls.cleanup.cleaner.time_budget', 0), \
+                patch('polls.cleanup.cleaner.requeue_delay', 120), \
+                patch.object(cleanup_expired_polls, 'apply_async') as queue:
+            cleanup_expired_polls()
+
+        queue.assert_called_once_with(countdown=120)
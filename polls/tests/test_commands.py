@@ -0,0 +1,119 @@
+import io
+import pytest
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from polls.models import BlockedIP
+
+
+@pytest.mark.django_db
+class TestBlockIPsCommand:
+    """Test the block_ips management command"""
+
+    def call(self, *args, **kwargs):
+        out = io.StringIO()
+        with patch('polls.management.commands.block_ips.'
+                   'notify_blocklist_changed') as mock_notify:
+            call_command('block_ips', *args, stdout=out, **kwargs)
+        return out.getvalue(), mock_notify
+
+    def test_block_single_ip(self):
+        output, mock_notify = self.call('192.168.1.180')
+
+        blocked_ip = BlockedIP.objects.get()
+        assert blocked_ip.ip_address == '192.168.1.180'
+        assert blocked_ip.prefix_length is None
+        assert 'Successfully blocked 1 IPs' in output
+        mock_notify.assert_called_once()
+
+    def test_block_cidr_ranges(self):
+        self.call('10.1.2.3/8', '2001:db8::/32', '192.168.1.181/32')
+
+        rows = set(BlockedIP.objects.values_list(
+            'ip_address', 'prefix_length'))
+        assert rows == {
+            ('10.0.0.0', 8),
+            ('2001:db8::', 32),
+            ('192.168.1.181', None),
+        }
+
+    def test_file_is_deduplicated_and_validated(self, tmp_path):
+        feed = tmp_path / 'feed.txt'
+        feed.write_text(
+            "# threat feed\n"
+            "192.168.1.182\n"
+            "192.168.1.182  # listed twice\n"
+            "\n"
+            "999.1.1.1\n"
+            "172.16.0.0/12\n"
+            "172.16.0.0/16\n"
+        )
+
+        output, _ = self.call(file=[str(feed)], reason='Threat feed')
+
+        rows = set(BlockedIP.objects.values_list(
+            'ip_address', 'prefix_length', 'reason'))
+        assert rows == {
+            ('192.168.1.182', None, 'Threat feed'),
+            ('172.16.0.0', 12, 'Threat feed'),
+        }
+        assert 'Invalid IP address: 999.1.1.1' in output
+        assert '1 invalid' in output
+
+    def test_read_from_stdin(self):
+        with patch('sys.stdin', io.StringIO("192.168.1.183\n10.0.0.0/8\n")):
+            self.call(file=['-'])
+
+        assert BlockedIP.objects.count() == 2
+
+    def test_existing_blocks_skipped(self, blocked_ip):
+        output, mock_notify = self.call(blocked_ip.ip_address)
+
+        assert BlockedIP.objects.count() == 1
+        assert '1 already blocked' in output
+        # Skipped entries are reported at the default verbosity
+        assert 'IP 192.168.1.100/32 is already blocked' in output
+        mock_notify.assert_not_called()
+
+    def test_widens_block_at_same_address(self):
+        BlockedIP.objects.create(ip_address='10.0.0.0', reason='Host')
+
+        output, mock_notify = self.call('10.0.0.0/8')
+
+        blocked_ip = BlockedIP.objects.get()
+        assert blocked_ip.network == '10.0.0.0/8'
+        assert '1 updated' in output
+        mock_notify.assert_called_once()
+
+    def test_narrower_range_skipped(self):
+        BlockedIP.objects.create(
+            ip_address='10.0.0.0', prefix_length=8, reason='Range')
+
+        output, _ = self.call('10.0.0.0/16')
+
+        assert BlockedIP.objects.get().network == '10.0.0.0/8'
+        assert 'IP 10.0.0.0/16 is already blocked by 10.0.0.0/8' in output
+
+    def test_inactive_block_reactivated(self, blocked_ip):
+        blocked_ip.is_active = False
+        blocked_ip.save()
+
+        output, mock_notify = self.call(blocked_ip.ip_address)
+
+        blocked_ip.refresh_from_db()
+        assert blocked_ip.is_active
+        assert '1 updated, 0 already blocked' in output
+        mock_notify.assert_called_once()
+
+    def test_one_insert_for_many_addresses(self, django_assert_num_queries):
+        addresses = [f'10.0.{i // 256}.{i % 256}' for i in range(500)]
+
+        # Existing rows lookup, then the batched insert in a savepoint
+        with django_assert_num_queries(4):
+            self.call(*addresses)
+
+        assert BlockedIP.objects.count() == 500
+
+    def test_no_addresses(self):
+        with pytest.raises(CommandError):
+            self.call()
@@ -0,0 +1,125 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from polls.conditional import tally
+from polls.models import Poll, Vote
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    """
+    Test ETag and Last-Modified handling on polls and results.
+    Authenticated, so the shared anonymous response cache is bypassed.
+    """
+
+    @pytest.fixture(params=['poll-detail', 'poll-results'])
+    def url(self, request, poll):
+        return reverse(request.param, kwargs={'pk': poll.id})
+
+    def test_validators_sent(self, authenticated_client, poll, url):
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'].startswith('"')
+        assert response['Last-Modified'] == http_date(
+            int(poll.updated_at.timestamp()))
+
+    def test_matching_etag_not_modified(self, authenticated_client, url,
+                                        django_assert_num_queries):
+        etag = authenticated_client.get(url)['ETag']
+
+        # Only the poll lookup, nothing is serialized or counted
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(
+                url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_if_modified_since(self, authenticated_client, url):
+        last_modified = authenticated_client.get(url)['Last-Modified']
+
+        response = authenticated_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_vote_changes_etag(self, authenticated_client, poll, user2,
+                               url, django_capture_on_commit_callbacks):
+        etag = authenticated_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Vote.objects.create(poll=poll, user=user2, option_index=1)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_poll_update_changes_etag(self, authenticated_client, poll, url):
+        etag = authenticated_client.get(url)['ETag']
+
+        poll.question = "Edited question?"
+        poll.save()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_representation_changes_etag(self, authenticated_client, poll):
+        url = reverse('poll-detail', kwargs={'pk': poll.id})
+        etag = authenticated_client.get(url)['ETag']
+
+        response = authenticated_client.get(
+            url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_user_changes_etag(self, client, authenticated_client, poll):
+        url = reverse('poll-detail', kwargs={'pk': poll.id})
+
+        assert client.get(url)['ETag'] != \
+            authenticated_client.get(url)['ETag']
+
+    def test_status_change_changes_etag(self, authenticated_client, poll):
+        url = reverse('poll-detail', kwargs={'pk': poll.id})
+        etag = authenticated_client.get(url)['ETag']
+
+        # As the scheduler does, without touching updated_at
+        Poll.objects.filter(pk=poll.pk).update(
+            expiry_date=timezone.now() - timezone.timedelta(days=1),
+            status=Poll.Status.EXPIRED)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestResultsInvalidation:
+    """Test that cached results are dropped when a vote commits"""
+
+    def test_vote_refreshes_results(self, client, poll, user2,
+                                    django_capture_on_commit_callbacks):
+        url = reverse('poll-results', kwargs={'pk': poll.id})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Vote.objects.create(poll=poll, user=user2, option_index=1)
+        response = client.get(url)
+
+        assert response.data['results'][1]['votes'] == '1'
+
+    def test_results_counted_before_a_vote_not_served(
+            self, poll, user2, django_capture_on_commit_callbacks):
+        """Test a slow reader storing its results after a vote commits"""
+        stale_key = tally.get_results_key(poll.id)
+        stale = Poll.tally(poll.options, poll.count_votes())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Vote.objects.create(poll=poll, user=user2, option_index=1)
+        cache.set(stale_key, stale, 300)
+
+        assert poll.get_results()[1]['votes'] == 1
@@ -0,0 +1,165 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from polls.events import EventRelay, record_event
+from polls.models import Poll, PollEvent
+
+
+@pytest.mark.django_db
+class TestOutboxEvents:
+    """Test that realtime events are written to the outbox"""
+
+    @patch('polls.events.publisher')
+    def test_create_poll_records_one_event(self, mock_publisher,
+                                           authenticated_client,
+                                           django_capture_on_commit_callbacks):
+        """Test that a new poll is recorded exactly once"""
+        data = {
+            'question': 'Broadcast Poll?',
+            'options': ['Yes', 'No'],
+            'start_date': (
+                timezone.now() + timezone.timedelta(hours=1)).isoformat(),
+            'expiry_date': (
+                timezone.now() + timezone.timedelta(days=1)).isoformat(),
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(
+                reverse('poll-list'), data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        event = PollEvent.objects.get()
+        assert event.group == 'polls_list'
+        assert event.payload['type'] == 'poll_created'
+        assert event.poll_id == Poll.objects.get().id
+        mock_publisher.wake.assert_called_once()
+
+    def test_vote_records_one_event(self, authenticated_client, poll):
+        """Test that a vote is recorded exactly once"""
+        PollEvent.objects.all().delete()
+        vote_url = reverse('poll-vote', kwargs={'pk': poll.id})
+
+        response = authenticated_client.post(
+            vote_url, {'option_index': 0}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        event = PollEvent.objects.get()
+        assert event.group == f'poll_{poll.id}'
+        assert event.payload['event_type'] == 'vote_cast'
+        assert event.poll_id == poll.id
+
+    def test_rolled_back_write_records_nothing(self, user):
+        """Test that events roll back together with the change"""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Poll.objects.create(
+                    question="Rolled back?",
+                    options=["Yes", "No"],
+                    owner=user,
+                    creator=user
+                )
+                raise RuntimeError("abort")
+
+        assert not PollEvent.objects.exists()
+
+    @patch('polls.events.publisher')
+    def test_publisher_woken_after_commit(self, mock_publisher,
+                                          django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            record_event('polls_list', {'type': 'poll_created'})
+            mock_publisher.wake.assert_not_called()
+
+        assert len(callbacks) == 1
+        callbacks[0]()
+        mock_publisher.wake.assert_called_once()
+
+
+@pytest.mark.django_db
+class TestEventRelay:
+    """Test the outbox relay"""
+
+    def channel_layer(self, **kwargs):
+        channel_layer = Mock()
+        channel_layer.group_send = AsyncMock(**kwargs)
+        return channel_layer
+
+    def test_relay_batch_publishes_and_removes_events(self):
+        record_event('polls_list', {'type': 'poll_created'})
+        record_event('poll_1', {'type': 'poll_update'})
+        channel_layer = self.channel_layer()
+
+        with patch('polls.events.get_channel_layer',
+                   return_value=channel_layer):
+            sent = EventRelay().relay_batch()
+
+        assert sent == 2
+        assert channel_layer.group_send.await_count == 2
+        channel_layer.group_send.assert_any_await(
+            'polls_list', {'type': 'poll_created'})
+        assert not PollEvent.objects.exists()
+
+    def test_relay_keeps_group_order(self):
+        for index in range(3):
+            record_event('poll_1', {'type': 'poll_update', 'n': index})
+        channel_layer = self.channel_layer()
+
+        with patch('polls.events.get_channel_layer',
+                   return_value=channel_layer):
+            EventRelay().relay_batch()
+
+        sent = [call.args[1]['n']
+                for call in channel_layer.group_send.await_args_list]
+        assert sent == [0, 1, 2]
+
+    @patch('polls.events.logger')
+    def test_failed_events_stay_in_outbox(self, mock_logger):
+        """Test that events survive a channel layer outage"""
+        record_event('poll_1', {'type': 'poll_update'})
+        record_event('poll_2', {'type': 'poll_update'})
+        channel_layer = self.channel_layer(
+            side_effect=lambda group, message: (
+                _raise(ConnectionError("redis down"))
+                if group == 'poll_1' else None))
+
+        with patch('polls.events.get_channel_layer',
+                   return_value=channel_layer):
+            sent = EventRelay().relay_batch()
+
+        assert sent == 1
+        pending = PollEvent.objects.get()
+        assert pending.group == 'poll_1'
+        assert pending.attempts == 1
+        mock_logger.warning.assert_called_once()
+
+    @patch('polls.events.logger')
+    def test_event_dropped_after_max_attempts(self, mock_logger):
+        record_event('poll_1', {'type': 'poll_update'})
+        PollEvent.objects.update(attempts=2)
+        channel_layer = self.channel_layer(
+            side_effect=ConnectionError("redis down"))
+
+        with patch('polls.events.get_channel_layer',
+                   return_value=channel_layer):
+            EventRelay(max_attempts=3).relay_batch()
+
+        assert not PollEvent.objects.exists()
+        mock_logger.error.assert_called_once()
+
+    def test_relay_pending_drains_in_batches(self):
+        for index in range(5):
+            record_event('polls_list', {'type': 'poll_created'})
+        channel_layer = self.channel_layer()
+
+        with patch('polls.events.get_channel_layer',
+                   return_value=channel_layer):
+            sent = EventRelay(batch_size=2).relay_pending()
+
+        assert sent == 5
+        assert not PollEvent.objects.exists()
+
+
+def _raise(exc):
+    raise exc
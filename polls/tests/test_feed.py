@@ -0,0 +1,89 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from polls.feed import active_feed
+from polls.models import Poll, Vote
+from polls.serializers import PollSerializer
+
+
+@pytest.mark.django_db
+class TestActivePollFeed:
+    """Test the cached active poll feed"""
+
+    url = reverse('poll-active')
+
+    def test_feed_matches_serializer(self, client, poll, expired_poll,
+                                     future_poll):
+        response = client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+        assert response.data['results'] == [PollSerializer(poll).data]
+
+    def test_cached_feed_skips_database(self, client, poll,
+                                        django_assert_num_queries):
+        client.get(self.url)
+
+        with django_assert_num_queries(0):
+            response = client.get(self.url)
+
+        assert response.data['results'][0]['id'] == str(poll.id)
+
+    def test_poll_write_rebuilds_feed(self, client, poll, user,
+                                      django_capture_on_commit_callbacks):
+        client.get(self.url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            new_poll = Poll.objects.create(
+                question="Newest poll?",
+                options=["Yes", "No"],
+                owner=user,
+                creator=user,
+                start_date=timezone.now(),
+                expiry_date=timezone.now() + timezone.timedelta(days=1)
+            )
+        response = client.get(self.url)
+
+        ids = [row['id'] for row in response.data['results']]
+        assert ids == [str(new_poll.id), str(poll.id)]
+
+    def test_votes_overlaid_on_cached_rows(
+            self, authenticated_client2, poll, user2,
+            django_capture_on_commit_callbacks, django_assert_num_queries):
+        authenticated_client2.get(self.url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Vote.objects.create(poll=poll, user=user2, option_index=0)
+
+        # Only the has_user_voted lookup runs for a signed in user
+        with django_assert_num_queries(1):
+            response = authenticated_client2.get(self.url)
+
+        row = response.data['results'][0]
+        assert row['total_votes'] == 1
+        assert row['has_user_voted'] is True
+
+    def test_feed_expires_at_next_boundary(self, user):
+        Poll.objects.create(
+            question="Closing soon?",
+            options=["Yes", "No"],
+            owner=user,
+            start_date=timezone.now() - timezone.timedelta(hours=1),
+            expiry_date=timezone.now() + timezone.timedelta(seconds=30)
+        )
+
+        ids, timeout = active_feed.build_ids()
+
+        assert len(ids) == 1
+        assert timeout <= 30
+
+    def test_cached_ids_keyed_by_version(self, poll):
+        active_feed.get_ids()
+        key = f'poll_feed:{active_feed.version}:ids'
+        assert cache.get(key) == [str(poll.id)]
+
+        active_feed.invalidate()
+
+        assert f'poll_feed:{active_feed.version}:ids' != key
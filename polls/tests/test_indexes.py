@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+from polls.filters import PollFilter
+from polls.models import Poll
+
+
+DATES = {
+    Poll.Status.UPCOMING: (1, 2),
+    Poll.Status.ACTIVE: (-1, 1),
+    Poll.Status.EXPIRED: (-30, -1),
+}
+
+
+@pytest.fixture
+def make_polls(user):
+    """
+    A table large enough for the planner to prefer the indexes, where
+    one status is rare so only its index finds a page of it quickly.
+    """
+    def make_polls(rare_status):
+        now = timezone.now()
+        common = [status for status in DATES if status != rare_status]
+        polls = []
+        for index in range(3000):
+            if index % 100 == 0:
+                status = rare_status
+            else:
+                status = common[index % 2]
+            start_days, expiry_days = DATES[status]
+            poll = Poll(
+                question=f"Poll {index}?",
+                options=["Yes", "No"],
+                owner=user,
+                start_date=now + timezone.timedelta(days=start_days),
+                expiry_date=now + timezone.timedelta(days=expiry_days),
+                is_active=index % 7 != 0
+            )
+            # bulk_create doesn't call save()
+            poll.status = poll.status_at(now)
+            polls.append(poll)
+        Poll.objects.bulk_create(polls)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE polls_poll')
+    return make_polls
+
+
+@pytest.mark.django_db
+class TestStatusIndexes:
+    """Test that every status query is served by an index"""
+
+    def plan(self, status):
+        queryset = PollFilter({'status': status}).qs[:20]
+        return queryset.explain()
+
+    @pytest.mark.parametrize('status', ['active', 'upcoming', 'expired'])
+    def test_status_query_uses_index(self, make_polls, status):
+        make_polls(status)
+
+        plan = self.plan(status)
+
+        assert 'poll_status_created_idx' in plan
+        assert 'Seq Scan' not in plan
@@ -0,0 +1,122 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.models import Poll, PollOption, Vote
+
+
+def option_texts(poll):
+    return list(poll.choices.values_list('index', 'text'))
+
+
+@pytest.mark.django_db
+class TestPollOptions:
+    """Test that poll options are mirrored into PollOption rows"""
+
+    def test_created_with_poll(self, poll):
+        assert option_texts(poll) == [
+            (0, "Option 1"), (1, "Option 2"), (2, "Option 3")]
+
+    def test_follow_edited_options(self, poll):
+        option_ids = list(poll.choices.values_list('id', flat=True))
+
+        poll.options = ["Option 1", "Edited"]
+        poll.save(update_fields=['options'])
+
+        assert option_texts(poll) == [(0, "Option 1"), (1, "Edited")]
+        # Options are updated in place
+        assert list(poll.choices.values_list('id', flat=True)) == \
+            option_ids[:2]
+
+    def test_added_options(self, poll):
+        poll.options = [*poll.options, "Option 4"]
+        poll.save()
+
+        assert option_texts(poll)[-1] == (3, "Option 4")
+
+    def test_voted_option_not_removed(self, poll, created_vote):
+        poll.options = ["Option 1"]
+
+        with pytest.raises(PermissionError, match="Options with votes"):
+            poll.save()
+
+        poll.refresh_from_db()
+        assert len(poll.options) == 3
+        assert len(option_texts(poll)) == 3
+        assert Vote.objects.get().option.index == 1
+
+    def test_unvoted_option_removed(self, poll, created_vote):
+        poll.options = ["Option 1", "Option 2"]
+        poll.save()
+
+        assert option_texts(poll) == [(0, "Option 1"), (1, "Option 2")]
+
+    def test_other_updates_skip_options(self, poll):
+        poll.question = "Edited question?"
+        with CaptureQueriesContext(connection) as context:
+            poll.save(update_fields=['question'])
+
+        assert not any('polls_polloption' in query['sql']
+                       for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestVoteOptions:
+    """Test votes joined to their option"""
+
+    def test_vote_linked_to_option(self, poll, created_vote):
+        assert created_vote.option == PollOption.objects.get(
+            poll=poll, index=1)
+
+    def test_option_resolved_by_insert(self, poll, user2):
+        with CaptureQueriesContext(connection) as context:
+            Vote.objects.create(poll=poll, user=user2, option_index=2)
+
+        statements = [query['sql'] for query in context.captured_queries
+                      if query['sql'].startswith('SELECT')
+                      and 'polls_polloption' in query['sql']]
+        assert not statements
+        assert Vote.objects.get(user=user2).option.text == "Option 3"
+
+    def test_failed_insert_leaves_no_subquery(self, poll, created_vote):
+        vote = Vote(poll=poll, user=created_vote.user, option_index=0)
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            vote.save()
+
+        assert vote.option_id is None
+        assert vote._state.adding
+
+    def test_vote_outlives_its_option(self, poll, created_vote):
+        PollOption.objects.filter(poll=poll, index=1).delete()
+
+        created_vote = Vote.objects.get()
+        assert created_vote.option is None
+        # Tallies join on the option
+        assert poll.count_votes() == {0: 0, 2: 0}
+
+    def test_counted_through_options(self, poll, future_poll, user, user2):
+        Vote.objects.create(poll=poll, user=user, option_index=2)
+        Vote.objects.create(poll=poll, user=user2, option_index=2)
+        Vote.objects.create(poll=future_poll, user=user, option_index=0)
+
+        assert poll.count_votes() == {0: 0, 1: 0, 2: 2}
+        counts = Poll.count_votes_by_poll([poll.id, future_poll.id])
+        assert counts[poll.id] == poll.count_votes()
+        assert counts[future_poll.id] == future_poll.count_votes()
+        assert counts[future_poll.id][0] == 1
+
+    def test_selected_option_from_option(self, authenticated_client, user,
+                                         poll, future_poll,
+                                         django_assert_num_queries):
+        Vote.objects.create(poll=poll, user=user, option_index=2)
+        Vote.objects.create(poll=future_poll, user=user, option_index=0)
+        url = reverse('myvote-list')
+
+        # Session, count and a single query for the page of votes
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(url)
+
+        assert sorted(vote['selected_option']
+                      for vote in response.data['results']) == \
+            ["Option 3", "Option X"]
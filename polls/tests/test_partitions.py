@@ -0,0 +1,125 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from polls.models import Poll, Vote
+from polls.partitions import add_months, partitions
+from polls.tasks import manage_vote_partitions
+
+
+def partition_of(vote):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT tableoid::regclass::text FROM polls_vote WHERE id = %s',
+            [vote.id])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestVotePartitions:
+    """Test that votes are stored in monthly partitions"""
+
+    def test_vote_stored_in_poll_month(self, poll, created_vote):
+        month = partitions.month_start(poll.created_at)
+
+        assert created_vote.poll_created_at == poll.created_at
+        assert partition_of(created_vote) == \
+            partitions.partition_name(month)
+
+    def test_one_vote_per_user_and_poll(self, poll, created_vote, user2):
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Vote.objects.create(poll=poll, user=user2, option_index=0)
+
+    def test_create_partitions_ahead(self):
+        later = timezone.now() + timezone.timedelta(days=365 * 2)
+
+        assert partitions.create_partitions(now=later) == 4
+        assert partitions.create_partitions(now=later) == 0
+        last = add_months(partitions.month_start(later), 3)
+        assert partitions.partition_name(last) in \
+            partitions.get_partitions()
+
+    def test_drop_partitions_without_polls(self, poll):
+        earlier = timezone.now() - timezone.timedelta(days=365 * 2)
+        partitions.create_partitions(now=earlier)
+        # A poll left in the first of those months keeps its partition
+        kept = partitions.month_start(earlier)
+        Poll.objects.filter(pk=poll.pk).update(created_at=kept)
+
+        assert partitions.drop_partitions() == 3
+        names = partitions.get_partitions()
+        assert partitions.partition_name(kept) in names
+        assert partitions.partition_name(add_months(kept, 1)) not in names
+        # The current month is never dropped
+        current = partitions.month_start(timezone.now())
+        assert partitions.partition_name(current) in names
+
+    def test_no_default_partition(self, poll):
+        """Test that votes of a month without a partition are refused"""
+        earlier = timezone.now() - timezone.timedelta(days=365 * 2)
+        Poll.objects.filter(pk=poll.pk).update(created_at=earlier)
+        poll.refresh_from_db()
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Vote.objects.create(poll=poll, user=poll.owner, option_index=0)
+
+    def test_failed_month_does_not_stop_later_ones(self, caplog):
+        later = timezone.now() + timezone.timedelta(days=365 * 2)
+        blocked = add_months(partitions.month_start(later), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE {} (id int)'.format(
+                partitions.partition_name(blocked)))
+
+        assert partitions.create_partitions(now=later) == 3
+        assert 'Could not create vote partition' in caplog.text
+        last = add_months(blocked, 2)
+        assert partitions.partition_name(last) in \
+            partitions.get_partitions()
+
+    def test_ensure_partition(self, django_assert_num_queries):
+        partitions.known.clear()
+        later = timezone.now() + timezone.timedelta(days=365 * 3)
+
+        assert partitions.ensure_partition(later)
+        assert partitions.partition_name(partitions.month_start(later)) in \
+            partitions.get_partitions()
+        with django_assert_num_queries(0):
+            assert not partitions.ensure_partition(later)
+
+    def test_missing_partition_created_with_poll(
+            self, user, django_capture_on_commit_callbacks):
+        """Test that a new poll can be voted on without the beat task"""
+        partitions.known.clear()
+        current = partitions.month_start(timezone.now())
+        partitions.drop_partition(partitions.partition_name(current))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poll = Poll.objects.create(
+                question="Missing partition?", options=["Yes", "No"],
+                owner=user, creator=user,
+                expiry_date=timezone.now() + timezone.timedelta(days=1))
+
+        vote = Vote.objects.create(poll=poll, user=user, option_index=0)
+        assert partition_of(vote) == partitions.partition_name(current)
+
+    def test_task(self):
+        result = manage_vote_partitions()
+
+        assert result.startswith("Created 0 and dropped")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentDetach:
+    """Test that partitions are detached without blocking votes"""
+
+    def test_drop_partitions_detaches_concurrently(self):
+        earlier = timezone.now() - timezone.timedelta(days=365 * 2)
+        partitions.create_partitions(now=earlier)
+        name = partitions.partition_name(partitions.month_start(earlier))
+
+        with CaptureQueriesContext(connection) as context:
+            assert partitions.drop_partitions() == 4
+
+        assert name not in partitions.get_partitions()
+        assert any(query['sql'].endswith('CONCURRENTLY')
+                   for query in context.captured_queries)
@@ -0,0 +1,149 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from polls.models import Poll, Vote
+from polls.response_cache import poll_key, response_cache
+
+
+@pytest.mark.django_db
+class TestAnonymousResponseCache:
+    """Test the shared response cache for anonymous reads"""
+
+    list_url = reverse('poll-list')
+
+    @pytest.fixture(params=['poll-list', 'poll-detail', 'poll-results'])
+    def url(self, request, poll):
+        if request.param == 'poll-list':
+            return reverse(request.param)
+        return reverse(request.param, kwargs={'pk': poll.id})
+
+    def test_cached_response_skips_database(self, client, url,
+                                            django_assert_num_queries):
+        first = client.get(url)
+
+        with django_assert_num_queries(0):
+            second = client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert second['Content-Type'] == first['Content-Type']
+        assert second.get('ETag') == first.get('ETag')
+
+    def test_cdn_headers(self, client, poll, url):
+        response = client.get(url)
+
+        assert 's-maxage=10' in response['Cache-Control']
+        assert 'public' in response['Cache-Control']
+        assert 'Authorization' in response['Vary']
+        assert poll_key(poll.id) in response['Surrogate-Key'].split()
+
+    @pytest.mark.parametrize('url_name', ['poll-detail', 'poll-results'])
+    def test_cached_conditional_request(self, client, poll, url_name):
+        url = reverse(url_name, kwargs={'pk': poll.id})
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_query_params_normalized(self, client, poll,
+                                     django_assert_num_queries):
+        client.get(self.list_url, {'fields': 'id', 'ordering': 'created_at'})
+
+        with django_assert_num_queries(0):
+            client.get(f'{self.list_url}?ordering=created_at&fields=id&page=')
+
+    def test_authenticated_not_cached(self, authenticated_client, url):
+        authenticated_client.get(url)
+
+        response = authenticated_client.get(url)
+
+        assert 'private' in response['Cache-Control']
+        assert 'Surrogate-Key' not in response
+
+    def test_anonymous_not_served_authenticated_copy(
+            self, client, authenticated_client, poll, user):
+        url = reverse('poll-detail', kwargs={'pk': poll.id})
+        Vote.objects.create(poll=poll, user=user, option_index=0)
+        authenticated_client.get(url)
+
+        response = client.get(url)
+
+        assert response.data['has_user_voted'] is False
+
+    def test_vote_purges_poll(self, client, poll, user2, url,
+                              django_capture_on_commit_callbacks):
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Vote.objects.create(poll=poll, user=user2, option_index=1)
+        response = client.get(url)
+
+        if 'count' in response.data:
+            assert response.data['results'][0]['total_votes'] == 1
+        elif 'total_votes' in response.data:
+            assert response.data['total_votes'] == 1
+        else:
+            assert response.data['results'][1]['votes'] == '1'
+
+    def test_new_poll_purges_lists(self, client, poll, user,
+                                   django_capture_on_commit_callbacks):
+        client.get(self.list_url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Poll.objects.create(
+                question="Another poll?",
+                options=["Yes", "No"],
+                owner=user,
+                start_date=poll.start_date,
+                expiry_date=poll.expiry_date
+            )
+        response = client.get(self.list_url)
+
+        assert response.data['count'] == 2
+
+    def test_purge_keeps_other_polls(self, client, poll, anonymous_poll,
+                                     django_assert_num_queries):
+        other_url = reverse('poll-detail', kwargs={'pk': anonymous_poll.id})
+        client.get(reverse('poll-detail', kwargs={'pk': poll.id}))
+        client.get(other_url)
+
+        assert response_cache.purge(poll_key(poll.id)) == 1
+        with django_assert_num_queries(0):
+            client.get(other_url)
+
+    def test_response_rendered_across_purge_not_stored(
+            self, client, poll, url, django_assert_num_queries):
+        """Test a purge landing while a response is being rendered"""
+        get = response_cache.get
+
+        def get_then_purge(request):
+            cached = get(request)
+            response_cache.purge(poll_key(poll.id))
+            return cached
+
+        with patch.object(response_cache, 'get', side_effect=get_then_purge):
+            client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert context.captured_queries
+        # Requests starting after the purge are cached again
+        with django_assert_num_queries(0):
+            client.get(url)
+
+    @pytest.mark.parametrize('url_name', ['poll-detail', 'poll-results'])
+    def test_deleted_poll_purged(self, client, poll, url_name,
+                                 django_capture_on_commit_callbacks):
+        url = reverse(url_name, kwargs={'pk': poll.id})
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poll.delete()
+        response = client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,144 @@
+import math
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
+from polls.models import Poll, PollEvent
+from polls.scheduler import scheduler
+from polls.tasks import advance_poll_statuses, plan_poll_statuses
+
+
+def scheduled_at(poll_id):
+    return get_redis_connection('default').zscore(
+        scheduler.schedule_key, str(poll_id))
+
+
+@pytest.mark.django_db
+class TestPollStatus:
+    """Test the persisted poll status"""
+
+    def test_status_set_on_save(self, poll, future_poll, expired_poll):
+        assert poll.status == Poll.Status.ACTIVE
+        assert future_poll.status == Poll.Status.UPCOMING
+        assert expired_poll.status == Poll.Status.EXPIRED
+
+    def test_status_follows_edited_dates(self, future_poll):
+        future_poll.start_date = timezone.now()
+        future_poll.save(update_fields=['start_date'])
+
+        future_poll.refresh_from_db()
+        assert future_poll.status == Poll.Status.ACTIVE
+
+    def test_status_filter_reads_column(self, client, poll):
+        # Dates say active, the scheduler hasn't run yet
+        Poll.objects.filter(pk=poll.pk).update(status=Poll.Status.UPCOMING)
+
+        response = client.get(reverse('poll-list'), {'status': 'upcoming'})
+
+        assert [item['id'] for item in response.data['results']] == \
+            [str(poll.id)]
+        assert response.data['results'][0]['status'] == 'upcoming'
+
+
+@pytest.mark.django_db
+class TestPollStatusScheduler:
+    """Test the status scheduler"""
+
+    def test_save_schedules_next_boundary(
+            self, poll, future_poll, expired_poll,
+            django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            for instance in (poll, future_poll, expired_poll):
+                instance.save()
+
+        assert scheduled_at(poll.pk) == poll.expiry_date.timestamp()
+        assert scheduled_at(future_poll.pk) == \
+            future_poll.start_date.timestamp()
+        assert scheduled_at(expired_poll.pk) is None
+
+    def test_advance_starts_poll(self, future_poll):
+        scheduler.schedule(future_poll)
+        start = future_poll.start_date + timezone.timedelta(seconds=1)
+
+        assert scheduler.advance(now=start) == 1
+
+        future_poll.refresh_from_db()
+        assert future_poll.status == Poll.Status.ACTIVE
+        assert scheduled_at(future_poll.pk) == \
+            future_poll.expiry_date.timestamp()
+        event = PollEvent.objects.get(group=f'poll_{future_poll.id}')
+        assert event.payload['event_type'] == 'status_changed'
+        assert event.payload['data']['status'] == 'active'
+        assert PollEvent.objects.filter(group='polls_list').exists()
+
+    def test_advance_expires_poll(self, poll):
+        scheduler.schedule(poll)
+        end = poll.expiry_date + timezone.timedelta(seconds=1)
+
+        assert scheduler.advance(now=end) == 1
+
+        poll.refresh_from_db()
+        assert poll.status == Poll.Status.EXPIRED
+        assert scheduled_at(poll.pk) is None
+
+    def test_advance_skips_polls_not_due(self, poll):
+        scheduler.schedule(poll)
+
+        assert scheduler.advance() == 0
+        assert scheduled_at(poll.pk) == poll.expiry_date.timestamp()
+
+    def test_due_poll_claimed_once(self, poll):
+        scheduler.schedule(poll)
+        end = poll.expiry_date + timezone.timedelta(seconds=1)
+
+        assert scheduler.advance(now=end) == 1
+        assert scheduler.advance(now=end) == 0
+
+    def test_due_times_within_interval(self, poll, future_poll):
+        scheduler.schedule(poll)
+        scheduler.schedule(future_poll)
+        now = future_poll.start_date - timezone.timedelta(seconds=10)
+
+        due_times = scheduler.due_times(now=now)
+
+        # The poll expires days later, after the interval
+        assert [eta.timestamp() for eta in due_times] == \
+            [math.ceil(future_poll.start_date.timestamp())]
+
+    def test_plan_queues_status_changes(self, future_poll):
+        scheduler.schedule(future_poll)
+        now = future_poll.start_date - timezone.timedelta(seconds=10)
+
+        with patch('polls.scheduler.timezone.now', return_value=now), \
+                patch.object(advance_poll_statuses, 'apply_async') as queue:
+            plan_poll_statuses()
+
+        _, kwargs = queue.call_args
+        assert kwargs['eta'] >= future_poll.start_date
+        queue.assert_called_once()
+
+    def test_reconcile(self, poll, future_poll):
+        # Missed boundary, and the schedule was lost
+        Poll.objects.filter(pk=poll.pk).update(
+            expiry_date=timezone.now() - timezone.timedelta(minutes=1))
+        get_redis_connection('default').delete(scheduler.schedule_key)
+
+        assert scheduler.reconcile() == 1
+
+        poll.refresh_from_db()
+        assert poll.status == Poll.Status.EXPIRED
+        assert scheduled_at(poll.pk) is None
+        assert scheduled_at(future_poll.pk) == \
+            future_poll.start_date.timestamp()
+
+    def test_delete_unschedules(self, poll,
+                                django_capture_on_commit_callbacks):
+        scheduler.schedule(poll)
+        poll_id = poll.id
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poll.delete()
+
+        assert scheduled_at(poll_id) is None
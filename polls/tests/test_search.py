@@ -0,0 +1,124 @@
+import pytest
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from polls.models import Poll, PollOption
+from users.models import User
+
+
+@pytest.fixture
+def search_polls(user, user2):
+    """Polls matching 'pizza' in the question or only in the options"""
+    def create(question, options, owner):
+        return Poll.objects.create(
+            question=question,
+            options=options,
+            owner=owner,
+            creator=owner,
+            start_date=timezone.now(),
+            expiry_date=timezone.now() + timezone.timedelta(days=1)
+        )
+
+    return {
+        'question': create("Favourite pizza topping?",
+                           ["Cheese", "Ham"], user),
+        'options': create("What should we order tonight?",
+                          ["Pizza", "Sushi"], user2),
+        'other': create("Best programming language?",
+                        ["Python", "Rust"], user),
+    }
+
+
+@pytest.mark.django_db
+class TestPollSearch:
+    """Test full-text search on the poll list"""
+
+    def search(self, client, **params):
+        response = client.get(reverse('poll-list'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return [poll['question'] for poll in response.data['results']]
+
+    def test_search_ranks_question_matches_first(self, client,
+                                                 search_polls):
+        questions = self.search(client, search='pizza')
+
+        assert questions == [
+            search_polls['question'].question,
+            search_polls['options'].question,
+        ]
+
+    def test_search_matches_word_forms(self, client, search_polls):
+        questions = self.search(client, search='toppings')
+
+        assert questions == [search_polls['question'].question]
+
+    def test_search_by_owner_email(self, client, user2, search_polls):
+        questions = self.search(client, search=user2.email)
+
+        assert questions == [search_polls['options'].question]
+
+    def test_explicit_ordering_overrides_rank(self, client, search_polls):
+        questions = self.search(client, search='pizza',
+                                ordering='-created_at')
+
+        assert questions == [
+            search_polls['options'].question,
+            search_polls['question'].question,
+        ]
+
+    def test_search_uses_gin_index(self, search_polls):
+        queryset = Poll.objects.filter(
+            search_vector=SearchQuery('pizza', config='english'))
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+        assert 'poll_search_vector_idx' in plan
+
+
+@pytest.mark.django_db
+class TestTrigramFilters:
+    """Test substring filters and the trigram indexes behind them"""
+
+    def filter(self, client, **params):
+        response = client.get(reverse('poll-list'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return {poll['question'] for poll in response.data['results']}
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_option_contains_substring(self, client, search_polls):
+        questions = self.filter(client, option_contains='USH')
+
+        assert questions == {search_polls['options'].question}
+
+    def test_question_substring(self, client, search_polls):
+        questions = self.filter(client, question='PROGRAM')
+
+        assert questions == {search_polls['other'].question}
+
+    def test_creator_email_substring(self, client, user2, search_polls):
+        questions = self.filter(client, creator_email='TEST2@')
+
+        assert questions == {search_polls['options'].question}
+
+    def test_question_filter_uses_trigram_index(self):
+        plan = self.explain(Poll.objects.filter(question__icontains='izz'))
+
+        assert 'poll_question_trgm_idx' in plan
+
+    def test_option_filter_uses_trigram_index(self):
+        plan = self.explain(PollOption.objects.filter(text__icontains='ush'))
+
+        assert 'polloption_text_trgm_idx' in plan
+
+    def test_email_filter_uses_trigram_index(self):
+        plan = self.explain(User.objects.filter(email__icontains='example'))
+
+        assert 'user_email_trgm_idx' in plan
@@ -0,0 +1,172 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from polls.models import Poll, Vote
+from polls.serializers import PollRowSerializer, PollSerializer
+
+
+@pytest.fixture
+def polls(poll, anonymous_poll, expired_poll, future_poll, user, user2):
+    """Polls in every state, with votes from both users"""
+    inactive = Poll.objects.create(
+        question="Inactive Poll Question?",
+        options=["On", "Off"],
+        owner=user2,
+        creator=user2,
+        is_active=False,
+        start_date=timezone.now() - timezone.timedelta(days=3),
+        expiry_date=timezone.now() - timezone.timedelta(days=2)
+    )
+    Vote.objects.create(poll=poll, user=user, option_index=0)
+    Vote.objects.create(poll=poll, user=user2, option_index=1)
+    Vote.objects.create(poll=anonymous_poll, user=user2, option_index=0)
+    return [poll, anonymous_poll, expired_poll, future_poll, inactive]
+
+
+def get_request(user=None):
+    request = APIRequestFactory().get('/')
+    request.user = user or AnonymousUser()
+    return request
+
+
+@pytest.mark.django_db
+class TestPollRowSerializer:
+    """Test that the row serializer matches PollSerializer"""
+
+    @pytest.mark.parametrize('authenticated', [True, False])
+    def test_matches_poll_serializer(self, polls, user, authenticated):
+        request = get_request(user if authenticated else None)
+        queryset = Poll.objects.all()
+
+        serializer = PollRowSerializer(request)
+        rows = serializer.serialize(serializer.get_queryset(queryset))
+        expected = PollSerializer(
+            queryset, many=True, context={'request': request}).data
+
+        assert rows == expected
+        assert [list(row) for row in rows] == \
+            [list(poll) for poll in expected]
+
+    def test_without_request(self, polls):
+        serializer = PollRowSerializer()
+
+        rows = serializer.serialize(
+            serializer.get_queryset(Poll.objects.all()))
+
+        assert rows == PollSerializer(Poll.objects.all(), many=True).data
+
+    def test_single_query(self, polls, user, django_assert_num_queries):
+        serializer = PollRowSerializer(get_request(user))
+
+        with django_assert_num_queries(1):
+            serializer.serialize(serializer.get_queryset(Poll.objects.all()))
+
+    def test_list_endpoint(self, authenticated_client, polls, user):
+        response = authenticated_client.get(reverse('poll-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        expected = PollSerializer(
+            Poll.objects.all(), many=True,
+            context={'request': get_request(user)}).data
+        assert response.data['results'] == expected
+
+    def test_my_polls_endpoint(self, authenticated_client, polls, user):
+        response = authenticated_client.get(reverse('poll-my-polls'))
+
+        assert response.status_code == status.HTTP_200_OK
+        expected = PollSerializer(
+            Poll.objects.filter(owner=user), many=True,
+            context={'request': get_request(user)}).data
+        assert response.data['results'] == expected
+
+    def test_list_query_count(self, client, polls,
+                              django_assert_num_queries):
+        # Count and page, however many polls are on the page
+        with django_assert_num_queries(2):
+            response = client.get(reverse('poll-list'))
+
+        assert response.data['count'] == len(polls)
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """Test the fields, exclude and expand query parameters"""
+
+    list_url = reverse('poll-list')
+
+    @pytest.mark.parametrize('url_name', ['poll-list', 'poll-active'])
+    def test_fields(self, client, poll, url_name):
+        response = client.get(reverse(url_name),
+                              {'fields': 'question,id'})
+
+        assert response.status_code == status.HTTP_200_OK
+        # Fields keep the serializer's order
+        assert response.data['results'] == [
+            {'id': str(poll.id), 'question': poll.question}]
+
+    @pytest.mark.parametrize('url_name', ['poll-list', 'poll-active'])
+    def test_exclude(self, authenticated_client, poll, url_name):
+        response = authenticated_client.get(
+            reverse(url_name), {'exclude': 'total_votes,has_user_voted'})
+
+        expected = {
+            key: value for key, value in PollSerializer(poll).data.items()
+            if key not in ('total_votes', 'has_user_voted')
+        }
+        assert response.data['results'] == [expected]
+
+    @pytest.mark.parametrize('url_name', ['poll-list', 'poll-active'])
+    def test_expand_results(self, client, poll_with_votes, url_name):
+        response = client.get(reverse(url_name),
+                              {'fields': 'id', 'expand': 'results'})
+
+        assert response.data['results'] == [{
+            'id': str(poll_with_votes.id),
+            'results': poll_with_votes.get_results(),
+        }]
+
+    def test_retrieve(self, client, poll_with_votes):
+        url = reverse('poll-detail', kwargs={'pk': poll_with_votes.id})
+
+        response = client.get(url, {'fields': 'question',
+                                    'expand': 'results'})
+
+        assert response.data == {
+            'question': poll_with_votes.question,
+            'results': poll_with_votes.get_results(),
+        }
+
+    @pytest.mark.parametrize('params', [
+        {'fields': 'question,secret'},
+        {'exclude': 'owner'},
+        {'expand': 'votes'},
+    ])
+    def test_unknown_field(self, client, poll, params):
+        response = client.get(self.list_url, params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(response.data) == list(params)
+
+    def test_annotations_pruned(self):
+        serializer = PollRowSerializer(fields=['id', 'question', 'status'])
+
+        queryset = serializer.get_queryset(Poll.objects.all())
+
+        sql = str(queryset.query)
+        assert 'polls_vote' not in sql
+        assert 'users_user' not in sql
+        assert set(queryset.query.values_select) == {
+            'id', 'question', 'is_active', 'status'}
+
+    def test_expand_results_single_query(self, client, polls,
+                                         django_assert_num_queries):
+        # Count, page and one tally for the whole page
+        with django_assert_num_queries(3):
+            response = client.get(self.list_url, {'expand': 'results'})
+
+        for item in response.data['results']:
+            poll = Poll.objects.get(pk=item['id'])
+            assert item['results'] == poll.get_results()
@@ -0,0 +1,110 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import PollEvent, PollResultSnapshot, Vote
+from polls.tasks import finalize_expired_polls
+
+
+@pytest.fixture
+def expired_poll_with_votes(expired_poll, user, user2):
+    Vote.objects.create(poll=expired_poll, user=user, option_index=0)
+    Vote.objects.create(poll=expired_poll, user=user2, option_index=0)
+    return expired_poll
+
+
+@pytest.mark.django_db
+class TestFinalizeExpiredPolls:
+    """Test that expired polls get an immutable results snapshot"""
+
+    def test_snapshot_created(self, expired_poll_with_votes, poll):
+        result = finalize_expired_polls()
+
+        assert result == "Finalized results of 1 polls"
+        snapshot = PollResultSnapshot.objects.get()
+        assert snapshot.poll == expired_poll_with_votes
+        assert snapshot.total_votes == 2
+        assert snapshot.results == [
+            {'option': 'Choice A', 'votes': 2, 'percentage': 100.0},
+            {'option': 'Choice B', 'votes': 0, 'percentage': 0},
+        ]
+
+    def test_waits_for_votes_in_flight(self, poll):
+        poll.expiry_date = timezone.now() - timezone.timedelta(seconds=1)
+        poll.save()
+
+        assert finalize_expired_polls() == "Finalized results of 0 polls"
+
+    def test_finalized_once(self, expired_poll_with_votes):
+        finalize_expired_polls()
+
+        assert finalize_expired_polls() == "Finalized results of 0 polls"
+        assert PollResultSnapshot.objects.count() == 1
+
+    def test_snapshot_is_immutable(self, expired_poll_with_votes):
+        finalize_expired_polls()
+        snapshot = PollResultSnapshot.objects.get()
+
+        snapshot.total_votes = 10
+        with pytest.raises(PermissionError):
+            snapshot.save()
+
+    def test_closing_event_recorded(self, expired_poll_with_votes):
+        finalize_expired_polls()
+
+        event = PollEvent.objects.get(
+            poll_id=expired_poll_with_votes.id,
+            payload__event_type='poll_closed')
+        assert event.group == f'poll_{expired_poll_with_votes.id}'
+        assert event.payload['data']['total_votes'] == 2
+
+
+@pytest.mark.django_db
+class TestFinalResultsReadPath:
+    """Test that finalized polls are served from their snapshot"""
+
+    @pytest.fixture
+    def finalized_poll(self, expired_poll_with_votes):
+        finalize_expired_polls()
+        return expired_poll_with_votes
+
+    def test_get_results_reads_snapshot(self, finalized_poll,
+                                        django_assert_num_queries):
+        with django_assert_num_queries(1):
+            results = finalized_poll.get_results()
+
+        assert results[0]['votes'] == 2
+
+    def test_results_endpoint_immutable(self, authenticated_client,
+                                        finalized_poll):
+        url = reverse('poll-results', kwargs={'pk': finalized_poll.id})
+
+        response = authenticated_client.get(url)
+
+        assert response.data['results'][0]['votes'] == '2'
+        cache_control = response['Cache-Control']
+        assert 'immutable' in cache_control
+        assert 'public' in cache_control
+        assert 'private' not in cache_control
+
+    def test_live_results_not_immutable(self, authenticated_client, poll):
+        url = reverse('poll-results', kwargs={'pk': poll.id})
+
+        response = authenticated_client.get(url)
+
+        assert 'immutable' not in response['Cache-Control']
+
+    def test_list_reads_snapshot(self, client, finalized_poll):
+        PollResultSnapshot.objects.filter(poll=finalized_poll).delete()
+        PollResultSnapshot.objects.create(
+            poll=finalized_poll, total_votes=5,
+            results=[{'option': 'Choice A', 'votes': 5, 'percentage': 100.0}])
+
+        response = client.get(reverse('poll-list'), {
+            'fields': 'id,total_votes', 'expand': 'results'})
+
+        assert response.data['results'] == [{
+            'id': str(finalized_poll.id),
+            'total_votes': 5,
+            'results': [
+                {'option': 'Choice A', 'votes': 5, 'percentage': 100.0}],
+        }]
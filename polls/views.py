@@ -1,7 +1,10 @@
 
 # polls/views.py
 from django.views.decorators.http import require_GET
-from .filters import PollFilter
+from .conditional import not_modified, poll_validators, set_validators
+from .feed import active_feed
+from .response_cache import POLLS, cache_anonymous, poll_key
+from .filters import PollFilter, PollOrderingFilter, PollSearchFilter
 from .permissions import (
     # IsOwnerOrReadOnly,
     CanVote,
@@ -13,20 +16,24 @@ from .permissions import (
 )
 from .serializers import (
     PollSerializer,
+    PollRowSerializer,
     VoteSerializer,
     PollResultsSerializer,
     PollCreateSerializer,
-    UserVoteSerializer
+    UserVoteSerializer,
+    parse_fieldset
 )
 from rest_framework import viewsets, status, mixins
-from rest_framework import filters as rest_filters
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
 from django.core.exceptions import ValidationError
-from django.http import JsonResponse
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 
 from django_filters.rest_framework import DjangoFilterBackend
@@ -34,11 +41,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-# realtime updates
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-
-from .models import Poll, Vote
+from .models import ArchivedPoll, Poll, Vote
 
 
 import logging
@@ -46,6 +49,36 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Sparse fieldsets, see polls.serializers.parse_fieldset
+FIELDSET_PARAMETERS = [
+    openapi.Parameter(
+        'fields',
+        openapi.IN_QUERY,
+        description="Comma separated fields to include",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'exclude',
+        openapi.IN_QUERY,
+        description="Comma separated fields to leave out",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'expand',
+        openapi.IN_QUERY,
+        description="Embed related data (results)",
+        type=openapi.TYPE_STRING
+    ),
+]
+
+
+# Results of a finalized poll never change
+FINAL_RESULTS_MAX_AGE = 60 * 60 * 24 * 365
+
+
+@method_decorator(name='retrieve', decorator=swagger_auto_schema(
+    manual_parameters=FIELDSET_PARAMETERS
+))
 @method_decorator(name='destroy', decorator=swagger_auto_schema(
     operation_description="Delete a poll"
 ))
@@ -56,11 +89,10 @@ class PollViewSet(viewsets.ModelViewSet):
     queryset = Poll.objects.all()
     filter_backends = [
         DjangoFilterBackend,
-        rest_filters.SearchFilter,
-        rest_filters.OrderingFilter
+        PollSearchFilter,
+        PollOrderingFilter
     ]
     filterset_class = PollFilter
-    search_fields = ['question', 'owner__email']
     ordering_fields = ['created_at', 'updated_at', 'start_date', 'expiry_date']
     ordering = ['-created_at']
 
@@ -98,6 +130,36 @@ class PollViewSet(viewsets.ModelViewSet):
         '''Partial update of a poll'''
         return super().partial_update(request, *args, **kwargs)
 
+    @cache_anonymous
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Get a poll. Answers conditional requests with 304 Not Modified
+        before serializing.
+        """
+        poll = self.get_object()
+        self.surrogate_keys = [poll_key(poll.pk)]
+        etag, last_modified = poll_validators(request, poll)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(poll).data)
+        return set_validators(response, etag, last_modified)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'results':
+            # Final results are read along with the poll
+            queryset = queryset.select_related('result_snapshot')
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'retrieve':
+            kwargs['fields'], kwargs['expand'] = self.get_fieldset()
+        return super().get_serializer(*args, **kwargs)
+
+    def get_fieldset(self):
+        """Fields and expansions requested in the query string"""
+        return parse_fieldset(self.request.query_params)
+
     def get_serializer_class(self):
         if self.action == 'create':
             return PollCreateSerializer
@@ -126,40 +188,19 @@ class PollViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    # Writes run in a transaction so the outbox events recorded by
+    # polls.signals commit (or roll back) together with the change
+    @transaction.atomic
     def perform_create(self, serializer):
-        instance = serializer.save()
-        # Trigger real-time notification
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            'polls_list',
-            {
-                'type': 'poll_created',
-                'data': {
-                    'id': str(instance.id),
-                    'question': instance.question,
-                    'created_at': instance.created_at.isoformat(),
-                    'owner_email': instance.owner.email
-                }
-            }
-        )
+        serializer.save()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        """Override to trigger real-time updates"""
-        poll_id = str(instance.id)
-        super().perform_destroy(instance)
-
-        # Trigger real-time notification
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            'polls_list',
-            {
-                'type': 'poll_deleted',
-                'data': {
-                    'id': poll_id,
-                    'timestamp': timezone.now().isoformat()
-                }
-            }
-        )
+        instance.delete()
 
     @swagger_auto_schema(
         operation_description=("Retrieve a list of polls"
@@ -198,10 +239,24 @@ class PollViewSet(viewsets.ModelViewSet):
                 type=openapi.TYPE_STRING,
                 format=openapi.FORMAT_DATETIME
             ),
+            *FIELDSET_PARAMETERS,
         ]
     )
+    @cache_anonymous
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.list_rows(queryset)
+
+    def list_rows(self, queryset):
+        """Paginated response for a poll list, read as annotated rows"""
+        fields, expand = self.get_fieldset()
+        serializer = PollRowSerializer(self.request, fields, expand)
+        page = self.paginate_queryset(serializer.get_queryset(queryset))
+        if page is None:
+            page = serializer.get_queryset(queryset)
+            return Response(serializer.serialize(page))
+        self.surrogate_keys = [POLLS, *(poll_key(row['id']) for row in page)]
+        return self.get_paginated_response(serializer.serialize(page))
 
     @swagger_auto_schema(
         operation_description="Cast a vote on a specific poll",
@@ -234,24 +289,10 @@ class PollViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             print("Serializer  VALID")
-            vote = serializer.save()
-
-            # Trigger real-time updates via signal (already handled)
-            # Additional real-time notification if needed
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f'poll_{poll.id}',
-                {
-                    'type': 'poll_update',
-                    'data': {
-                        'type': 'vote_cast',
-                        'poll_id': str(poll.id),
-                        'results': poll.get_results(),
-                        'total_votes': poll.votes.count(),
-                        'timestamp': vote.created_at.isoformat()
-                    }
-                }
-            )
+            with transaction.atomic():
+                serializer.save()
+            # Real-time updates are recorded by the post_save signal
+            # and broadcast once the vote is committed
 
             return Response(
                 {'message': 'Vote recorded successfully'},
@@ -261,30 +302,52 @@ class PollViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['get'])
+    @cache_anonymous
     def results(self, request, pk=None):
         """
-        Get real-time results for a specific poll
+        Get real-time results for a specific poll, or the final results
+        once it has expired or been archived. Answers conditional requests
+        with 304 Not Modified before counting votes.
         """
-        poll = self.get_object()
-        results = poll.get_results()
-        serializer = self.get_serializer({'results': results})
-        return Response(serializer.data)
+        try:
+            poll = self.get_object()
+        except Http404:
+            return self.archived_results(pk)
+        self.surrogate_keys = [poll_key(poll.pk)]
+        etag, last_modified = poll_validators(request, poll)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            results = poll.get_results()
+            serializer = self.get_serializer({'results': results})
+            response = Response(serializer.data)
+        if poll.final_results is not None:
+            patch_cache_control(response, public=True, immutable=True,
+                                max_age=FINAL_RESULTS_MAX_AGE)
+        return set_validators(response, etag, last_modified)
+
+    def archived_results(self, pk):
+        """Final results of a poll moved to the archive"""
+        archived = get_object_or_404(ArchivedPoll, pk=pk)
+        self.surrogate_keys = [poll_key(archived.pk)]
+        serializer = self.get_serializer({'results': archived.results})
+        response = Response(serializer.data)
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=FINAL_RESULTS_MAX_AGE)
+        return response
 
+    @swagger_auto_schema(manual_parameters=FIELDSET_PARAMETERS)
     @action(detail=False, methods=['get'])
     def active(self, request):
         """
         Get all active polls (current time between start and expiry dates).
+        Served from the cached active poll feed.
         """
-        now = timezone.now()
-        active_polls = Poll.objects.filter(
-            start_date__lte=now,
-            expiry_date__gte=now,
-            is_active=True
-        )
-        page = self.paginate_queryset(active_polls)
-        serializer = self.get_serializer(page, many=True)
-        return self.get_paginated_response(serializer.data)
+        fields, expand = self.get_fieldset()
+        page_ids = self.paginate_queryset(active_feed.get_ids())
+        rows = active_feed.get_rows(page_ids, request, fields, expand)
+        return self.get_paginated_response(rows)
 
+    @swagger_auto_schema(manual_parameters=FIELDSET_PARAMETERS)
     @action(detail=False, methods=['get'])
     def my_polls(self, request):
         """
@@ -293,9 +356,7 @@ class PollViewSet(viewsets.ModelViewSet):
         user_polls = Poll.objects.filter(
             owner=self.request.user
         )
-        page = self.paginate_queryset(user_polls)
-        serializer = self.get_serializer(page, many=True)
-        return self.get_paginated_response(serializer.data)
+        return self.list_rows(user_polls)
 
 
 class VoteViewSet(mixins.ListModelMixin,
@@ -315,14 +376,19 @@ class VoteViewSet(mixins.ListModelMixin,
         if getattr(self, 'swagger_fake_view', False):
             return Vote.objects.none()
 
+        # The question and option text, without the rest of the poll
+        votes = Vote.objects.select_related('poll', 'option').only(
+            'id', 'option_index', 'created_at', 'poll__question',
+            'option__text')
+
         # Allow admins to see all votes
         if self.request.user.is_staff:
-            return Vote.objects.all()
+            return votes
 
         # Handle both authenticated and unauthenticated users
         if hasattr(self.request.user, 'is_authenticated') \
                 and self.request.user.is_authenticated:
-            return Vote.objects.filter(user=self.request.user)
+            return votes.filter(user=self.request.user)
         return Vote.objects.none()
 
     @swagger_auto_schema(
@@ -349,7 +415,7 @@ class VoteViewSet(mixins.ListModelMixin,
             )
 
         try:
-            votes = Vote.objects.filter(
+            votes = self.get_queryset().filter(
                 user=request.user,
                 poll_id=poll_id
             )
@@ -411,10 +477,11 @@ def export_results(self, request, pk=None):
 
 
 @require_GET
-def health_check(request):
+async def health_check(request):
     """
     Simple health check endpoint for Render.com monitoring
     Returns 200 if application is healthy
+    Runs on the event loop under ASGI, without a thread hop.
     """
     return JsonResponse({
         "status": "healthy",
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:54
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
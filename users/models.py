@@ -1,9 +1,11 @@
 # users/models.py
 from django.contrib.auth.models import (UserManager, AbstractUser,
                                         Group, Permission)
-import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
+from utils.ids import uuid7
 
 
 class CustomerUserManager(UserManager):
@@ -56,7 +58,7 @@ class User(AbstractUser):
      AbstractUser with UUID primary key."""
     objects = CustomerUserManager()
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -84,6 +86,13 @@ class User(AbstractUser):
         related_query_name='user',
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Serves case-insensitive substring filters on email
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'),
+                     name='user_email_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
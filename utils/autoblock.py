@@ -0,0 +1,187 @@
+# utils/autoblock.py
+import ipaddress
+import logging
+import os
+import socket
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from polls.models import BlockedIP
+from utils.blocklist import blocklist, notify_blocklist_changed
+
+logger = logging.getLogger(__name__)
+
+SUSPICIOUS_STREAM = 'suspicious:events'
+AUTOBLOCK_GROUP = 'autoblock'
+
+# Event kinds: a throttled client is blocked right away, suspicious
+# responses are counted and block once they pass the threshold
+THROTTLED = 'throttled'
+SUSPICIOUS_RESPONSE = 'response'
+
+AUTOBLOCK_REASON = "Automatically blocked due to excessive suspicious requests"
+
+
+def report_suspicious(ip_address, kind):
+    """
+    Queue a suspicious event for the autoblock worker.
+    Costs a single XADD, so the request never waits on the database.
+    """
+    try:
+        get_redis_connection('default').xadd(
+            SUSPICIOUS_STREAM,
+            {'ip': ip_address, 'kind': kind},
+            maxlen=getattr(settings, 'AUTOBLOCK_STREAM_MAXLEN', 100000),
+            approximate=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not report suspicious IP {ip_address}: {e}")
+
+
+class SuspiciousEventAggregator:
+    """
+    Consumes the suspicious event stream in batches.
+    Counts per IP and window are kept in Redis so that several workers
+    share them; IPs that cross the threshold are blocked with one insert
+    per batch and every worker is told to reload its blocklist.
+    """
+
+    def __init__(self, threshold=20, window=300, batch_size=500,
+                 consumer=None, claim_idle=60):
+        self.threshold = threshold
+        self.window = window
+        self.batch_size = batch_size
+        self.claim_idle = claim_idle
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    @property
+    def client(self):
+        return get_redis_connection('default')
+
+    def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(
+                SUSPICIOUS_STREAM, AUTOBLOCK_GROUP, id='0', mkstream=True)
+        except Exception as e:
+            # BUSYGROUP: created by another worker
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def read(self, start):
+        response = self.client.xreadgroup(
+            AUTOBLOCK_GROUP, self.consumer, {SUSPICIOUS_STREAM: start},
+            count=self.batch_size
+        )
+        return response[0][1] if response else []
+
+    def process_batch(self, start='>'):
+        """
+        Aggregate and act on one batch of events.
+        Events are acknowledged only after their blocks are saved.
+        Returns the number of events processed.
+        """
+        self.ensure_group()
+        entries = self.read(start)
+        if not entries:
+            return 0
+
+        blocked, counts = set(), {}
+        for _, fields in entries:
+            # Entries trimmed from the stream while pending have no fields
+            fields = fields or {}
+            ip_address = fields.get(b'ip', b'').decode()
+            kind = fields.get(b'kind', b'').decode()
+            if kind == THROTTLED:
+                blocked.add(ip_address)
+            elif kind == SUSPICIOUS_RESPONSE:
+                counts[ip_address] = counts.get(ip_address, 0) + 1
+
+        blocked.update(self.count_responses(counts))
+        self.block(blocked)
+
+        self.client.xack(SUSPICIOUS_STREAM, AUTOBLOCK_GROUP,
+                         *[entry_id for entry_id, _ in entries])
+        return len(entries)
+
+    def claim_stale(self):
+        """Take over events left pending by a worker that went away"""
+        self.ensure_group()
+        self.client.xautoclaim(
+            SUSPICIOUS_STREAM, AUTOBLOCK_GROUP, self.consumer,
+            min_idle_time=int(self.claim_idle * 1000), justid=True
+        )
+
+    def process_pending(self):
+        """Retry events left unacknowledged, then drain the stream"""
+        self.claim_stale()
+        processed = 0
+        while True:
+            count = self.process_batch(start='0')
+            processed += count
+            if count == 0:
+                break
+        while True:
+            count = self.process_batch()
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    def count_responses(self, counts):
+        """Add a batch's counts to the shared windows, return IPs over"""
+        if not counts:
+            return []
+
+        index = self.client.time()[0] // self.window
+        pipe = self.client.pipeline(transaction=False)
+        for ip_address, count in counts.items():
+            key = f"autoblock:{ip_address}:{index}"
+            pipe.incrby(key, count)
+            pipe.expire(key, self.window)
+        totals = pipe.execute()[::2]
+
+        return [ip_address
+                for ip_address, total in zip(counts, totals)
+                if total >= self.threshold]
+
+    def block(self, ip_addresses):
+        """Block every valid address that is not blocked yet"""
+        candidates = set()
+        for ip_address in ip_addresses:
+            try:
+                ip_address = str(ipaddress.ip_address(ip_address))
+            except ValueError:
+                logger.warning(f"Ignoring invalid suspicious IP: {ip_address}")
+                continue
+            if not blocklist.is_blocked(ip_address):
+                candidates.add(ip_address)
+        if not candidates:
+            return []
+
+        existing = set(BlockedIP.objects.filter(
+            ip_address__in=candidates).values_list('ip_address', flat=True))
+        new = sorted(candidates - existing)
+        if not new:
+            return []
+
+        BlockedIP.objects.bulk_create(
+            [BlockedIP(ip_address=ip_address, reason=AUTOBLOCK_REASON)
+             for ip_address in new],
+            ignore_conflicts=True
+        )
+        # bulk_create skips post_save, so publish the change here
+        notify_blocklist_changed()
+        for ip_address in new:
+            logger.warning(
+                f"Automatically blocked suspicious IP: {ip_address}")
+        return new
+
+
+aggregator = SuspiciousEventAggregator(
+    threshold=getattr(settings, 'AUTOBLOCK_THRESHOLD', 20),
+    window=getattr(settings, 'AUTOBLOCK_WINDOW', 300),
+    batch_size=getattr(settings, 'AUTOBLOCK_BATCH_SIZE', 500)
+)
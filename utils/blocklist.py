@@ -0,0 +1,204 @@
+# utils/blocklist.py
+import ipaddress
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from polls.models import BlockedIP
+
+logger = logging.getLogger(__name__)
+
+BLOCKLIST_CHANNEL = 'blocklist:changes'
+
+
+class PrefixTrie:
+    """
+    Binary trie over address bits.
+    A node flagged as terminal marks a blocked network, so a lookup walks
+    at most one node per bit of the address.
+    """
+    TERMINAL = 'end'
+
+    def __init__(self, max_prefixlen):
+        self.max_prefixlen = max_prefixlen
+        self.root = {}
+
+    def __bool__(self):
+        return bool(self.root)
+
+    def insert(self, network):
+        node = self.root
+        bits = int(network.network_address)
+        for position in range(network.prefixlen):
+            bit = (bits >> (self.max_prefixlen - 1 - position)) & 1
+            node = node.setdefault(bit, {})
+        node[self.TERMINAL] = True
+
+    def contains(self, address):
+        node = self.root
+        bits = int(address)
+        for position in range(self.max_prefixlen):
+            if self.TERMINAL in node:
+                return True
+            bit = (bits >> (self.max_prefixlen - 1 - position)) & 1
+            node = node.get(bit)
+            if node is None:
+                return False
+        return self.TERMINAL in node
+
+
+class Blocklist:
+    """
+    Per-process copy of the active BlockedIP rows.
+    Single addresses live in a hash set and CIDR ranges in a prefix trie
+    per IP version. The copy is loaded on first use and reloaded after it
+    is invalidated, either locally or through Redis pub/sub.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._addresses = frozenset()
+        self._tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self._loaded_at = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self):
+        return (self._loaded_at is None or
+                time.monotonic() - self._loaded_at > self.max_age)
+
+    def load(self):
+        """Rebuild the lookup structures from the database"""
+        generation = self._generation
+        addresses = set()
+        tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        rows = BlockedIP.objects.filter(is_active=True).values_list(
+            'ip_address', 'prefix_length')
+
+        for ip_address, prefix_length in rows:
+            if prefix_length is None:
+                addresses.add(ip_address)
+                continue
+            try:
+                network = ipaddress.ip_network(
+                    f"{ip_address}/{prefix_length}", strict=False)
+            except ValueError:
+                logger.warning(
+                    f"Ignoring invalid blocked network: "
+                    f"{ip_address}/{prefix_length}")
+                continue
+            tries[network.version].insert(network)
+
+        # Swap in the new structures in one step for concurrent readers
+        self._addresses, self._tries = frozenset(addresses), tries
+        # An invalidation during the query means the rows may be outdated
+        if generation == self._generation:
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.is_stale:
+            with self._lock:
+                if self.is_stale:
+                    self.load()
+
+    def invalidate(self):
+        """Force a reload on the next lookup"""
+        self._generation += 1
+        self._loaded_at = None
+
+    def is_blocked(self, ip_address):
+        self.ensure_loaded()
+        return self.contains(ip_address)
+
+    async def ais_blocked(self, ip_address):
+        # Only a (re)load needs the database, everything else stays
+        # on the event loop
+        if self.is_stale:
+            await sync_to_async(self.ensure_loaded)()
+        return self.contains(ip_address)
+
+    def contains(self, ip_address):
+        """Look up an address in the currently loaded copy"""
+        if ip_address in self._addresses:
+            return True
+
+        tries = self._tries
+        if not (tries[4] or tries[6]):
+            return False
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        if str(address) in self._addresses:
+            return True
+        return tries[address.version].contains(address)
+
+
+class BlocklistListener:
+    """
+    Background thread that invalidates the local blocklist whenever
+    another process publishes a change on the blocklist channel.
+    """
+
+    def __init__(self, blocklist, retry_delay=5.0):
+        self.blocklist = blocklist
+        self.retry_delay = retry_delay
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='blocklist-listener',
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = get_redis_connection('default').pubsub()
+                pubsub.subscribe(BLOCKLIST_CHANNEL)
+                # Changes may have been missed while disconnected
+                self.blocklist.invalidate()
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self.blocklist.invalidate()
+            except Exception as e:
+                logger.warning(f"Blocklist listener disconnected: {e}")
+                time.sleep(self.retry_delay)
+
+
+blocklist = Blocklist(max_age=getattr(settings, 'BLOCKLIST_MAX_AGE', 300))
+listener = BlocklistListener(blocklist)
+
+
+def start_blocklist_listener():
+    if getattr(settings, 'BLOCKLIST_SUBSCRIBE', True):
+        listener.start()
+
+
+def publish_blocklist_change():
+    """Tell every worker to reload its blocklist"""
+    try:
+        get_redis_connection('default').publish(BLOCKLIST_CHANNEL, 'reload')
+    except Exception as e:
+        logger.warning(f"Could not publish blocklist change: {e}")
+
+
+def notify_blocklist_changed():
+    """
+    Invalidate the local blocklist now and the other workers' copies
+    once the current transaction commits.
+    """
+    blocklist.invalidate()
+    transaction.on_commit(publish_blocklist_change)
@@ -1,59 +1,133 @@
 # utils/middleware.py
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
 from django.http import HttpResponseForbidden
-from polls.models import BlockedIP
+from utils.autoblock import SUSPICIOUS_RESPONSE, report_suspicious
+from utils.blocklist import blocklist, start_blocklist_listener
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class BlockedIPMiddleware(MiddlewareMixin):
+def get_client_ip(request):
+    """
+    Extract the client IP address from the request, handling proxies.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively in both WSGI and ASGI mode.
+    Unlike MiddlewareMixin, the async path does not push every request
+    through a sync_to_async thread hop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
+
+    def process_request(self, request):
+        return None
+
+    async def aprocess_request(self, request):
+        return None
+
+    def process_response(self, request, response):
+        return response
+
+    async def aprocess_response(self, request, response):
+        return response
+
+    def get_client_ip(self, request):
+        return get_client_ip(request)
+
+
+class BlockedIPMiddleware(HybridMiddleware):
     """
     Middleware to block requests from IP addresses in the blocked list.
     Logs suspicious activity for further analysis.
+    Lookups use the in-memory blocklist, so no query runs per request.
     """
 
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        start_blocklist_listener()
+
     def process_request(self, request):
         ip_address = self.get_client_ip(request)
 
         if ip_address:
             # Check if IP is blocked
-            if BlockedIP.objects.filter(
-                ip_address=ip_address,
-                is_active=True
-            ).exists():
-                logger.warning(
-                    f"Blocked request from blocked IP: {ip_address}")
-                return HttpResponseForbidden(
-                    "Your IP address has been blocked"
-                    "due to suspicious activity."
-                )
+            if blocklist.is_blocked(ip_address):
+                return self.blocked_response(ip_address)
 
         return None
 
-    def get_client_ip(self, request):
-        """
-        Extract the client IP address from the request, handling proxies.
-        """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-
-
-class SuspiciousRequestMiddleware(MiddlewareMixin):
+    async def aprocess_request(self, request):
+        ip_address = self.get_client_ip(request)
+
+        if ip_address:
+            if await blocklist.ais_blocked(ip_address):
+                return self.blocked_response(ip_address)
+
+        return None
+
+    def blocked_response(self, ip_address):
+        logger.warning(
+            f"Blocked request from blocked IP: {ip_address}")
+        return HttpResponseForbidden(
+            "Your IP address has been blocked"
+            "due to suspicious activity."
+        )
+
+
+class SuspiciousRequestMiddleware(HybridMiddleware):
     """
     Middleware to detect and log suspicious request patterns.
-    Integrates with throttling system to identify potential abuse.
+    Integrates with throttling system to identify potential abuse:
+    denied requests are reported to the autoblock pipeline, which
+    blocks IPs that produce too many of them.
+
+    The other suspicious responses are only logged. Validation errors
+    and expired tokens (400, 401) are what ordinary clients get, and
+    would ban busy shared addresses; 429s are already reported by the
+    throttle.
     """
 
-    def process_response(self, request, response):
+    suspicious_status_codes = frozenset([400, 401, 403, 429])
+    reported_status_codes = frozenset([403])
+
+    def is_suspicious(self, request, response):
         # Monitor for certain status codes and endpoints
         # that indicate suspicious activity
-        if (response.status_code in [400, 401, 403, 429] and
-                request.path.startswith('/api/')):
+        return (response.status_code in self.suspicious_status_codes and
+                request.path.startswith('/api/'))
+
+    def process_response(self, request, response):
+        if self.is_suspicious(request, response):
 
             ip_address = self.get_client_ip(request)
             user = getattr(request, 'user', None)
@@ -66,16 +140,15 @@ class SuspiciousRequestMiddleware(MiddlewareMixin):
                     f"Path={request.path}, "
                     f"Status={response.status_code}"
                 )
-
-                # You could add logic here to automatically block IPs after
-                # too many suspicious requests (e.g., using django-ratelimit)
+                if response.status_code in self.reported_status_codes:
+                    report_suspicious(ip_address, SUSPICIOUS_RESPONSE)
 
         return response
 
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+    async def aprocess_response(self, request, response):
+        # Only suspicious responses leave the event loop: resolving a
+        # lazy request.user may query the session store
+        if self.is_suspicious(request, response):
+            return await sync_to_async(self.process_response)(
+                request, response)
+        return response
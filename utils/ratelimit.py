@@ -0,0 +1,221 @@
+# utils/ratelimit.py
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django_redis import get_redis_connection
+
+# Sliding window counter: one counter per fixed window, with the previous
+# window's count weighted by how much of it still overlaps the sliding
+# window. Several limits are checked and counted atomically in a single
+# round-trip; each limit only counts the request if it allows it.
+#
+# KEYS[2i-1]: current window counter, KEYS[2i]: previous window counter
+# ARGV[1]: now (s), ARGV[2i]: limit, ARGV[2i+1]: window length (s)
+# Returns {allowed, wait in milliseconds} for every limit, flattened
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local results = {}
+
+for i = 1, #KEYS / 2 do
+    local limit = tonumber(ARGV[2 * i])
+    local window = tonumber(ARGV[2 * i + 1])
+    local window_start = math.floor(now / window) * window
+    local elapsed = (now - window_start) / window
+
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+
+    if previous * (1 - elapsed) + current < limit then
+        redis.call('INCR', KEYS[2 * i - 1])
+        redis.call('EXPIRE', KEYS[2 * i - 1], math.ceil(window * 2))
+        results[#results + 1] = 1
+        results[#results + 1] = 0
+    else
+        local wait
+        if current >= limit then
+            wait = window_start + window - now
+                + window * (1 - limit / current)
+        else
+            wait = window * (1 - (limit - current) / previous)
+                - (now - window_start)
+        end
+        results[#results + 1] = 0
+        results[#results + 1] = math.ceil(wait * 1000)
+    end
+end
+
+return results
+"""
+
+
+def window_keys(key, duration, now):
+    index = int(now // duration)
+    return f"{key}:{index}", f"{key}:{index - 1}"
+
+
+def sliding_window_wait(current, previous, limit, duration, now):
+    """Seconds until a denied request would be allowed again"""
+    window_start = (now // duration) * duration
+    if current >= limit:
+        return (window_start + duration - now +
+                duration * (1 - limit / current))
+    return (duration * (1 - (limit - current) / previous) -
+            (now - window_start))
+
+
+class SlidingWindowCounter:
+    """
+    Constant-memory rate limiter shared by all workers.
+    Uses a Lua script when the cache is Redis; other cache backends fall
+    back to the same algorithm built from plain cache operations, which
+    is not atomic across workers.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or default_cache
+        self._client = None
+        self._script = None
+
+    def get_script(self):
+        if self._script is None:
+            try:
+                self._client = get_redis_connection('default')
+            except NotImplementedError:
+                return None
+            self._script = self._client.register_script(
+                SLIDING_WINDOW_SCRIPT)
+        return self._script
+
+    def hit(self, key, limit, duration, now):
+        """
+        Count a request against key if it is within limit requests per
+        duration seconds. Returns (allowed, wait in seconds).
+        """
+        return self.hit_many([(key, limit, duration)], now)[0]
+
+    def hit_many(self, limits, now):
+        """
+        Evaluate several (key, limit, duration) limits in one round-trip.
+        Returns an (allowed, wait in seconds) pair per limit.
+        """
+        script = self.get_script()
+        if script is None:
+            return [self.hit_without_script(key, limit, duration, now)
+                    for key, limit, duration in limits]
+
+        keys, args = [], [now]
+        for key, limit, duration in limits:
+            keys.extend(window_keys(self.cache.make_key(key), duration, now))
+            args.extend([limit, duration])
+
+        flat = script(keys=keys, args=args)
+        return [
+            (bool(allowed), wait_ms / 1000 if wait_ms else None)
+            for allowed, wait_ms in zip(flat[::2], flat[1::2])
+        ]
+
+    def hit_without_script(self, key, limit, duration, now):
+        current_key, previous_key = window_keys(key, duration, now)
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        elapsed = (now % duration) / duration
+
+        if previous * (1 - elapsed) + current >= limit:
+            wait = sliding_window_wait(
+                current, previous, limit, duration, now)
+            return False, math.ceil(wait * 1000) / 1000
+
+        timeout = math.ceil(duration * 2)
+        if not self.cache.add(current_key, 1, timeout):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr()
+                self.cache.set(current_key, 1, timeout)
+        return True, None
+
+
+sliding_window = SlidingWindowCounter()
+
+
+class LocalTokenBucket:
+    """
+    Per-process token buckets kept in front of the shared counters.
+    A bucket holds burst times the limit and refills at that many tokens
+    per duration, so it only runs dry for clients that are clearly over
+    the shared limit.
+    Those are rejected from memory without a Redis round-trip, as are
+    clients the shared counter has denied until their wait has passed.
+    The least recently used keys are evicted beyond max_keys.
+    """
+
+    def __init__(self, burst=2, max_keys=10000):
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, duration, now):
+        """
+        Take a token for key. Returns (allowed, wait in seconds).
+        """
+        return self.take_many([(key, limit, duration)], now)
+
+    def take_many(self, limits, now):
+        """
+        Take a token from every (key, limit, duration) bucket, or from
+        none of them if any is empty or blocked.
+        Returns (allowed, wait in seconds).
+        """
+        with self._lock:
+            states = []
+            wait = 0
+            for key, limit, duration in limits:
+                limit = limit * self.burst
+                rate = limit / duration
+                tokens, updated_at, blocked_until = self._buckets.get(
+                    key, (limit, now, 0))
+                if blocked_until > now:
+                    wait = max(wait, blocked_until - now)
+                    states.append((key, None))
+                    continue
+                tokens = min(limit, tokens + (now - updated_at) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                states.append((key, tokens))
+
+            allowed = wait == 0
+            for key, tokens in states:
+                if tokens is not None:
+                    if allowed:
+                        tokens -= 1
+                    self._buckets[key] = (tokens, now, 0)
+                self._buckets.move_to_end(key)
+
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, (None if allowed else wait)
+
+    def block(self, key, until):
+        """
+        Reject key locally until the shared counter would allow it again,
+        then let one request through to check with the shared counter.
+        """
+        with self._lock:
+            self._buckets[key] = (1, until, until)
+            self._buckets.move_to_end(key)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalTokenBucket(
+    burst=getattr(settings, 'LOCAL_THROTTLE_BURST', 2),
+    max_keys=getattr(settings, 'LOCAL_THROTTLE_MAX_KEYS', 10000)
+)
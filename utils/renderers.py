@@ -0,0 +1,97 @@
+# utils/renderers.py
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+# UUIDs, datetimes, dates and times are serialized natively; anything
+# else orjson does not know goes through DRF's encoder. Non-string dict
+# keys are rare and slow down every dump, so they are only enabled on a
+# retry.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+# orjson writes the same shortest floats as repr(), but 1e-05 as
+# 0.00001 and 1e+16 as 1e16. Such numbers follow a ':', ',' or '['
+# in compact output; when one may be there, numbers outside strings
+# are written again with repr()
+FLOAT_HINT = re.compile(rb'[:,\[]-?(?:\d+(?:\.\d+)?[eE]|0\.0000)')
+FLOAT_OR_STRING = re.compile(
+    rb'"(?:[^"\\]|\\.)*"'
+    rb'|(?<![\d.])-?(?:\d+(?:\.\d+)?[eE][-+]?\d+|0\.0000\d*)')
+
+_encoder = encoders.JSONEncoder()
+
+
+def orjson_default(obj):
+    return _encoder.default(obj)
+
+
+def repr_float(match):
+    token = match.group()
+    if token.startswith(b'"'):
+        return token
+    return repr(float(token)).encode()
+
+
+def dumps(data):
+    """
+    Serialize data the way DRF's JSONRenderer does, but faster.
+    NaN and infinite floats become null where JSONRenderer refuses
+    them; results never hold any.
+    """
+    try:
+        ret = orjson.dumps(
+            data, default=orjson_default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        ret = orjson.dumps(
+            data, default=orjson_default,
+            option=ORJSON_OPTIONS | orjson.OPT_NON_STR_KEYS)
+    if FLOAT_HINT.search(ret):
+        ret = FLOAT_OR_STRING.sub(repr_float, ret)
+    # Escape the separators JavaScript doesn't accept in strings, as
+    # JSONRenderer does. Both start with these bytes in UTF-8
+    if b'\xe2\x80' in ret:
+        ret = (ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+               .replace(b'\xe2\x80\xa9', b'\\u2029'))
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson.
+    Produces the same bytes as JSONRenderer with the default compact,
+    unicode output; indented or ASCII-only output falls back to it.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or self.ensure_ascii or not self.compact:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson, for UTF-8 request bodies.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
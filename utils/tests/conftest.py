@@ -4,10 +4,19 @@ from django.utils import timezone
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from polls.models import Poll, Vote, BlockedIP
+from utils.blocklist import blocklist
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def fresh_blocklist():
+    """Database rollbacks don't fire signals, so reload per test"""
+    blocklist.invalidate()
+    yield
+    blocklist.invalidate()
+
+
 @pytest.fixture
 def client():
     """Regular Django test client"""
@@ -0,0 +1,112 @@
+# utils/tests/test_autoblock.py
+import pytest
+from unittest.mock import patch
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django_redis import get_redis_connection
+from polls.models import BlockedIP
+from utils.autoblock import (AUTOBLOCK_GROUP, SUSPICIOUS_STREAM,
+                             SuspiciousEventAggregator, report_suspicious)
+from utils.middleware import SuspiciousRequestMiddleware
+
+
+@pytest.mark.django_db
+class TestAutoblockPipeline:
+    """Test the background aggregation of suspicious events"""
+
+    def setup_method(self):
+        self.client = get_redis_connection('default')
+        self.client.delete(SUSPICIOUS_STREAM)
+        for key in self.client.scan_iter('autoblock:*'):
+            self.client.delete(key)
+        self.aggregator = SuspiciousEventAggregator(
+            threshold=3, window=300, batch_size=10, consumer='test')
+
+    def test_report_adds_stream_event(self):
+        report_suspicious('192.168.1.170', 'throttled')
+
+        entries = self.client.xrange(SUSPICIOUS_STREAM)
+        assert len(entries) == 1
+        assert entries[0][1] == {b'ip': b'192.168.1.170',
+                                 b'kind': b'throttled'}
+
+    @patch('utils.autoblock.logger')
+    def test_report_failure_does_not_raise(self, mock_logger):
+        with patch('utils.autoblock.get_redis_connection',
+                   side_effect=ConnectionError("redis down")):
+            report_suspicious('192.168.1.170', 'throttled')
+
+        mock_logger.warning.assert_called_once()
+
+    @patch('utils.autoblock.notify_blocklist_changed')
+    def test_throttled_ip_blocked(self, mock_notify):
+        report_suspicious('192.168.1.171', 'throttled')
+        report_suspicious('192.168.1.171', 'throttled')
+
+        assert self.aggregator.process_pending() == 2
+
+        blocked_ip = BlockedIP.objects.get()
+        assert blocked_ip.ip_address == '192.168.1.171'
+        assert blocked_ip.is_active
+        mock_notify.assert_called_once()
+        pending = self.client.xpending(SUSPICIOUS_STREAM, AUTOBLOCK_GROUP)
+        assert pending['pending'] == 0
+
+    def test_suspicious_responses_block_at_threshold(self):
+        """Test that counts accumulate across batches"""
+        for _ in range(2):
+            report_suspicious('192.168.1.172', 'response')
+        self.aggregator.process_pending()
+        assert not BlockedIP.objects.exists()
+
+        report_suspicious('192.168.1.172', 'response')
+        self.aggregator.process_pending()
+        assert BlockedIP.objects.filter(ip_address='192.168.1.172').exists()
+
+    def test_validation_errors_do_not_block(self):
+        """Test that a burst of bad input from one client is not abuse"""
+        for status in (400, 401, 429):
+            middleware = SuspiciousRequestMiddleware(
+                get_response=lambda request: HttpResponse(status=status))
+            for _ in range(10):
+                request = RequestFactory().post('/api/polls/')
+                request.META['REMOTE_ADDR'] = '192.168.1.173'
+                request.user = None
+                middleware(request)
+
+        self.aggregator.process_pending()
+
+        assert not self.client.xlen(SUSPICIOUS_STREAM)
+        assert not BlockedIP.objects.exists()
+
+    def test_existing_block_not_duplicated(self, blocked_ip):
+        BlockedIP.objects.filter(pk=blocked_ip.pk).update(is_active=False)
+        report_suspicious(blocked_ip.ip_address, 'throttled')
+
+        with patch('utils.autoblock.notify_blocklist_changed') as mock_notify:
+            self.aggregator.process_pending()
+
+        assert BlockedIP.objects.count() == 1
+        mock_notify.assert_not_called()
+
+    def test_invalid_ip_ignored(self):
+        report_suspicious('not-an-ip', 'throttled')
+        report_suspicious('192.168.1.173', 'throttled')
+
+        self.aggregator.process_pending()
+
+        assert list(BlockedIP.objects.values_list(
+            'ip_address', flat=True)) == ['192.168.1.173']
+
+    def test_unacknowledged_events_retried(self):
+        """Test that events survive a worker failure"""
+        report_suspicious('192.168.1.174', 'throttled')
+
+        with patch.object(self.aggregator, 'block',
+                          side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                self.aggregator.process_pending()
+        assert not BlockedIP.objects.exists()
+
+        self.aggregator.process_pending()
+        assert BlockedIP.objects.filter(ip_address='192.168.1.174').exists()
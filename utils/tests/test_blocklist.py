@@ -0,0 +1,103 @@
+# utils/tests/test_blocklist.py
+import ipaddress
+import pytest
+from unittest.mock import patch
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from polls.models import BlockedIP
+from utils.blocklist import (BLOCKLIST_CHANNEL, PrefixTrie, blocklist,
+                             notify_blocklist_changed)
+from utils.middleware import BlockedIPMiddleware
+
+
+class TestPrefixTrie:
+    """Test CIDR matching in the prefix trie"""
+
+    def test_ipv4_network_membership(self):
+        trie = PrefixTrie(32)
+        trie.insert(ipaddress.ip_network('10.0.0.0/8'))
+        trie.insert(ipaddress.ip_network('192.168.1.0/24'))
+
+        assert trie.contains(ipaddress.ip_address('10.20.30.40'))
+        assert trie.contains(ipaddress.ip_address('192.168.1.255'))
+        assert not trie.contains(ipaddress.ip_address('192.168.2.1'))
+        assert not trie.contains(ipaddress.ip_address('11.0.0.1'))
+
+    def test_ipv6_network_membership(self):
+        trie = PrefixTrie(128)
+        trie.insert(ipaddress.ip_network('2001:db8::/32'))
+
+        assert trie.contains(ipaddress.ip_address('2001:db8::1'))
+        assert not trie.contains(ipaddress.ip_address('2001:db9::1'))
+
+    def test_empty_trie(self):
+        trie = PrefixTrie(32)
+        assert not trie
+        assert not trie.contains(ipaddress.ip_address('10.0.0.1'))
+
+
+@pytest.mark.django_db
+class TestBlocklist:
+    """Test the in-memory blocklist used by BlockedIPMiddleware"""
+
+    def test_blocks_single_address(self, blocked_ip):
+        assert blocklist.is_blocked('192.168.1.100') is True
+        assert blocklist.is_blocked('192.168.1.101') is False
+
+    def test_blocks_cidr_range(self):
+        BlockedIP.objects.create(
+            ip_address='203.0.113.0',
+            prefix_length=24,
+            reason='Test range'
+        )
+
+        assert blocklist.is_blocked('203.0.113.7') is True
+        assert blocklist.is_blocked('203.0.114.7') is False
+
+    def test_invalid_address_is_not_blocked(self, blocked_ip):
+        assert blocklist.is_blocked('not-an-ip') is False
+
+    def test_lookups_do_not_query_database(self, blocked_ip):
+        blocklist.ensure_loaded()
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(10):
+                blocklist.is_blocked('192.168.1.100')
+
+        assert len(queries) == 0
+
+    def test_changes_invalidate_local_copy(self, blocked_ip):
+        assert blocklist.is_blocked('192.168.1.100') is True
+
+        blocked_ip.is_active = False
+        blocked_ip.save()
+        assert blocklist.is_blocked('192.168.1.100') is False
+
+        blocked_ip.delete()
+        BlockedIP.objects.create(ip_address='192.168.1.50', reason='New')
+        assert blocklist.is_blocked('192.168.1.50') is True
+
+    @patch('utils.blocklist.get_redis_connection')
+    def test_change_published_after_commit(
+            self, mock_connection, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            notify_blocklist_changed()
+
+        mock_connection.return_value.publish.assert_called_once_with(
+            BLOCKLIST_CHANNEL, 'reload')
+
+    def test_middleware_blocks_cidr_range(self):
+        BlockedIP.objects.create(
+            ip_address='198.51.100.0',
+            prefix_length=24,
+            reason='Test range'
+        )
+        middleware = BlockedIPMiddleware(
+            get_response=lambda request: HttpResponse())
+        request = RequestFactory().get('/api/polls/')
+        request.META['REMOTE_ADDR'] = '198.51.100.23'
+
+        response = middleware.process_request(request)
+        assert response.status_code == 403
@@ -0,0 +1,66 @@
+# utils/tests/test_ids.py
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from utils import ids
+from utils.ids import uuid7, uuid7_time
+
+
+class TestUUID7:
+    """Test the time-ordered UUID generator"""
+
+    @pytest.fixture(autouse=True)
+    def restore_clock(self):
+        """Don't leave ids dated in the future for later tests"""
+        state = ids._last_ms, ids._counter
+        yield
+        ids._last_ms, ids._counter = state
+
+    def test_version_and_variant(self):
+        value = uuid7()
+
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+        assert str(uuid.UUID(str(value))) == str(value)
+
+    def test_encodes_creation_time(self):
+        before = time.time()
+        value = uuid7()
+
+        assert before - 0.001 <= uuid7_time(value) <= time.time()
+
+    def test_ids_increase(self):
+        values = [uuid7() for _ in range(10000)]
+
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
+    def test_ids_increase_when_clock_goes_back(self):
+        first = uuid7()
+        with patch.object(ids.time, 'time_ns',
+                          return_value=time.time_ns() - 10 ** 9):
+            second = uuid7()
+
+        assert second > first
+
+    def test_counter_overflow_moves_to_next_millisecond(self):
+        now = time.time_ns() + 10 ** 9
+        with patch.object(ids.time, 'time_ns', return_value=now):
+            values = [uuid7() for _ in range(ids.COUNTER_MAX + 2)]
+
+        assert values == sorted(values)
+        assert uuid7_time(values[-1]) > uuid7_time(values[0])
+
+
+@pytest.mark.django_db
+class TestModelIds:
+    """Test that new rows get time-ordered ids"""
+
+    def test_new_rows_use_uuid7(self, user, poll, created_vote):
+        for instance in (user, poll, created_vote):
+            assert instance.pk.version == 7
+
+    def test_ids_follow_creation_order(self, poll, future_poll):
+        assert poll.pk < future_poll.pk
@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch
 from django.test import RequestFactory, TestCase
 from django.http import HttpResponse
 from polls.models import BlockedIP
+from utils.autoblock import aggregator
 from utils.middleware import BlockedIPMiddleware, SuspiciousRequestMiddleware
 from utils.throttling import SuspiciousRequestThrottle
 
@@ -41,6 +42,9 @@ class TestTrafficControlIntegration(TestCase):
                 # This should trigger IP blocking
                 self.throttle.throttle_failure(request, response)
 
+        # The autoblock worker picks up the reported IP
+        aggregator.process_pending()
+
         # Verify the IP was blocked
         blocked_ip = BlockedIP.objects.get(ip_address='192.168.1.100')
         assert blocked_ip.is_active is True
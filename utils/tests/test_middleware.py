@@ -1,8 +1,11 @@
 # utils/tests/test_middleware.py
 import pytest
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.test import RequestFactory
 from django.http import HttpResponse
-from utils.middleware import BlockedIPMiddleware
+from utils.blocklist import blocklist
+from utils.middleware import BlockedIPMiddleware, SuspiciousRequestMiddleware
 
 from polls.models import BlockedIP
 
@@ -85,3 +88,80 @@ class TestBlockedIPMiddleware:
 
         ip = middleware.get_client_ip(request)
         assert ip == '192.168.1.100'  # Should use
+
+
+@pytest.mark.django_db
+class TestAsyncMiddleware:
+    """Test the native async path of the custom middleware"""
+
+    async def async_ok(self, request):
+        return HttpResponse()
+
+    def test_async_mode_detected(self):
+        middleware = BlockedIPMiddleware(get_response=self.async_ok)
+        assert iscoroutinefunction(middleware)
+
+        middleware = BlockedIPMiddleware(
+            get_response=lambda request: HttpResponse())
+        assert not iscoroutinefunction(middleware)
+
+    def test_async_blocked_ip(self, blocked_ip):
+        middleware = BlockedIPMiddleware(get_response=self.async_ok)
+        request = RequestFactory().get('/api/polls/')
+        request.META['REMOTE_ADDR'] = '192.168.1.100'
+
+        response = async_to_sync(middleware)(request)
+        assert response.status_code == 403
+
+    def test_async_allowed_ip_stays_on_event_loop(self, blocked_ip):
+        """Test that a loaded blocklist needs no sync_to_async hop"""
+        blocklist.ensure_loaded()
+        middleware = BlockedIPMiddleware(get_response=self.async_ok)
+        request = RequestFactory().get('/api/polls/')
+        request.META['REMOTE_ADDR'] = '192.168.1.200'
+
+        with patch('utils.blocklist.sync_to_async') as mock_sync_to_async:
+            response = async_to_sync(middleware)(request)
+
+        assert response.status_code == 200
+        mock_sync_to_async.assert_not_called()
+
+    @patch('utils.middleware.report_suspicious')
+    @patch('utils.middleware.logger')
+    def test_async_suspicious_response_logged(self, mock_logger,
+                                              mock_report_suspicious):
+        async def forbidden(request):
+            return HttpResponse(status=403)
+
+        middleware = SuspiciousRequestMiddleware(get_response=forbidden)
+        request = RequestFactory().post('/api/auth/login/')
+        request.META['REMOTE_ADDR'] = '192.168.1.100'
+        request.user = None
+
+        response = async_to_sync(middleware)(request)
+        assert response.status_code == 403
+        mock_logger.warning.assert_called_once()
+        mock_report_suspicious.assert_called_once_with(
+            '192.168.1.100', 'response')
+
+    @patch('utils.middleware.report_suspicious')
+    @patch('utils.middleware.logger')
+    def test_async_bad_request_logged_not_reported(self, mock_logger,
+                                                   mock_report_suspicious):
+        async def bad_request(request):
+            return HttpResponse(status=400)
+
+        middleware = SuspiciousRequestMiddleware(get_response=bad_request)
+        request = RequestFactory().post('/api/auth/login/')
+        request.META['REMOTE_ADDR'] = '192.168.1.100'
+        request.user = None
+
+        response = async_to_sync(middleware)(request)
+        assert response.status_code == 400
+        mock_logger.warning.assert_called_once()
+        mock_report_suspicious.assert_not_called()
+
+    def test_health_check(self, client):
+        response = client.get('/api/health/')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'healthy'
@@ -0,0 +1,105 @@
+# utils/tests/test_renderers.py
+import datetime
+import decimal
+import io
+import uuid
+import zoneinfo
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from utils.renderers import ORJSONParser, ORJSONRenderer
+
+
+class TestORJSONRenderer:
+    """Test that the orjson renderer matches DRF's JSONRenderer"""
+
+    def assert_same_output(self, data, media_type=None):
+        expected = JSONRenderer().render(data, media_type)
+        assert ORJSONRenderer().render(data, media_type) == expected
+
+    @pytest.mark.parametrize('value', [
+        uuid.uuid4(),
+        datetime.datetime(2026, 1, 5, 12, 30, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2026, 1, 5, 12, 30, 0, 1500,
+                          tzinfo=datetime.timezone.utc),
+        datetime.datetime(2026, 1, 5, 12, 30,
+                          tzinfo=zoneinfo.ZoneInfo('Africa/Nairobi')),
+        datetime.datetime(2026, 1, 5, 12, 30),
+        datetime.date(2026, 1, 5),
+        datetime.time(12, 30, 1, 4),
+        datetime.timedelta(hours=1),
+        decimal.Decimal('1.50'),
+        gettext_lazy('Poll'),
+        'Ünïcödé and emoji 🗳',
+        'line separator ',
+        None,
+        {1: 'int key', None: 'none key'},
+        ('a', 'tuple'),
+        1e-05,
+        -2.5e-07,
+        0.0001,
+        100 / 3,
+        1e16,
+        -1.2345678901234568e+17,
+        5e-324,
+        'not a float:1e16,0.00001',
+    ])
+    def test_values(self, value):
+        self.assert_same_output({'value': value, 'list': [value]})
+
+    @pytest.mark.parametrize('value', [
+        float('nan'), float('inf'), float('-inf')])
+    def test_non_finite_floats_become_null(self, value):
+        """JSONRenderer refuses them, the results never hold any"""
+        with pytest.raises(ValueError):
+            JSONRenderer().render({'value': value})
+
+        assert ORJSONRenderer().render({'value': value}) == \
+            b'{"value":null}'
+
+    def test_serializer_output(self):
+        data = ReturnDict(
+            {'results': ReturnList([{'id': 1}], serializer=None)},
+            serializer=None)
+        self.assert_same_output(data)
+
+    def test_indented_output_falls_back(self):
+        self.assert_same_output(
+            {'nested': {'value': 1}}, 'application/json; indent=4')
+
+    def test_empty_body(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    @pytest.mark.django_db
+    def test_api_response(self, client, poll):
+        response = client.get(reverse('poll-detail', kwargs={'pk': poll.id}))
+
+        assert response.status_code == 200
+        assert response.content == JSONRenderer().render(response.data)
+
+
+class TestORJSONParser:
+    """Test the orjson request parser"""
+
+    def test_parse(self):
+        stream = io.BytesIO('{"question": "Ünïcödé?", "n": 1}'.encode())
+
+        data = ORJSONParser().parse(stream)
+
+        assert data == {'question': 'Ünïcödé?', 'n': 1}
+
+    def test_invalid_json(self):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"question": '))
+
+    def test_other_encodings_fall_back(self):
+        stream = io.BytesIO('{"question": "Ünïcödé?"}'.encode('latin-1'))
+
+        data = ORJSONParser().parse(
+            stream, parser_context={'encoding': 'latin-1'})
+
+        assert data == {'question': 'Ünïcödé?'}
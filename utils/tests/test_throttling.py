@@ -1,12 +1,14 @@
 # utils/tests/test_throttling.py
 
-from django.utils import timezone
 import pytest
 from unittest.mock import Mock, patch
 from django.core.cache import cache
 from django.test import RequestFactory
 from polls.models import BlockedIP
-from utils.throttling import SuspiciousRequestThrottle
+from django_redis import get_redis_connection
+from utils.ratelimit import (LocalTokenBucket, SlidingWindowCounter,
+                             local_buckets, sliding_window, window_keys)
+from utils.throttling import CompositeRateThrottle, SuspiciousRequestThrottle
 
 
 @pytest.mark.django_db
@@ -16,6 +18,7 @@ class TestSuspiciousRequestThrottle:
     def setup_method(self):
         """Clear cache before each test"""
         cache.clear()
+        local_buckets.clear()
 
     def test_get_cache_key_anonymous_user(self):
         """Test cache key generation for anonymous users"""
@@ -45,12 +48,9 @@ class TestSuspiciousRequestThrottle:
         assert 'suspicious' in cache_key
         assert '123' in cache_key  # Should use user ID
 
-    @patch('utils.throttling.BlockedIP.objects')
-    def test_throttle_failure_blocks_ip(self, mock_blocked_ip_manager):
-        """Test that throttle failure blocks IP addresses"""
-        mock_blocked_ip_manager.filter.return_value.exists.return_value = False
-        mock_blocked_ip_manager.create.return_value = None
-
+    @patch('utils.throttling.report_suspicious')
+    def test_throttle_failure_blocks_ip(self, mock_report_suspicious):
+        """Test that throttle failure queues the IP address for blocking"""
         throttle = SuspiciousRequestThrottle()
         factory = RequestFactory()
 
@@ -67,24 +67,22 @@ class TestSuspiciousRequestThrottle:
         with patch.object(throttle, 'wait') as _:
             throttle.throttle_failure(request, response)
 
-        # Should attempt to create a blocked IP entry
-        mock_blocked_ip_manager.create.assert_called_once_with(
-            ip_address='192.168.1.100',
-            reason="Automatically blocked due to excessive suspicious requests"
-        )
-
-    @patch('utils.throttling.BlockedIP.objects')
-    def test_throttle_failure_existing_block(self, mock_blocked_ip_manager):
-        """Test that throttle failure doesn't duplicate existing blocks"""
-        mock_blocked_ip_manager.filter.return_value.exists.return_value = True
+        # Should report the IP without touching the database
+        mock_report_suspicious.assert_called_once_with(
+            '192.168.1.100', 'throttled')
+        assert not BlockedIP.objects.exists()
 
+    @patch('utils.throttling.report_suspicious')
+    def test_throttle_failure_authenticated_user(self,
+                                                 mock_report_suspicious):
+        """Test that throttled users are not reported by IP"""
         throttle = SuspiciousRequestThrottle()
         factory = RequestFactory()
 
         request = factory.get('/api/auth/login/')
         request.META['REMOTE_ADDR'] = '192.168.1.100'
         request.user = Mock()
-        request.user.is_authenticated = False
+        request.user.is_authenticated = True
 
         response = Mock()
         response.status_code = 429
@@ -92,57 +90,248 @@ class TestSuspiciousRequestThrottle:
         with patch.object(throttle, 'wait') as _:
             throttle.throttle_failure(request, response)
 
-        # Should not create duplicate block
-        mock_blocked_ip_manager.create.assert_not_called()
+        mock_report_suspicious.assert_not_called()
 
+    @patch('utils.throttling.report_suspicious')
     @patch('utils.throttling.logger')
-    def test_block_suspicious_ip_logging(self, mock_logger):
+    def test_block_suspicious_ip_logging(self, mock_logger, _):
         """Test that IP blocking is logged"""
         throttle = SuspiciousRequestThrottle()
 
-        # Mock the database operations
-        with patch.object(BlockedIP.objects, 'filter') as mock_filter, \
-                patch.object(BlockedIP.objects, 'create') as mock_create:
-
-            mock_filter.return_value.exists.return_value = False
-            mock_create.return_value = None
+        throttle.block_suspicious_ip('192.168.1.100')
 
-            throttle.block_suspicious_ip('192.168.1.100')
-
-            # Should log the blocking action
-            mock_logger.warning.assert_called_once()
-            args, _ = mock_logger.warning.call_args
-            log_message = args[0]
-            assert '192.168.1.100' in log_message
+        # Should log the blocking action
+        mock_logger.warning.assert_called_once()
+        args, _ = mock_logger.warning.call_args
+        log_message = args[0]
+        assert '192.168.1.100' in log_message
 
     def test_throttle_rate_limiting(self):
         """Test that the throttle actually limits requests"""
         throttle = SuspiciousRequestThrottle()
         factory = RequestFactory()
 
-        # First request should be allowed
         request = factory.get('/api/auth/login/')
         request.META['REMOTE_ADDR'] = '192.168.1.100'
         request.user = Mock()
-        request.user.is_authenticated = False
+        request.user.is_authenticated = True
+        request.user.pk = 'rate-limit-test'
 
-        # Mock the rate check
-        with patch.object(throttle, 'get_cache_key') as mock_key, \
-                patch.object(throttle, 'cache') as mock_cache:
+        now = 1_000_000.0
+        with patch.object(throttle, 'timer', return_value=now):
+            # First five requests in the window should be allowed
+            for _ in range(5):
+                assert throttle.allow_request(request, None) is True
 
-            mock_key.return_value = 'test_key'
-            # No previous requests
-            mock_cache.get.return_value = []
+            # Sixth request should be throttled
+            assert throttle.allow_request(request, None) is False
+            assert 0 < throttle.wait() <= 60
 
-            # First request should be allowed
-            first_result = throttle.allow_request(request, None)
-            print("first req result:", first_result)
-            assert first_result is True
+    def test_denied_without_wait_time(self):
+        """Test a denial the counter reports with no wait"""
+        throttle = SuspiciousRequestThrottle()
+        factory = RequestFactory()
 
-            # Simulate 5 previous requests in the last minute
-            mock_cache.get.return_value = [
-                timezone.now().timestamp() for _ in range(5)]
-            print("in test mocked ret value:", mock_cache.get(mock_key))
+        request = factory.get('/api/auth/login/')
+        request.META['REMOTE_ADDR'] = '192.168.1.100'
+        request.user = Mock()
+        request.user.is_authenticated = True
+        request.user.pk = 'zero-wait-test'
 
-            # Sixth request should be throttled
+        with patch.object(sliding_window, 'hit', return_value=(False, None)):
+            assert throttle.allow_request(request, None) is False
+        assert throttle.wait() is None
+
+    def test_throttle_window_slides(self):
+        """Test that the previous window's weight decays over time"""
+        throttle = SuspiciousRequestThrottle()
+        factory = RequestFactory()
+
+        request = factory.get('/api/auth/login/')
+        request.META['REMOTE_ADDR'] = '192.168.1.100'
+        request.user = Mock()
+        request.user.is_authenticated = True
+        request.user.pk = 'sliding-window-test'
+
+        window_start = 60 * 20_000
+        with patch.object(throttle, 'timer', return_value=window_start + 59):
+            for _ in range(5):
+                assert throttle.allow_request(request, None) is True
+            assert throttle.allow_request(request, None) is False
+
+        # Halfway through, only half of the previous window counts
+        with patch.object(throttle, 'timer', return_value=window_start + 90):
+            for _ in range(3):
+                assert throttle.allow_request(request, None) is True
+            assert throttle.allow_request(request, None) is False
+
+    def test_counter_is_constant_memory(self):
+        """Test that the counter stores integers, not request histories"""
+        counter = SlidingWindowCounter()
+        now = 60 * 30_000 + 1
+
+        for _ in range(3):
+            counter.hit('throttle_memory_test', 10, 60, now)
+
+        client = get_redis_connection('default')
+        current_key, _ = window_keys(
+            cache.make_key('throttle_memory_test'), 60, now)
+        assert int(client.get(current_key)) == 3
+        assert 0 < client.ttl(current_key) <= 120
+
+    def test_counter_without_redis_script(self):
+        """Test the fallback used by non-Redis cache backends"""
+        counter = SlidingWindowCounter()
+        now = 60 * 40_000 + 1
+
+        with patch.object(counter, 'get_script', return_value=None):
+            results = [counter.hit('throttle_fallback_test', 2, 60, now)
+                       for _ in range(3)]
+
+        assert [allowed for allowed, _ in results] == [True, True, False]
+        assert results[-1][1] > 0
+
+
+@pytest.mark.django_db
+class TestCompositeRateThrottle:
+    """Test single round-trip evaluation of all throttle scopes"""
+
+    def setup_method(self):
+        cache.clear()
+        local_buckets.clear()
+
+    def make_request(self, ip_address, user=None):
+        request = RequestFactory().get('/api/polls/')
+        request.META['REMOTE_ADDR'] = ip_address
+        if user is None:
+            user = Mock()
+            user.is_authenticated = False
+        request.user = user
+        return request
+
+    def test_anonymous_scopes(self):
+        throttle = CompositeRateThrottle()
+        request = self.make_request('192.168.1.150')
+
+        scopes = [t.scope for t in throttle.get_throttles(request, None)]
+        assert scopes == ['anon', 'user', 'suspicious']
+
+    def test_authenticated_scopes(self, user):
+        throttle = CompositeRateThrottle()
+        request = self.make_request('192.168.1.150', user=user)
+
+        scopes = [t.scope for t in throttle.get_throttles(request, None)]
+        assert scopes == ['user', 'suspicious']
+
+    def test_local_requests_skip_suspicious_scope(self):
+        throttle = CompositeRateThrottle()
+        request = self.make_request('127.0.0.1')
+
+        scopes = [t.scope for t in throttle.get_throttles(request, None)]
+        assert 'suspicious' not in scopes
+
+    def test_one_round_trip_per_request(self):
+        """Test that all scopes are evaluated by a single script call"""
+        throttle = CompositeRateThrottle()
+        request = self.make_request('192.168.1.151')
+        script = sliding_window.get_script()
+
+        with patch.object(sliding_window, 'get_script') as mock_get_script:
+            mock_get_script.return_value = Mock(side_effect=script)
+            assert throttle.allow_request(request, None) is True
+
+        mock_get_script.return_value.assert_called_once()
+        _, kwargs = mock_get_script.return_value.call_args
+        assert len(kwargs['keys']) == 6  # current and previous per scope
+
+    @patch('utils.throttling.report_suspicious')
+    def test_most_restrictive_verdict_wins(self, mock_report_suspicious):
+        """Test that the suspicious limit throttles before the anon one"""
+        throttle = CompositeRateThrottle()
+        request = self.make_request('192.168.1.152')
+
+        with patch.object(throttle, 'timer', return_value=60 * 50_000 + 1):
+            for _ in range(5):
+                assert throttle.allow_request(request, None) is True
             assert throttle.allow_request(request, None) is False
+
+        assert 0 < throttle.wait() <= 60
+        mock_report_suspicious.assert_called_once_with(
+            '192.168.1.152', 'throttled')
+
+
+class TestLocalTokenBucket:
+    """Test the per-process token bucket in front of Redis"""
+
+    def test_bucket_empties_and_refills(self):
+        bucket = LocalTokenBucket(burst=1)
+
+        for _ in range(5):
+            assert bucket.take('key', 5, 60, 1000) == (True, None)
+        allowed, wait = bucket.take('key', 5, 60, 1000)
+
+        assert allowed is False
+        assert wait == pytest.approx(12)
+        assert bucket.take('key', 5, 60, 1012)[0] is True
+
+    def test_blocked_key_waits_for_shared_counter(self):
+        bucket = LocalTokenBucket(burst=1)
+        bucket.take('key', 5, 60, 1000)
+
+        bucket.block('key', 1030)
+
+        assert bucket.take('key', 5, 60, 1010) == (False, 20)
+        # One request may check with the shared counter again
+        assert bucket.take('key', 5, 60, 1030)[0] is True
+        assert bucket.take('key', 5, 60, 1030)[0] is False
+
+    def test_take_many_is_all_or_nothing(self):
+        bucket = LocalTokenBucket(burst=1)
+        bucket.block('blocked', 1030)
+
+        allowed, _ = bucket.take_many(
+            [('open', 1, 60), ('blocked', 5, 60)], 1000)
+
+        assert allowed is False
+        assert bucket.take('open', 1, 60, 1000)[0] is True
+
+    def test_burst_allows_more_than_the_limit(self):
+        bucket = LocalTokenBucket(burst=2)
+
+        for _ in range(10):
+            assert bucket.take('key', 5, 60, 1000)[0] is True
+        assert bucket.take('key', 5, 60, 1000)[0] is False
+
+    def test_least_recently_used_keys_evicted(self):
+        bucket = LocalTokenBucket(max_keys=2)
+        bucket.block('first', 2000)
+        bucket.take('second', 5, 60, 1000)
+        bucket.take('third', 5, 60, 1000)
+
+        assert bucket.take('first', 5, 60, 1000)[0] is True
+
+
+@pytest.mark.django_db
+class TestLocalPreThrottle:
+    """Test that denied clients stop reaching Redis"""
+
+    def setup_method(self):
+        cache.clear()
+        local_buckets.clear()
+
+    def test_denied_client_rejected_without_redis(self):
+        throttle = CompositeRateThrottle()
+        request = RequestFactory().get('/api/polls/')
+        request.META['REMOTE_ADDR'] = '192.168.1.160'
+        request.user = Mock()
+        request.user.is_authenticated = False
+
+        with patch.object(throttle, 'timer', return_value=60 * 50_000 + 1):
+            for _ in range(6):
+                throttle.allow_request(request, None)
+
+            with patch.object(sliding_window, 'hit_many') as mock_hit_many:
+                assert throttle.allow_request(request, None) is False
+
+        mock_hit_many.assert_not_called()
+        assert 0 < throttle.wait() <= 60
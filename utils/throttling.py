@@ -1,7 +1,10 @@
 # utils/throttling.py
-from rest_framework.throttling import SimpleRateThrottle
-from polls.models import BlockedIP
+from rest_framework.throttling import (AnonRateThrottle, BaseThrottle,
+                                       SimpleRateThrottle, UserRateThrottle)
+from utils.autoblock import THROTTLED, report_suspicious
+from utils.ratelimit import local_buckets, sliding_window
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,9 +12,20 @@ logger = logging.getLogger(__name__)
 class SuspiciousRequestThrottle(SimpleRateThrottle):
     """
     Custom throttle to detect and handle suspicious request patterns.
-    Automatically blocks IPs that exceed the suspicious rate limit.
+    Automatically blocks IPs that exceed the suspicious rate limit,
+    through the background autoblock pipeline.
+    Counts requests with a sliding window counter evaluated in Redis,
+    one atomic round-trip per request. Clients that are clearly over the
+    limit are rejected by a local token bucket before reaching Redis.
     """
     scope = 'suspicious'
+    counter = sliding_window
+    local_bucket = local_buckets
+    wait_time = None
+
+    def is_exempt(self, request):
+        # skip local
+        return self.get_ident(request) in ('127.0.0.1', '0.0.0.0')
 
     def get_cache_key(self, request, view):
         # Use IP address for anonymous users, user ID for authenticated users
@@ -29,12 +43,10 @@ class SuspiciousRequestThrottle(SimpleRateThrottle):
         """
         Implement the check to see if the request should be throttled.
 
-        On success calls `throttle_success`.
+        On success the request is counted in the sliding window.
         On failure calls `throttle_failure`.
         """
-        ip_address = self.get_ident(request)
-        # skip local
-        if ip_address == '127.0.0.1' or ip_address == "0.0.0.0":
+        if self.is_exempt(request):
             return True
         self.rate = self.get_rate()
         self.num_requests, self.duration = self.parse_rate(self.rate)
@@ -45,18 +57,24 @@ class SuspiciousRequestThrottle(SimpleRateThrottle):
         if self.key is None:
             return True
 
-        self.history = self.cache.get(self.key, [])
         self.now = self.timer()
+        allowed, self.wait_time = self.local_bucket.take(
+            self.key, self.num_requests, self.duration, self.now)
+        if not allowed:
+            # Already rejected by the shared counter or far over the limit
+            return False
 
-        # Drop any requests from the history which have now passed the
-        # throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
-        if len(self.history) >= self.num_requests:
+        allowed, self.wait_time = self.counter.hit(
+            self.key, self.num_requests, self.duration, self.now)
+        if not allowed:
+            self.local_bucket.block(self.key, self.now + (self.wait_time or 0))
             # pass correct argument required by override
             return self.throttle_failure(request, view)
-        print("going to throttle success")
-        return self.throttle_success()
+        return True
+
+    def wait(self):
+        """Seconds until the next request would be allowed"""
+        return self.wait_time
 
     def throttle_failure(self, request, response):
         """
@@ -74,13 +92,71 @@ class SuspiciousRequestThrottle(SimpleRateThrottle):
 
     def block_suspicious_ip(self, ip_address):
         """
-        Automatically block an IP address due to suspicious activity.
+        Queue the IP address for blocking due to suspicious activity.
+        The autoblock worker creates the block outside the request.
         """
-        if not BlockedIP.objects.filter(ip_address=ip_address).exists():
-            BlockedIP.objects.create(
-                ip_address=ip_address,
-                reason=("Automatically blocked due"
-                        " to excessive suspicious requests")
-            )
-            logger.warning(
-                f"Automatically blocked suspicious IP: {ip_address}")
+        report_suspicious(ip_address, THROTTLED)
+        logger.warning(
+            f"Reported suspicious IP for blocking: {ip_address}")
+
+
+class CompositeRateThrottle(BaseThrottle):
+    """
+    Evaluates the anon, user and suspicious rate limits together.
+    All applicable limits are checked and counted in one Redis round-trip
+    and the most restrictive verdict wins. Local token buckets reject
+    clients that are clearly over a limit without any round-trip.
+    """
+    throttle_classes = [
+        AnonRateThrottle,
+        UserRateThrottle,
+        SuspiciousRequestThrottle,
+    ]
+    counter = sliding_window
+    local_bucket = local_buckets
+    timer = time.time
+    wait_time = None
+
+    def get_throttles(self, request, view):
+        """Instantiate the component throttles that apply to the request"""
+        throttles = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if throttle.rate is None:
+                continue
+            if (isinstance(throttle, SuspiciousRequestThrottle) and
+                    throttle.is_exempt(request)):
+                continue
+            throttle.key = throttle.get_cache_key(request, view)
+            if throttle.key is not None:
+                throttles.append(throttle)
+        return throttles
+
+    def allow_request(self, request, view):
+        throttles = self.get_throttles(request, view)
+        if not throttles:
+            return True
+
+        now = self.timer()
+        limits = [(throttle.key, throttle.num_requests, throttle.duration)
+                  for throttle in throttles]
+        allowed, self.wait_time = self.local_bucket.take_many(limits, now)
+        if not allowed:
+            return False
+
+        results = self.counter.hit_many(limits, now)
+
+        allowed = True
+        for throttle, (throttle_allowed, wait) in zip(throttles, results):
+            if throttle_allowed:
+                continue
+            allowed = False
+            self.wait_time = max(self.wait_time or 0, wait or 0)
+            self.local_bucket.block(throttle.key, now + (wait or 0))
+            if isinstance(throttle, SuspiciousRequestThrottle):
+                throttle.throttle_failure(request, view)
+
+        return allowed
+
+    def wait(self):
+        return self.wait_time